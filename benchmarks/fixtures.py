@@ -0,0 +1,245 @@
+import copy
+import json
+import random
+import time
+from crypto_twitter_bot.config import load_config
+
+# Protocols given to synthetic tokens in turn, so every protocol-specific source
+# (Magic Eden, Unisat BRC20, Unisat CAT20) gets its share of the universe
+PROTOCOLS = ('Runes', 'BRC20', 'CAT20', 'SRC20', 'Other')
+
+BTC_PRICE = 65000.0
+DAY_MS = 86400 * 1000
+
+class Universe:
+    """The tracked tokens of a benchmark run and how each one is listed
+
+    The first tokens are the ones configured in crypto_bot.json, with their real
+    protocols and source lists; the rest are synthetic ``TKnnnn`` symbols. Every
+    tenth token is missing from OKX so the fallback sources get exercised, and
+    only every third one trades on Binance.
+    """
+
+    def __init__(self, size, config=None, seed=0):
+        self.config = config if config is not None else load_config()
+        settings = self.config.get('data_sources', {}).get('bitcoin_ecosystem', {})
+        configured = settings.get('tokens', [])[:size]
+        self.tokens = configured + [f"TK{i:04d}" for i in range(len(configured), size)]
+        self._positions = {token: i for i, token in enumerate(self.tokens)}
+        self.protocols = {
+            token: settings.get('protocols', {}).get(token, PROTOCOLS[i % len(PROTOCOLS)])
+            for i, token in enumerate(self.tokens)
+        }
+        self.sources = {token: sources for token, sources in settings.get('sources', {}).items() if token in self.tokens}
+        self.coingecko_ids = {
+            token: settings.get('coingecko_ids', {}).get(token, f"{token.lower()}-token")
+            for token in self.tokens
+        }
+        rng = random.Random(seed)
+        self.quotes = {
+            token: {
+                'price': round(rng.uniform(0.001, 50), 6),
+                'volume': round(rng.uniform(1e4, 5e7), 2),
+                'change': round(rng.uniform(-15, 15), 2)
+            }
+            for token in self.tokens
+        }
+
+    def on_okx(self, token):
+        return self._positions[token] % 10 != 9
+
+    def on_binance(self, token):
+        return self._positions[token] % 3 == 0
+
+    def handler_config(self):
+        """crypto_bot.json with ``bitcoin_ecosystem`` tracking this universe"""
+        config = copy.deepcopy(self.config)
+        settings = config.setdefault('data_sources', {}).setdefault('bitcoin_ecosystem', {})
+        settings['tokens'] = list(self.tokens)
+        settings['protocols'] = dict(self.protocols)
+        settings['sources'] = dict(self.sources)
+        settings['coingecko_ids'] = {
+            token: cg_id for token, cg_id in self.coingecko_ids.items()
+            if token in settings.get('coingecko_ids', {})
+        }
+        return config
+
+    def okx_pairs(self):
+        return [f"{token}-USDT" for token in self.tokens]
+
+def build_routes(universe, extra=500, seed=0):
+    """Replay routes serving every exchange endpoint the handlers call
+
+    Payloads have the shape of the recorded exchange responses. Bulk listings
+    carry ``extra`` untracked instruments on top of the universe, as the real
+    venues list hundreds of pairs nobody tracks. Returns ``{(host, path):
+    respond}`` where ``respond(query, path)`` gives ``(status, body)``; a path
+    ending in ``/*`` matches any suffix.
+    """
+    rng = random.Random(seed)
+    now_ms = int(time.time() * 1000)
+    quotes = dict(universe.quotes)
+    untracked = {
+        f"XX{i:04d}": {'price': rng.uniform(0.01, 10), 'volume': rng.uniform(1e3, 1e6), 'change': rng.uniform(-5, 5)}
+        for i in range(extra)
+    }
+    listed = {**quotes, **untracked}
+    okx_listed = {token: quote for token, quote in listed.items() if token not in quotes or universe.on_okx(token)}
+
+    okx_tickers = _encode({'code': '0', 'msg': '', 'data': [
+        _okx_ticker('BTC', {'price': BTC_PRICE, 'volume': 2e9, 'change': 1.5}, now_ms)
+    ] + [_okx_ticker(token, quote, now_ms) for token, quote in okx_listed.items()]})
+    gateio_tickers = _encode([_gateio_ticker(token, quote) for token, quote in listed.items()])
+    kucoin_tickers = _encode({'code': '200000', 'data': {'time': now_ms, 'ticker': [
+        _kucoin_ticker(token, quote) for token, quote in listed.items()
+    ]}})
+    magiceden_stats = _encode([
+        {'symbol': token, 'floorPrice': quote['price'], 'volume24h': quote['volume'] / BTC_PRICE,
+         'change24h': quote['change']}
+        for token, quote in listed.items()
+        if token not in quotes or universe.protocols[token] == 'Runes'
+    ])
+    cat_list = _encode({'code': 0, 'data': [
+        {'tick': token.lower(), 'price': quote['price'], 'volume24h': quote['volume'], 'priceChangePercent': quote['change']}
+        for token, quote in quotes.items() if universe.protocols[token] == 'CAT20'
+    ]})
+    by_coingecko_id = {universe.coingecko_ids[token]: token for token in quotes}
+
+    def okx_candles(query, path):
+        token = query.get('instId', '').split('-')[0]
+        quote = quotes.get(token) or untracked.get(token)
+        if quote is None:
+            return 200, {'code': '51001', 'msg': "Instrument ID doesn't exist", 'data': []}
+        limit = int(query.get('limit', 100))
+        day = now_ms - now_ms % DAY_MS
+        close = quote['price'] / (1 + quote['change'] / 100)
+        rows = [
+            [str(day - i * DAY_MS), str(close), str(close * 1.02), str(close * 0.98), str(close),
+             '1000', '1000', str(close * 1000), '0' if i == 0 else '1']
+            for i in range(limit)
+        ]
+        return 200, {'code': '0', 'msg': '', 'data': rows}
+
+    def gateio_candles(query, path):
+        token = query.get('currency_pair', '').split('_')[0]
+        quote = quotes.get(token)
+        if quote is None:
+            return 400, {'label': 'INVALID_CURRENCY_PAIR', 'message': 'Invalid currency pair'}
+        previous = quote['price'] / (1 + quote['change'] / 100)
+        day = now_ms // 1000 - (now_ms // 1000) % 86400
+        return 200, [
+            [str(day), str(quote['volume']), str(quote['price']), str(quote['price']), str(quote['price']),
+             str(quote['price']), str(quote['volume'] / quote['price']), 'false'],
+            [str(day - 86400), str(quote['volume']), str(previous), str(previous), str(previous),
+             str(previous), str(quote['volume'] / previous), 'true']
+        ]
+
+    def binance_ticker(query, path):
+        token = query.get('symbol', '')[:-len('USDT')]
+        quote = quotes.get(token)
+        if quote is None or not universe.on_binance(token):
+            return 400, {'code': -1121, 'msg': 'Invalid symbol.'}
+        return 200, {
+            'symbol': f"{token}USDT", 'lastPrice': str(quote['price']), 'priceChangePercent': str(quote['change']),
+            'volume': str(quote['volume'] / quote['price']), 'quoteVolume': str(quote['volume'])
+        }
+
+    def unisat_brc20(query, path):
+        token = query.get('ticker', '').upper()
+        quote = quotes.get(token)
+        if quote is None or universe.protocols[token] != 'BRC20':
+            return 200, {'code': -1, 'msg': 'ticker not found', 'data': None}
+        return 200, {'code': 0, 'msg': 'ok', 'data': {
+            'latestPrice': quote['price'], 'volume24h': quote['volume'], 'priceChange24h': quote['change']
+        }}
+
+    def cat_dex_stats(query, path):
+        token = query.get('tick', '').upper()
+        quote = quotes.get(token)
+        if quote is None or universe.protocols[token] != 'CAT20':
+            return 200, {'code': -1, 'msg': 'tick not found', 'data': None}
+        return 200, {'code': 0, 'data': {'tick': token.lower(), 'lastPrice': quote['price'],
+                                         'vol24h': quote['volume'], 'change24h': quote['change']}}
+
+    def coingecko_search(query, path):
+        symbol = query.get('query', '').upper()
+        if symbol not in quotes:
+            return 200, {'coins': []}
+        return 200, {'coins': [{'id': universe.coingecko_ids[symbol], 'symbol': symbol.lower(), 'name': symbol}]}
+
+    def coingecko_coin(query, path):
+        token = by_coingecko_id.get(path.rsplit('/', 1)[-1])
+        if token is None:
+            return 404, {'error': 'coin not found'}
+        quote = quotes[token]
+        return 200, {'id': universe.coingecko_ids[token], 'symbol': token.lower(), 'market_data': {
+            'current_price': {'usd': quote['price']},
+            'total_volume': {'usd': quote['volume']},
+            'price_change_percentage_24h': quote['change']
+        }}
+
+    def coingecko_markets(query, path):
+        rows = []
+        for cg_id in query.get('ids', '').split(','):
+            token = by_coingecko_id.get(cg_id)
+            if token is not None:
+                quote = quotes[token]
+                rows.append({'id': cg_id, 'symbol': token.lower(), 'current_price': quote['price'],
+                             'total_volume': quote['volume'], 'price_change_percentage_24h': quote['change']})
+        return 200, rows
+
+    def fixed(body):
+        return lambda query, path: (200, body)
+
+    return {
+        ('www.okx.com', '/api/v5/market/tickers'): fixed(okx_tickers),
+        ('www.okx.com', '/api/v5/market/candles'): okx_candles,
+        ('api.gateio.ws', '/api/v4/spot/tickers'): fixed(gateio_tickers),
+        ('api.gateio.ws', '/api/v4/spot/candlesticks'): gateio_candles,
+        ('api.gateio.ws', '/api/v4/spot/markets'): fixed(gateio_tickers),
+        ('api.kucoin.com', '/api/v1/market/allTickers'): fixed(kucoin_tickers),
+        ('api.binance.com', '/api/v3/ticker/24hr'): binance_ticker,
+        ('open-api.unisat.io', '/v1/indexer/brc20/ticker'): unisat_brc20,
+        ('open-api.unisat.io', '/v2/market/cat/ticker'): fixed(cat_list),
+        ('open-api.unisat.io', '/v2/market/cat/stats'): fixed(cat_list),
+        ('open-api.unisat.io', '/v2/market/cat-dex/stats'): cat_dex_stats,
+        ('api-mainnet.magiceden.dev', '/v2/ord/btc/runes/stats'): fixed(magiceden_stats),
+        ('pro-api.coingecko.com', '/api/v3/search'): coingecko_search,
+        ('pro-api.coingecko.com', '/api/v3/coins/markets'): coingecko_markets,
+        ('pro-api.coingecko.com', '/api/v3/coins/*'): coingecko_coin,
+        ('api.coingecko.com', '/api/v3/coins/*'): coingecko_coin
+    }
+
+def _encode(body):
+    # Bulk listings are serialized once and replayed as bytes
+    return json.dumps(body).encode('utf-8')
+
+def _okx_ticker(token, quote, now_ms):
+    price = quote['price']
+    return {
+        'instType': 'SPOT', 'instId': f"{token}-USDT", 'last': str(price), 'lastSz': '1',
+        'askPx': str(price * 1.001), 'askSz': '10', 'bidPx': str(price * 0.999), 'bidSz': '10',
+        'open24h': str(price / (1 + quote['change'] / 100)), 'high24h': str(price * 1.05),
+        'low24h': str(price * 0.95), 'volCcy24h': str(quote['volume']), 'vol24h': str(quote['volume'] / price),
+        'ts': str(now_ms), 'sodUtc0': str(price), 'sodUtc8': str(price)
+    }
+
+def _gateio_ticker(token, quote):
+    price = quote['price']
+    return {
+        'currency_pair': f"{token}_USDT", 'last': str(price), 'lowest_ask': str(price * 1.001),
+        'highest_bid': str(price * 0.999), 'change_percentage': str(quote['change']),
+        'base_volume': str(quote['volume'] / price), 'quote_volume': str(quote['volume']),
+        'high_24h': str(price * 1.05), 'low_24h': str(price * 0.95),
+        # Gate.io's /spot/markets fallback is read with the same shape keyed by id
+        'id': f"{token}_USDT"
+    }
+
+def _kucoin_ticker(token, quote):
+    price = quote['price']
+    return {
+        'symbol': f"{token}-USDT", 'symbolName': f"{token}-USDT", 'last': str(price),
+        'buy': str(price * 0.999), 'sell': str(price * 1.001), 'changeRate': str(quote['change'] / 100),
+        'high': str(price * 1.05), 'low': str(price * 0.95), 'vol': str(quote['volume'] / price),
+        'volValue': str(quote['volume'])
+    }
@@ -0,0 +1,174 @@
+import json
+import multiprocessing
+import random
+import sys
+import threading
+import time
+import urllib.request
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from requests.adapters import HTTPAdapter
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Streaming clients hang up once they have read what they need
+        if not isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            super().handle_error(request, client_address)
+
+class ReplayServer:
+    """Local HTTP stand-in for the exchange APIs
+
+    Requests arrive as ``/<host><path>?<query>`` (see ReplayAdapter) and are
+    answered from ``routes``. Every response is delayed by ``latency`` seconds,
+    or the host's entry in ``host_latency``, plus up to ``jitter`` seconds; a
+    fraction ``error_rate`` of requests get ``error_status`` instead. Requests
+    are counted per host; ``/__stats`` returns the counts and ``/__reset``
+    clears them.
+    """
+
+    def __init__(self, routes, latency=0.0, jitter=0.0, host_latency=None, error_rate=0.0,
+                 error_status=503, seed=0):
+        self.routes = routes
+        self.latency = latency
+        self.jitter = jitter
+        self.host_latency = host_latency or {}
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.counts = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self, host='127.0.0.1', port=0):
+        """Serve from a daemon thread; returns the base URL"""
+        self._server = _QuietServer((host, port), self._handler_class())
+        threading.Thread(target=self._server.serve_forever, name='replay-server', daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def respond(self, target):
+        """``(status, body bytes)`` for a request to ``/<host><path>?<query>``"""
+        parts = urlsplit(target)
+        if parts.path == '/__stats':
+            with self._lock:
+                return 200, json.dumps(dict(self.counts)).encode('utf-8')
+        if parts.path == '/__reset':
+            with self._lock:
+                self.counts.clear()
+            return 200, b'{}'
+
+        host, _, path = parts.path.lstrip('/').partition('/')
+        path = '/' + path
+        with self._lock:
+            self.counts[host] += 1
+            delay = self.host_latency.get(host, self.latency) + self._random.uniform(0, self.jitter)
+            failed = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            return self.error_status, json.dumps({'error': 'injected failure'}).encode('utf-8')
+
+        respond = self._route(host, path)
+        if respond is None:
+            return 404, json.dumps({'error': f"no replay route for {host}{path}"}).encode('utf-8')
+        status, body = respond(dict(parse_qsl(parts.query)), path)
+        return status, body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+
+    def _route(self, host, path):
+        respond = self.routes.get((host, path))
+        if respond is None:
+            respond = self.routes.get((host, path.rsplit('/', 1)[0] + '/*'))
+        return respond
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so pooled client connections are reused as with the real APIs
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body = server.respond(self.path)
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter sending every request to a ReplayServer instead of its real host"""
+
+    def __init__(self, base_url, **kwargs):
+        kwargs.setdefault('pool_maxsize', 32)
+        super().__init__(**kwargs)
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        request.url = f"{self.base_url}/{parts.hostname}{parts.path}" + (f"?{parts.query}" if parts.query else '')
+        return super().send(request, **kwargs)
+
+def install(session, base_url):
+    """Route every request made through ``session`` to the replay server at ``base_url``"""
+    adapter = ReplayAdapter(base_url)
+    # Drop host-specific adapters so none of them bypasses the replay server
+    for prefix in list(session.adapters):
+        session.adapters.pop(prefix)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def stats(base_url):
+    """Requests served per host since the last reset"""
+    with urllib.request.urlopen(f"{base_url}/__stats", timeout=10) as response:
+        return json.loads(response.read())
+
+def reset(base_url):
+    with urllib.request.urlopen(f"{base_url}/__reset", timeout=10) as response:
+        response.read()
+
+def _serve(size, options, extra, seed, ready, stopped):
+    from .fixtures import Universe, build_routes
+    server = ReplayServer(build_routes(Universe(size, seed=seed), extra=extra, seed=seed), seed=seed, **options)
+    ready.put(server.start())
+    stopped.wait()
+    server.stop()
+
+@contextmanager
+def serve_process(size, extra=500, seed=0, **options):
+    """Run a ReplayServer for a universe of ``size`` tokens in a child process
+
+    Keeping the server out of the measured process means its CPU time and
+    allocations do not count against the code under test. Yields the base URL.
+    """
+    context = multiprocessing.get_context('spawn')
+    ready = context.Queue()
+    stopped = context.Event()
+    process = context.Process(target=_serve, args=(size, options, extra, seed, ready, stopped), daemon=True)
+    process.start()
+    try:
+        yield ready.get(timeout=60)
+    finally:
+        stopped.set()
+        process.join(10)
+        if process.is_alive():
+            process.terminate()
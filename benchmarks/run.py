@@ -0,0 +1,212 @@
+"""Offline benchmark of a market data cycle against replayed exchange responses
+
+    python -m benchmarks.run                      # compare against benchmarks/baseline.json
+    python -m benchmarks.run --save-baseline      # record a new baseline
+    python -m benchmarks.run --latency 0.05 --error-rate 0.05 --sizes 100
+
+Each scenario runs at every universe size against a fresh ReplayServer process.
+Wall time and CPU time are medians over ``--repeat`` cold runs; peak memory
+comes from one extra run under tracemalloc, which would otherwise slow the
+timed runs down.
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Mapping
+from pathlib import Path
+from loguru import logger
+from crypto_twitter_bot.cache import TTLCache
+from crypto_twitter_bot.candles import CandleCache
+from crypto_twitter_bot.coingecko_ids import CoinGeckoIdCache
+from crypto_twitter_bot.fetch_engine import FetchEngine
+from crypto_twitter_bot.health import HealthRegistry
+from crypto_twitter_bot.history import MarketHistory
+from crypto_twitter_bot.market_data_handler import MarketDataHandler
+from crypto_twitter_bot.okx_handler import OKXHandler
+from crypto_twitter_bot.transport import PooledSession
+from . import replay_server
+from .fixtures import Universe
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+DEFAULT_SIZES = (5, 100, 1000)
+
+# Relative growth over the baseline that counts as a regression
+TOLERANCES = {
+    'wall_s': 0.25,
+    'cpu_s': 0.25,
+    'peak_kb': 0.15,
+    # Quorum races make the request count vary by a few per cycle
+    'requests': 0.05
+}
+
+# Growth below these amounts is never a regression; millisecond runs are mostly noise
+MIN_SLACK = {
+    'wall_s': 0.05,
+    'cpu_s': 0.05,
+    'peak_kb': 256,
+    'requests': 2
+}
+
+class Scenario:
+    """One measured call, set up fresh (cold caches, new session) for every run"""
+
+    def __init__(self, name, setup):
+        self.name = name
+        self.setup = setup
+
+def _session(base_url, universe):
+    health = HealthRegistry(**universe.config.get('health', {}))
+    return replay_server.install(PooledSession(health=health), base_url), health
+
+def _market_data_cycle(base_url, universe, workdir, deadline):
+    session, health = _session(base_url, universe)
+    handler = MarketDataHandler(
+        engine=FetchEngine(source_timeout=deadline, cycle_timeout=deadline),
+        rate_cache=TTLCache(ttl=60),
+        session=session,
+        config=universe.handler_config(),
+        health=health,
+        history=MarketHistory(':memory:'),
+        candles=CandleCache(session, Path(workdir) / 'candles'),
+        coingecko_ids=CoinGeckoIdCache(Path(workdir) / 'coingecko_ids.json')
+    )
+    return handler.get_all_market_data
+
+def _okx_market_data(base_url, universe, workdir, deadline):
+    session, _ = _session(base_url, universe)
+    handler = OKXHandler('benchmark', 'benchmark', 'benchmark', session=session)
+    pairs = universe.okx_pairs()
+    return lambda: handler.get_market_data(pairs)
+
+SCENARIOS = (
+    Scenario('get_all_market_data', _market_data_cycle),
+    Scenario('okx_get_market_data', _okx_market_data)
+)
+
+def measure(call, base_url, trace=False):
+    """Run ``call`` once; wall and CPU seconds, requests served, and peak KB when traced"""
+    replay_server.reset(base_url)
+    if trace:
+        tracemalloc.start()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        result = call()
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        peak = tracemalloc.get_traced_memory()[1] if trace else None
+        if trace:
+            tracemalloc.stop()
+    served = replay_server.stats(base_url)
+    sample = {
+        'wall_s': wall,
+        'cpu_s': cpu,
+        'requests': sum(served.values()),
+        'requests_by_host': served,
+        'priced': sum(1 for value in result.values() if isinstance(value, Mapping) and value.get('price'))
+    }
+    if trace:
+        sample['peak_kb'] = peak / 1024
+    return sample
+
+def run_scenario(scenario, base_url, universe, repeat=3, deadline=300):
+    """Median of ``repeat`` timed runs plus the peak memory of one traced run"""
+    samples = []
+    for _ in range(repeat + 1):
+        # Fetches left running after a quorum may still write candles while the directory is removed
+        with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as workdir:
+            call = scenario.setup(base_url, universe, workdir, deadline)
+            samples.append(measure(call, base_url, trace=not samples))
+    traced, timed = samples[0], samples[1:]
+    return {
+        'wall_s': round(statistics.median(s['wall_s'] for s in timed), 4),
+        'cpu_s': round(statistics.median(s['cpu_s'] for s in timed), 4),
+        'peak_kb': round(traced['peak_kb'], 1),
+        'requests': max(s['requests'] for s in timed),
+        'requests_by_host': timed[-1]['requests_by_host'],
+        'priced': timed[-1]['priced']
+    }
+
+def compare(results, baseline, tolerances=TOLERANCES, slack=MIN_SLACK):
+    """Regressions of ``results`` against ``baseline``, as readable lines"""
+    regressions = []
+    for key, metrics in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        for metric, tolerance in tolerances.items():
+            if metric not in metrics or metric not in reference:
+                continue
+            limit = max(reference[metric] * (1 + tolerance), reference[metric] + slack.get(metric, 0))
+            if metrics[metric] > limit:
+                regressions.append(
+                    f"{key} {metric}: {metrics[metric]} vs baseline {reference[metric]} (limit {limit:.4g})"
+                )
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--scenarios', nargs='+', default=[s.name for s in SCENARIOS])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="up to this many extra seconds per response")
+    parser.add_argument('--host-latency', action='append', default=[], metavar='HOST=SECONDS')
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--extra', type=int, default=500, help="untracked instruments per bulk listing")
+    parser.add_argument('--deadline', type=float, default=300, help="fetch engine source and cycle deadline")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--output', type=Path, help="also write the results as JSON here")
+    parser.add_argument('--log-level', default='CRITICAL')
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level)
+
+    options = {
+        'latency': args.latency,
+        'jitter': args.jitter,
+        'host_latency': dict((item.split('=', 1)[0], float(item.split('=', 1)[1])) for item in args.host_latency),
+        'error_rate': args.error_rate,
+        'error_status': args.error_status
+    }
+    scenarios = [s for s in SCENARIOS if s.name in args.scenarios]
+    results = {}
+    for size in args.sizes:
+        universe = Universe(size, seed=args.seed)
+        with replay_server.serve_process(size, extra=args.extra, seed=args.seed, **options) as base_url:
+            for scenario in scenarios:
+                key = f"{scenario.name}[{size}]"
+                results[key] = run_scenario(scenario, base_url, universe, args.repeat, args.deadline)
+                metrics = results[key]
+                print(f"{key:<30} wall {metrics['wall_s']:>8.3f}s  cpu {metrics['cpu_s']:>8.3f}s  "
+                      f"peak {metrics['peak_kb']:>10.1f}KB  requests {metrics['requests']:>5}  "
+                      f"priced {metrics['priced']:>4}/{size}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding='utf-8')
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n", encoding='utf-8')
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"No baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')))
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if not regressions:
+        print("No regressions against the baseline")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
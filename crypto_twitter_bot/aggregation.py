@@ -0,0 +1,118 @@
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from loguru import logger
+from .models import Ticker
+
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 1.4826
+
+# Largest relative difference at which two quotes are still averaged
+MAX_PAIR_SPREAD = 0.1
+
+def merge_quotes(quotes, max_deviation=3.0, min_spread=0.02, sum_volume=True, primary=None,
+                 max_pair_spread=MAX_PAIR_SPREAD):
+    """Merge ``{source: quote}`` into one Ticker, or None without a priced quote
+
+    With three or more quotes, those whose price lies more than ``max_deviation``
+    scaled median absolute deviations from the median price are rejected as
+    outliers; deviations under ``min_spread`` (relative to the median) are always
+    accepted. Two quotes cannot outvote each other, so when they differ by more
+    than ``max_pair_spread`` only the ``primary`` source's quote is kept, and
+    neither is without one. The remaining
+    prices and changes are averaged weighted by volume. Volumes are summed, as
+    each venue reports its own trades, or averaged with ``sum_volume=False`` when
+    the quotes describe the same market.
+    """
+    quotes = {name: quote for name, quote in quotes.items() if quote and quote.get('price', 0) > 0}
+    if not quotes:
+        return None
+
+    if len(quotes) == 2:
+        low, high = sorted(quote['price'] for quote in quotes.values())
+        if (high - low) / low > max_pair_spread:
+            logger.warning(f"Quotes from {list(quotes)} disagree by more than {max_pair_spread:.0%}")
+            if primary not in quotes:
+                return None
+            quotes = {primary: quotes[primary]}
+
+    names = list(quotes)
+    price = np.array([quotes[name]['price'] for name in names], dtype=float)
+    volume = np.array([max(quotes[name].get('volume') or 0, 0) for name in names], dtype=float)
+    change = np.array([quotes[name].get('change_24h', np.nan) for name in names], dtype=float)
+
+    median = np.median(price)
+    deviation = np.abs(price - median)
+    threshold = max(max_deviation * MAD_SCALE * np.median(deviation), min_spread * median)
+    kept = deviation <= threshold if len(names) >= 3 else np.ones(len(names), dtype=bool)
+    if not kept.all():
+        rejected = [name for name, keep in zip(names, kept) if not keep]
+        logger.warning(f"Rejected outlier quotes from {rejected} (median price {median})")
+
+    price, volume, change = price[kept], volume[kept], change[kept]
+    weights = volume if volume.sum() > 0 else np.ones_like(volume)
+    has_change = ~np.isnan(change) & (weights > 0)
+    merged_change = np.average(change[has_change], weights=weights[has_change]) if has_change.any() else 0
+    return Ticker(
+        price=float(np.average(price, weights=weights)),
+        volume=float(volume.sum() if sum_volume else volume.mean()),
+        change_24h=float(merged_change)
+    )
+
+class QuoteAggregator:
+    """Request one token from several sources in parallel and merge the quotes
+
+    Collection stops as soon as ``quorum`` sources have returned a priced quote,
+    or after ``timeout`` seconds, so a slow venue never holds up the result.
+    """
+
+    def __init__(self, quorum=3, timeout=8, max_deviation=3.0, max_workers=5):
+        self.quorum = quorum
+        self.timeout = timeout
+        self.max_deviation = max_deviation
+        self.max_workers = max_workers
+
+    def collect(self, fetchers):
+        """Run a ``{source: callable}`` mapping and return the quotes received in time"""
+        if not fetchers:
+            return {}
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(fetchers)),
+            thread_name_prefix='quote'
+        )
+        futures = {executor.submit(fetch): name for name, fetch in fetchers.items()}
+        deadline = time.monotonic() + self.timeout
+        pending = set(futures)
+        quotes = {}
+
+        try:
+            while pending and len(quotes) < self.quorum:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(f"Quotes from {[futures[f] for f in pending]} missed the {self.timeout}s deadline")
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures[future]
+                    try:
+                        quote = future.result()
+                    except Exception as e:
+                        logger.error(f"Quote from {name} failed: {str(e)}")
+                        continue
+                    if quote and quote.get('price', 0) > 0:
+                        quotes[name] = quote
+        finally:
+            # Quorum reached or out of time; late quotes are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return quotes
+
+    def aggregate(self, fetchers, sum_volume=True, primary=None):
+        """Collect quotes from ``fetchers`` and merge them, or None if none answered
+
+        ``primary`` names the source trusted when only two quotes arrive and they disagree.
+        """
+        quotes = self.collect(fetchers)
+        logger.debug(f"Aggregating quotes from {list(quotes)}")
+        return merge_quotes(quotes, self.max_deviation, sum_volume=sum_volume, primary=primary)
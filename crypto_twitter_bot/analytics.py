@@ -0,0 +1,136 @@
+import time
+import numpy as np
+from collections.abc import Mapping
+from .models import Ticker
+
+# OKX ticker fields behind TickerFrame's price, volume, change_24h, high_24h and low_24h
+OKX_FIELDS = ('last', 'volCcy24h', 'vol24h', 'high24h', 'low24h')
+
+class TickerFrame:
+    """Ticker universe held as one NumPy array per field
+
+    Row ``i`` of every array belongs to ``symbols[i]``. Strength, trend,
+    volume-weighted change, medians and ranks are computed over whole columns
+    at once, so their cost barely grows with the number of tracked tickers.
+    Missing values are NaN.
+    """
+
+    FIELDS = ('price', 'volume', 'change_24h', 'high_24h', 'low_24h')
+
+    def __init__(self, symbols, price, volume, change_24h, high_24h=None, low_24h=None):
+        self.symbols = list(symbols)
+        self.price = np.asarray(price, dtype=float)
+        self.volume = np.asarray(volume, dtype=float)
+        self.change_24h = np.asarray(change_24h, dtype=float)
+        size = len(self.symbols)
+        self.high_24h = np.asarray(high_24h, dtype=float) if high_24h is not None else np.full(size, np.nan)
+        self.low_24h = np.asarray(low_24h, dtype=float) if low_24h is not None else np.full(size, np.nan)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    @classmethod
+    def from_okx(cls, tickers):
+        """Build a frame from raw OKX ticker dicts
+
+        ``change_24h`` is taken from ``vol24h``, as the OKX handler always has.
+        Tickers with a missing, empty or non-numeric field are dropped rather
+        than failing the whole frame.
+        """
+        columns = np.array(
+            [[_okx_number(t.get(field)) for field in OKX_FIELDS] for t in tickers],
+            dtype=float
+        ).reshape(-1, len(OKX_FIELDS))
+        valid = ~np.isnan(columns).any(axis=1)
+        symbols = [t.get('instId') for t in tickers]
+        valid &= np.array([symbol is not None for symbol in symbols], dtype=bool)
+        if not valid.all():
+            symbols = [symbol for symbol, ok in zip(symbols, valid.tolist()) if ok]
+            columns = columns[valid]
+        return cls(symbols, *columns.T)
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Build a frame from a MarketSnapshot by copying its columns"""
+        columns = [np.frombuffer(snapshot.columns[field], dtype=float).copy() for field in cls.FIELDS]
+        return cls(snapshot.symbols, *columns)
+
+    @classmethod
+    def from_market_data(cls, market_data):
+        """Build a frame from a ``{token: {price, volume, change_24h}}`` mapping
+
+        Entries that are not mappings (such as ``overall_trend``) are skipped.
+        """
+        rows = {token: data for token, data in market_data.items() if isinstance(data, Mapping)}
+        columns = np.array(
+            [[data.get(field, np.nan) for field in cls.FIELDS] for data in rows.values()],
+            dtype=float
+        ).reshape(-1, len(cls.FIELDS))
+        return cls(rows.keys(), *columns.T)
+
+    def strength(self):
+        """Where the price sits in its 24h range, 0-100 (0 when the range is flat)"""
+        spread = self.high_24h - self.low_24h
+        return (self.price - self.low_24h) / np.where(spread != 0, spread, 1) * 100
+
+    def trend(self):
+        """'up' when the 24h changes sum to more than zero, else 'down'"""
+        return 'up' if np.nansum(self.change_24h) > 0 else 'down'
+
+    def vwap_change(self):
+        """Volume-weighted mean 24h change, or None without volume"""
+        mask = ~np.isnan(self.change_24h) & (self.volume > 0)
+        if not mask.any():
+            return None
+        return float(np.average(self.change_24h[mask], weights=self.volume[mask]))
+
+    def median(self, field, positive=False):
+        """Median of a column ignoring NaN (and non-positive values if asked), or None"""
+        values = getattr(self, field)
+        values = values[~np.isnan(values)]
+        if positive:
+            values = values[values > 0]
+        return float(np.median(values)) if values.size else None
+
+    def mean(self, field, positive=False, limit=None):
+        """Mean of a column ignoring NaN, non-positive values or ``abs(value) > limit``, or None"""
+        values = getattr(self, field)
+        values = values[~np.isnan(values)]
+        if positive:
+            values = values[values > 0]
+        if limit is not None:
+            values = values[np.abs(values) <= limit]
+        return float(values.mean()) if values.size else None
+
+    def ranks(self, field='volume'):
+        """Row positions ordered by ``field`` descending; ties keep their order, NaN counts as 0"""
+        values = np.nan_to_num(getattr(self, field), nan=0.0)
+        return np.argsort(-np.maximum(values, 0), kind='stable')
+
+    def records(self):
+        """Per-symbol market data entries in the OKX handler's format"""
+        timestamp = time.time()
+        columns = zip(
+            self.price.tolist(), self.change_24h.tolist(), self.volume.tolist(),
+            self.high_24h.tolist(), self.low_24h.tolist(), self.strength().tolist()
+        )
+        return {
+            symbol: Ticker(
+                price=price,
+                change_24h=change,
+                volume=volume,
+                high_24h=high,
+                low_24h=low,
+                timestamp=timestamp,
+                # Market strength indicator
+                market_strength=strength
+            )
+            for symbol, (price, change, volume, high, low, strength) in zip(self.symbols, columns)
+        }
+
+def _okx_number(value):
+    # OKX sends numbers as strings, and empty strings for fields it has no value for
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
@@ -0,0 +1,94 @@
+import threading
+import time
+from loguru import logger
+from .metrics import get_metrics
+
+class _Entry:
+    __slots__ = ('value', 'loaded_at')
+
+    def __init__(self, value, loaded_at):
+        self.value = value
+        self.loaded_at = loaded_at
+
+class _Call:
+    __slots__ = ('event', 'value')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+
+class TTLCache:
+    """Thread-safe TTL cache with request coalescing and stale-while-revalidate
+
+    A value younger than ``ttl`` seconds is served from memory. A value between
+    ``ttl`` and ``ttl + stale_ttl`` seconds old is still served, while a single
+    background refresh replaces it. Concurrent misses for the same key share one
+    call to the loader. Loaders signal failure by raising or returning ``None``;
+    failures are never cached. Caches given a ``name`` count their hits, stale
+    hits, coalesced waits and misses in the metrics registry.
+    """
+
+    def __init__(self, ttl, stale_ttl=0, name=None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.name = name
+        self._entries = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        """Return the cached value for ``key``, calling ``loader()`` when needed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry.loaded_at if entry else None
+            if entry and age < self.ttl:
+                self._count('hit')
+                return entry.value
+
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _Call()
+
+            if entry and age < self.ttl + self.stale_ttl:
+                self._count('stale')
+                if owner:
+                    threading.Thread(
+                        target=self._load, args=(key, loader, call),
+                        name=f"cache-refresh-{key}", daemon=True
+                    ).start()
+                return entry.value
+
+        self._count('miss' if owner else 'coalesced')
+        if owner:
+            self._load(key, loader, call)
+        else:
+            call.event.wait()
+        return call.value
+
+    def _count(self, result):
+        if self.name:
+            get_metrics().inc('cache_requests_total', cache=self.name, result=result)
+
+    def _load(self, key, loader, call):
+        try:
+            call.value = loader()
+        except Exception as e:
+            logger.error(f"Error loading cache entry {key}: {str(e)}")
+            call.value = None
+        finally:
+            with self._lock:
+                if call.value is not None:
+                    self._entries[key] = _Entry(call.value, time.monotonic())
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def invalidate(self, key):
+        """Drop the cached value for ``key``"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every cached value"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,130 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+from .config import load_config
+
+DEFAULT_CANDLE_DIR = "data/candles"
+
+BAR_SECONDS = {
+    '1H': 3600,
+    '4H': 4 * 3600,
+    '1D': 86400,
+    '1W': 7 * 86400
+}
+
+_candles = None
+_candles_lock = threading.Lock()
+
+class CandleCache:
+    """On-disk cache of confirmed OKX candles per instrument and bar
+
+    Only closed candles are stored, oldest first, as ``[ts_ms, open, high, low,
+    close]``. A lookup requests OKX only when a newer candle has closed since the
+    last stored one, and then asks just for candles newer than it, so the daily
+    closes needed for the 24h change cost about one request per instrument per day.
+    """
+
+    url = "https://www.okx.com/api/v5/market/candles"
+
+    def __init__(self, session, directory=DEFAULT_CANDLE_DIR, max_candles=400, initial_fetch=100):
+        self.session = session
+        self.directory = Path(directory)
+        self.max_candles = max_candles
+        self.initial_fetch = initial_fetch
+        self._memory = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def closes(self, inst_id, bar='1D', count=1):
+        """The last ``count`` confirmed closes for ``inst_id``, newest first"""
+        candles = self.candles(inst_id, bar)
+        return [candle[4] for candle in reversed(candles[-count:])]
+
+    def change(self, inst_id, price, bar='1D', bars=1):
+        """Percent change of ``price`` against the close ``bars`` candles back, or None"""
+        closes = self.closes(inst_id, bar, bars)
+        if len(closes) < bars or not closes[-1]:
+            return None
+        return ((price - closes[-1]) / closes[-1]) * 100
+
+    def candles(self, inst_id, bar='1D'):
+        """All cached confirmed candles for ``inst_id``, brought up to date first"""
+        key = (inst_id, bar)
+        with self._lock:
+            lock = self._locks.setdefault(key, threading.Lock())
+
+        with lock:
+            candles = self._memory.get(key)
+            if candles is None:
+                candles = self._load(inst_id, bar)
+
+            bar_ms = BAR_SECONDS[bar] * 1000
+            now_ms = time.time() * 1000
+            # The candle after the last stored one has closed once two bars have passed
+            if not candles or now_ms >= candles[-1][0] + 2 * bar_ms:
+                newer = self._fetch(inst_id, bar, candles[-1][0] if candles else None)
+                if newer:
+                    known = {candle[0] for candle in candles}
+                    candles = sorted(candles + [c for c in newer if c[0] not in known])[-self.max_candles:]
+                    self._save(inst_id, bar, candles)
+
+            self._memory[key] = candles
+            return candles
+
+    def _fetch(self, inst_id, bar, after_ts):
+        params = {'instId': inst_id, 'bar': bar, 'limit': str(self.initial_fetch)}
+        if after_ts is not None:
+            # OKX "before" returns records newer than the given timestamp
+            params['before'] = str(after_ts)
+        try:
+            response = self.session.get(self.url, params=params)
+            response.raise_for_status()
+            data = response.json()
+            if data.get('code') != '0':
+                logger.warning(f"Unexpected OKX candle response for {inst_id}: {data.get('msg')}")
+                return []
+            logger.debug(f"Fetched {len(data['data'])} new {bar} candles for {inst_id}")
+            return [
+                [int(row[0])] + [float(value) for value in row[1:5]]
+                for row in data['data']
+                if len(row) < 9 or row[8] == '1'
+            ]
+        except Exception as e:
+            logger.error(f"Error fetching OKX candles for {inst_id}: {str(e)}")
+            return []
+
+    def _path(self, inst_id, bar):
+        return self.directory / f"okx_{inst_id}_{bar}.json"
+
+    def _load(self, inst_id, bar):
+        try:
+            with open(self._path(inst_id, bar), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except (ValueError, OSError) as e:
+            logger.warning(f"Discarding unreadable candle cache for {inst_id}: {str(e)}")
+            return []
+
+    def _save(self, inst_id, bar, candles):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(inst_id, bar)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(candles, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error(f"Error saving candle cache for {inst_id}: {str(e)}")
+
+def get_candle_cache(session):
+    """Get the process-wide candle cache configured from crypto_bot.json"""
+    global _candles
+    with _candles_lock:
+        if _candles is None:
+            directory = load_config().get('storage', {}).get('candle_dir', DEFAULT_CANDLE_DIR)
+            _candles = CandleCache(session, directory)
+        return _candles
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+from .config import load_config
+
+DEFAULT_ID_CACHE_PATH = "data/coingecko_ids.json"
+DAY = 86400
+
+# Returned by CoinGeckoIdCache.get for symbols that need resolving
+UNKNOWN = object()
+
+_ids = None
+_ids_lock = threading.Lock()
+
+class CoinGeckoIdCache:
+    """Persistent cache of symbol to CoinGecko id resolutions
+
+    Resolutions are kept for ``ttl`` seconds; symbols CoinGecko does not list
+    are remembered as None for ``negative_ttl`` seconds, so they are not
+    searched for again every cycle. The file at ``path`` is read on creation
+    and rewritten atomically by ``flush``.
+    """
+
+    def __init__(self, path=DEFAULT_ID_CACHE_PATH, ttl=30 * DAY, negative_ttl=DAY):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries = self._load()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def get(self, symbol, now=None):
+        """The cached id for ``symbol``, None if it is known to be unlisted, or UNKNOWN"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            entry = self._entries.get(symbol.upper())
+        if entry is None:
+            return UNKNOWN
+        ttl = self.ttl if entry['id'] is not None else self.negative_ttl
+        if now - entry['resolved_at'] >= ttl:
+            return UNKNOWN
+        return entry['id']
+
+    def put(self, symbol, cg_id, now=None):
+        """Record the resolution of ``symbol``; None means CoinGecko does not list it"""
+        with self._lock:
+            self._entries[symbol.upper()] = {'id': cg_id, 'resolved_at': now if now is not None else time.time()}
+            self._dirty = True
+
+    def flush(self):
+        """Write the cache to disk if anything changed since the last write"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Error saving CoinGecko id cache: {str(e)}")
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                entries = json.load(f)
+            return {
+                symbol: entry for symbol, entry in entries.items()
+                if isinstance(entry, dict) and 'id' in entry and 'resolved_at' in entry
+            }
+        except FileNotFoundError:
+            return {}
+        except (ValueError, AttributeError, OSError) as e:
+            logger.warning(f"Discarding unreadable CoinGecko id cache: {str(e)}")
+            return {}
+
+def get_coingecko_ids():
+    """Get the process-wide CoinGecko id cache configured from crypto_bot.json"""
+    global _ids
+    with _ids_lock:
+        if _ids is None:
+            settings = load_config().get('storage', {})
+            _ids = CoinGeckoIdCache(
+                settings.get('coingecko_id_path', DEFAULT_ID_CACHE_PATH),
+                ttl=settings.get('coingecko_id_ttl', 30 * DAY),
+                negative_ttl=settings.get('coingecko_negative_ttl', DAY)
+            )
+        return _ids
@@ -0,0 +1,37 @@
+import json
+import os
+from pathlib import Path
+
+DEFAULT_CONFIG_PATH = Path(__file__).resolve().parent.parent / "crypto_bot.json"
+DEFAULT_TOKEN_LIST_PATH = Path(__file__).resolve().parent.parent / "token_list.txt"
+
+_config = None
+
+def load_config(path=None):
+    """Load the bot configuration from crypto_bot.json
+
+    The file location can be overridden with the ``CRYPTO_BOT_CONFIG`` environment
+    variable. The default file is read once and cached; an explicit ``path`` is
+    always read fresh.
+    """
+    global _config
+    if path is not None:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    if _config is None:
+        config_path = os.getenv("CRYPTO_BOT_CONFIG") or DEFAULT_CONFIG_PATH
+        try:
+            with open(config_path, encoding="utf-8") as f:
+                _config = json.load(f)
+        except FileNotFoundError:
+            _config = {}
+    return _config
+
+def load_token_list(path=None):
+    """Read tracked token symbols from token_list.txt, one per line"""
+    try:
+        with open(path or DEFAULT_TOKEN_LIST_PATH, encoding="utf-8") as f:
+            return [line.strip().upper() for line in f if line.strip() and not line.startswith("#")]
+    except FileNotFoundError:
+        return []
@@ -1,24 +1,41 @@
 import os
 import time
-import schedule
 from dotenv import load_dotenv
 from loguru import logger
-from .twitter_client import TwitterHandler
+from .config import load_config
+from .logger import setup_logger
+from .metrics import start_export
+from .refresher import MarketDataRefresher, has_prices
+from .scheduler import Scheduler
+from .tweet_queue import get_outbox
 from .market_data_handler import MarketDataHandler
 
+# Start fetching market data this many seconds before each posting slot
+PREWARM_LEAD = 120
+
+# Oldest snapshot a post may fall back to when the refresh before it fails
+MAX_POST_DATA_AGE = 3600
+
+# Local times of the daily market updates
+DEFAULT_POST_TIMES = ("08:00", "20:00")
+
 # Load environment variables
 load_dotenv()
 
-def post_market_update():
-    """Post market update to Twitter"""
+def post_market_update(market_data=None):
+    """Queue a market update for Twitter, fetching market data unless it is given
+
+    The tweet is handed to the outbound queue, which posts, retries and paces it
+    in the background, so this never waits on Twitter.
+    """
     try:
         # Initialize handlers
         market_handler = MarketDataHandler()
-        twitter_handler = TwitterHandler()
 
         # Get market data
-        market_data = market_handler.get_all_market_data()
-        if not market_data:
+        if market_data is None:
+            market_data = market_handler.get_all_market_data()
+        if not has_prices(market_data):
             logger.error("Failed to fetch market data")
             return False
 
@@ -28,42 +45,86 @@ def post_market_update():
             logger.error("Failed to format content")
             return False
 
-        # Post to Twitter
-        success = twitter_handler.post_tweet(content)
-        if not success:
-            logger.error("Failed to post tweet")
+        # Queue for Twitter
+        if not get_outbox().submit(content):
+            logger.info("Market update already queued or posted")
             return False
 
-        logger.info("Successfully posted market update")
+        logger.info("Queued market update")
         return True
 
     except Exception as e:
         logger.error(f"Error in post_market_update: {str(e)}")
         return False
-    finally:
-        # Clean up
-        if 'twitter_handler' in locals():
-            twitter_handler.close()
+
+def build_scheduler(config=None, refresher=None):
+    """Schedule source refreshes and the market update posts
+
+    Posts go out every day at the local ``features.twitter.post_times``
+    (08:00 and 20:00 by default); with an empty list they go out every
+    ``features.twitter.post_interval`` seconds instead. Each source is
+    refreshed at its own ``data_sources`` interval, and the Bitcoin ecosystem
+    data once more shortly before every posting slot, so the post only reads
+    the latest snapshot.
+    """
+    config = config if config is not None else load_config()
+    refresher = refresher or MarketDataRefresher(config=config)
+    settings = config.get('features', {}).get('twitter', {})
+    post_times = settings.get('post_times', DEFAULT_POST_TIMES)
+    post_interval = settings.get('post_interval', 14400)
+    lead = PREWARM_LEAD if post_times else min(PREWARM_LEAD, post_interval / 2)
+
+    prewarm = lambda: refresher.refresh('bitcoin_ecosystem')
+
+    def post():
+        market_data = refresher.latest('bitcoin_ecosystem', max_age=2 * lead, max_stale=MAX_POST_DATA_AGE)
+        if market_data is None:
+            logger.error("No recent market data, skipping market update")
+            return
+        post_market_update(market_data)
+
+    scheduler = Scheduler()
+    refresher.schedule(scheduler)
+    if post_times:
+        for at in post_times:
+            scheduler.daily(at, prewarm, name='prewarm_market_data', offset=-lead)
+            scheduler.daily(at, post, name='post_market_update')
+    else:
+        scheduler.every(post_interval, prewarm, name='prewarm_market_data', offset=-lead)
+        scheduler.every(post_interval, post, name='post_market_update')
+    return scheduler
 
 def run_bot():
     """Run the Twitter bot"""
+    scheduler = None
+    refresher = None
+    setup_logger()
     try:
+        start_export()
         logger.info("Starting crypto Twitter bot...")
         
-        # Schedule daily updates at 8:00 AM and 8:00 PM
-        schedule.every().day.at("08:00").do(post_market_update)
-        schedule.every().day.at("20:00").do(post_market_update)
+        # Start posting anything left in the outbound queue by a previous run
+        get_outbox()
+        refresher = MarketDataRefresher()
+        refresher.start()
+        scheduler = build_scheduler(refresher=refresher)
+        logger.info(f"Next market update at {time.ctime(scheduler.next_run('post_market_update'))}")
         
-        # Run continuously
-        while True:
-            schedule.run_pending()
-            time.sleep(60)
+        # Run continuously, sleeping until the next deadline
+        scheduler.run()
             
     except KeyboardInterrupt:
         logger.info("Shutting down bot...")
     except Exception as e:
         logger.error(f"Bot error: {str(e)}")
         raise
+    finally:
+        if scheduler:
+            scheduler.stop()
+        if refresher:
+            refresher.stop()
+        # Flush queued log messages before exiting
+        logger.complete()
 
 if __name__ == "__main__":
-    run_bot() 
\ No newline at end of file
+    run_bot()
@@ -0,0 +1,76 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from loguru import logger
+
+class FetchEngine:
+    """Run independent fetch tasks concurrently under per-source and per-cycle deadlines"""
+
+    def __init__(self, max_workers=8, source_timeout=15, cycle_timeout=30):
+        self.max_workers = max_workers
+        self.source_timeout = source_timeout
+        self.cycle_timeout = cycle_timeout
+
+    def run(self, tasks):
+        """Run a ``{name: callable}`` mapping of tasks concurrently.
+
+        Returns ``(results, timed_out)``: ``results`` maps every task that finished
+        before its deadline to its return value (``None`` if it raised), and
+        ``timed_out`` lists the names of the tasks that did not finish in time.
+        """
+        if not tasks:
+            return {}, []
+
+        started = {}
+
+        def call(name, fetch):
+            started[name] = time.monotonic()
+            return fetch()
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(tasks)),
+            thread_name_prefix='fetch'
+        )
+        futures = {executor.submit(call, name, fetch): name for name, fetch in tasks.items()}
+        cycle_deadline = time.monotonic() + self.cycle_timeout
+        pending = set(futures)
+        results = {}
+        timed_out = []
+
+        try:
+            while pending:
+                now = time.monotonic()
+
+                # Drop sources that have been running longer than their own deadline
+                for future in list(pending):
+                    start = started.get(futures[future])
+                    if start is not None and now - start >= self.source_timeout:
+                        pending.discard(future)
+                        timed_out.append(futures[future])
+                        logger.warning(f"Fetch for {futures[future]} exceeded {self.source_timeout}s source deadline")
+
+                if not pending or now >= cycle_deadline:
+                    break
+
+                # Sleep until the next task completes or the nearest deadline passes.
+                # Queued tasks may start while we wait, so never sleep longer than one source deadline.
+                deadlines = [cycle_deadline, now + self.source_timeout]
+                deadlines += [started[futures[f]] + self.source_timeout for f in pending if futures[f] in started]
+                done, pending = wait(pending, timeout=max(0, min(deadlines) - now), return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    name = futures[future]
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        logger.error(f"Fetch for {name} failed: {str(e)}")
+                        results[name] = None
+
+            for future in pending:
+                future.cancel()
+                timed_out.append(futures[future])
+                logger.warning(f"Fetch for {futures[future]} missed the {self.cycle_timeout}s cycle deadline")
+        finally:
+            # Do not wait for stragglers; their results are discarded
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return results, timed_out
@@ -0,0 +1,133 @@
+import threading
+import time
+from loguru import logger
+from .config import load_config
+
+_health = None
+_health_lock = threading.Lock()
+
+class CircuitBreaker:
+    """Circuit breaker with smoothed error rate and latency for one source
+
+    The breaker opens once at least ``min_calls`` calls have been seen and the
+    exponentially weighted error rate reaches ``failure_threshold``. While open,
+    calls are refused until ``cooldown`` seconds have passed; then one probe call
+    is let through, which closes the breaker on success or reopens it on failure.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=0.5, min_calls=3, cooldown=60, alpha=0.3, slow_call=5.0):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.alpha = alpha
+        self.slow_call = slow_call
+        self.state = self.CLOSED
+        self.error_rate = 0.0
+        self.latency = 0.0
+        self.calls = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go through now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def is_open(self):
+        """Whether calls are currently being refused, without claiming a probe"""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self._opened_at < self.cooldown
+
+    def record(self, success, latency):
+        """Record the outcome and latency in seconds of one call"""
+        with self._lock:
+            self.calls += 1
+            weight = 1.0 if self.calls == 1 else self.alpha
+            self.error_rate += weight * ((0.0 if success else 1.0) - self.error_rate)
+            self.latency += weight * (latency - self.latency)
+
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if success:
+                    self.state = self.CLOSED
+                    self.error_rate = 0.0
+                else:
+                    self._open()
+            elif not success and self.calls >= self.min_calls and self.error_rate >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = time.monotonic()
+
+    def score(self):
+        """Health score from 0 (open) to 1 (no errors, fast responses)"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return 0.0
+            return (1.0 - self.error_rate) / (1.0 + self.latency / self.slow_call)
+
+class HealthRegistry:
+    """Circuit breakers keyed by source host"""
+
+    def __init__(self, **breaker_settings):
+        self.breaker_settings = breaker_settings
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            if host not in self._breakers:
+                self._breakers[host] = CircuitBreaker(**self.breaker_settings)
+            return self._breakers[host]
+
+    def allow(self, host):
+        return self.breaker(host).allow()
+
+    def record(self, host, success, latency):
+        breaker = self.breaker(host)
+        previous_state = breaker.state
+        breaker.record(success, latency)
+        if breaker.state != previous_state:
+            logger.warning(f"Circuit for {host} is now {breaker.state}")
+
+    def score(self, host):
+        return self.breaker(host).score()
+
+    def rank(self, sources):
+        """Order sources by health, keeping the given order between equally healthy ones
+
+        Sources whose every host has an open circuit are left out; a source with
+        fallback hosts ranks by its healthiest one. Scores are compared in coarse
+        bands so small latency differences do not reshuffle the order.
+        """
+        ranked = []
+        for position, source in enumerate(sources):
+            breakers = [self.breaker(host) for host in source.hosts]
+            if all(breaker.is_open() for breaker in breakers):
+                logger.debug(f"Skipping {source.name}: circuit open")
+                continue
+            score = max(breaker.score() for breaker in breakers)
+            ranked.append((-round(score * 4), position, source))
+        return [source for _, _, source in sorted(ranked, key=lambda item: item[:2])]
+
+def get_health():
+    """Get the process-wide health registry configured from crypto_bot.json"""
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = HealthRegistry(**load_config().get('health', {}))
+        return _health
@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from .config import load_config
+
+DEFAULT_HISTORY_PATH = "data/market_history.db"
+DEFAULT_RETENTION = 90 * 86400
+
+_history = None
+_history_lock = threading.Lock()
+
+FIELDS = ('price', 'volume', 'change_24h', 'market_strength')
+
+class MarketHistory:
+    """Append-only SQLite store of market snapshots per token
+
+    Every snapshot is one row of ``{price, volume, change_24h, market_strength}``
+    with its timestamp and the source that priced it. Rows older than
+    ``retention`` seconds are pruned as new ones are written.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_PATH, retention=DEFAULT_RETENTION):
+        self.path = path
+        self.retention = retention
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS snapshots ("
+                " token TEXT NOT NULL, ts REAL NOT NULL, price REAL, volume REAL,"
+                " change_24h REAL, market_strength REAL, source TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(snapshots)")}
+            # Histories recorded before sources were tracked lack the column
+            if 'source' not in columns:
+                self._conn.execute("ALTER TABLE snapshots ADD COLUMN source TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS snapshots_token_ts ON snapshots (token, ts)")
+
+    def append(self, token, snapshot, timestamp=None):
+        """Record one snapshot for ``token``"""
+        self.append_many({token: snapshot}, timestamp)
+
+    def append_many(self, market_data, timestamp=None):
+        """Record every priced entry of a ``get_all_market_data`` result, with its ``source``"""
+        ts = timestamp if timestamp is not None else time.time()
+        rows = [
+            (token.lower(), ts, *(data.get(field) for field in FIELDS), data.get('source'))
+            for token, data in market_data.items()
+            if isinstance(data, Mapping) and data.get('price')
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO snapshots (token, ts, price, volume, change_24h, market_strength, source)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            if self.retention:
+                self._conn.execute("DELETE FROM snapshots WHERE ts < ?", (ts - self.retention,))
+
+    def range(self, token, start=None, end=None):
+        """Snapshots for ``token`` between ``start`` and ``end`` (epoch seconds), oldest first"""
+        rows = self._query(
+            "SELECT ts, price, volume, change_24h, market_strength FROM snapshots"
+            " WHERE token = ? AND ts >= ? AND ts <= ? ORDER BY ts",
+            (token.lower(), start or 0, end if end is not None else float('inf'))
+        )
+        return [dict(zip(('timestamp',) + FIELDS, row)) for row in rows]
+
+    def downsample(self, token, bucket_seconds, start=None, end=None):
+        """Average snapshots for ``token`` into ``bucket_seconds`` wide buckets"""
+        rows = self._query(
+            "SELECT CAST(ts / ? AS INTEGER) * ? AS bucket, AVG(price), MIN(price), MAX(price),"
+            " AVG(volume), AVG(change_24h), COUNT(*) FROM snapshots"
+            " WHERE token = ? AND ts >= ? AND ts <= ? GROUP BY bucket ORDER BY bucket",
+            (bucket_seconds, bucket_seconds, token.lower(), start or 0,
+             end if end is not None else float('inf'))
+        )
+        keys = ('timestamp', 'price', 'low', 'high', 'volume', 'change_24h', 'samples')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def price_at(self, token, timestamp, tolerance=3600, source=None):
+        """Price of the latest snapshot at or before ``timestamp``, if within ``tolerance`` seconds
+
+        With ``source``, only snapshots priced by that source count, as venues
+        quote some tokens in different units.
+        """
+        sql = "SELECT price FROM snapshots WHERE token = ? AND ts <= ? AND ts >= ? AND price > 0"
+        params = (token.lower(), timestamp, timestamp - tolerance)
+        if source is not None:
+            sql += " AND source = ?"
+            params += (source,)
+        rows = self._query(sql + " ORDER BY ts DESC LIMIT 1", params)
+        return rows[0][0] if rows else None
+
+    def change_since(self, token, price, seconds=86400, tolerance=3600, source=None):
+        """Percent change from the price ``source`` recorded ``seconds`` ago to ``price``, or None"""
+        previous = self.price_at(token, time.time() - seconds, tolerance, source)
+        if not previous:
+            return None
+        return ((price - previous) / previous) * 100
+
+    def prune(self, retention=None):
+        """Delete snapshots older than ``retention`` seconds"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM snapshots WHERE ts < ?", (time.time() - (retention or self.retention),))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+def get_history():
+    """Get the process-wide market history configured from crypto_bot.json"""
+    global _history
+    with _history_lock:
+        if _history is None:
+            settings = load_config().get('storage', {})
+            _history = MarketHistory(
+                settings.get('history_path', DEFAULT_HISTORY_PATH),
+                settings.get('history_retention', DEFAULT_RETENTION)
+            )
+        return _history
@@ -1,46 +1,81 @@
 import sys
 import os
+import threading
 from loguru import logger
 from pathlib import Path
 
-def setup_logger():
-    """Setup logger with console and file handlers"""
-    # Create logs directory if it doesn't exist
-    log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
-    
-    # Remove default handler
-    logger.remove()
-    
-    # Add console handler with color
-    logger.add(
-        sys.stdout,
-        colorize=True,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{extra[name]}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level="INFO"
-    )
-    
-    # Add file handler for debug logs
-    logger.add(
-        "logs/debug.log",
-        rotation="500 MB",
-        retention="10 days",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {extra[name]}:{function}:{line} - {message}",
-        level="DEBUG"
-    )
-    
-    # Add file handler for errors
-    logger.add(
-        "logs/error.log",
-        rotation="100 MB",
-        retention="30 days",
-        format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {extra[name]}:{function}:{line} - {message}\n{exception}",
-        level="ERROR",
-        backtrace=True,
-        diagnose=True
-    )
+# Longest API payload rendered into a log line
+MAX_PAYLOAD_CHARS = 2000
+
+_configured = False
+_setup_lock = threading.Lock()
+
+def setup_logger(force=False):
+    """Setup logger with console and file handlers, once per process
+
+    Every sink is queue-backed (``enqueue=True``): a background thread does the
+    formatting and disk writes, so request threads never block on log I/O.
+    Call ``logger.complete()`` to wait for queued messages to be written.
+    """
+    global _configured
+    with _setup_lock:
+        if _configured and not force:
+            return
+
+        # Create logs directory if it doesn't exist
+        log_dir = Path("logs")
+        log_dir.mkdir(exist_ok=True)
+
+        # Remove default handler
+        logger.remove()
+        # Records from modules that never called get_logger still need a name
+        logger.configure(extra={'name': 'crypto_twitter_bot'})
+
+        # Add console handler with color
+        logger.add(
+            sys.stdout,
+            colorize=True,
+            format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{extra[name]}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+            level="INFO",
+            enqueue=True
+        )
+
+        # Add file handler for debug logs
+        logger.add(
+            "logs/debug.log",
+            rotation="500 MB",
+            retention="10 days",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {extra[name]}:{function}:{line} - {message}",
+            level="DEBUG",
+            enqueue=True
+        )
+
+        # Add file handler for errors; diagnose is off so tracebacks do not
+        # render local variables (slow, and may include credentials)
+        logger.add(
+            "logs/error.log",
+            rotation="100 MB",
+            retention="30 days",
+            format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {extra[name]}:{function}:{line} - {message}\n{exception}",
+            level="ERROR",
+            backtrace=True,
+            diagnose=False,
+            enqueue=True
+        )
+        _configured = True
 
 def get_logger(name):
     """Get a logger instance with the given name"""
     setup_logger()
-    return logger.bind(name=name) 
\ No newline at end of file
+    return logger.bind(name=name)
+
+def truncate(payload, limit=MAX_PAYLOAD_CHARS):
+    """Render ``payload`` for a log line, cut to ``limit`` characters
+
+    Pass it inside ``logger.opt(lazy=True)`` calls so large payloads are only
+    rendered when a sink actually wants the message.
+    """
+    text = payload if isinstance(payload, str) else repr(payload)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text) - limit} more chars)"
@@ -3,16 +3,51 @@ import requests
 import time
 from datetime import datetime, timedelta
 from loguru import logger
+from .aggregation import QuoteAggregator
+from .analytics import TickerFrame
+from .cache import TTLCache
+from .candles import get_candle_cache
+from .coingecko_ids import UNKNOWN, get_coingecko_ids
+from .config import load_config
+from .fetch_engine import FetchEngine
+from .health import get_health
+from .history import get_history
+from .logger import truncate
+from .metrics import get_metrics, timed
+from .models import Ticker
+from .sources import FetchPlanner, default_registry
+from .ticker_index import TickerIndex
+from .transport import get_session
+
+# BTC/USD reference rate shared by every handler; one OKX request per minute at most
+_reference_rates = TTLCache(ttl=60, stale_ttl=240, name='reference_rates')
+
+# Most ids CoinGecko's /coins/markets answers per page
+COINGECKO_PAGE_SIZE = 250
 
 class MarketDataHandler:
-    def __init__(self):
-        self.session = requests.Session()
-        # Add headers to avoid API blocks
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
-            'Accept': 'application/json'
-        })
+    def __init__(self, engine=None, rate_cache=None, session=None, config=None, registry=None, health=None,
+                 history=None, candles=None, coingecko_ids=None, okx_stream=None):
+        self.config = config if config is not None else load_config()
+        self.planner = FetchPlanner(registry or default_registry(), self.config)
+        self.engine = engine or FetchEngine()
+        self.health = health or get_health()
+        self.history = history or get_history()
+        self.rate_cache = rate_cache or _reference_rates
+        self._cycle_btc_price = None
+        self._cycle_coingecko = None
+        self.coingecko_ids = coingecko_ids or get_coingecko_ids()
+        self.session = session or get_session()
+        self.ticker_index = TickerIndex(self.session)
+        self.candles = candles or get_candle_cache(self.session)
+        settings = dict(self.config.get('aggregation', {}))
+        self.aggregate_sources = settings.pop('enabled', False)
+        self.aggregation_venues = settings.pop('venues', ['okx', 'gateio', 'kucoin', 'binance', 'coingecko'])
+        self.aggregator = QuoteAggregator(**settings)
+        # Optional OKXTickerStream; pairs it holds are read from it instead of the REST tickers
+        self.okx_stream = okx_stream
         
+    @timed()
     def get_unisat_data(self, token):
         """Get data from Unisat API for BRC20 tokens"""
         try:
@@ -30,132 +65,115 @@ class MarketDataHandler:
             
             if data.get('code') == 0 and data.get('data'):
                 token_data = data['data']
-                return {
-                    'price': float(token_data['latestPrice']),
-                    'volume': float(token_data['volume24h']),
-                    'change_24h': float(token_data['priceChange24h'])
-                }
-            
-            # Fallback to OKX for ORDI
-            if token.lower() == 'ordi':
-                return self.get_okx_data('ORDI')
+                return Ticker(
+                    price=float(token_data['latestPrice']),
+                    volume=float(token_data['volume24h']),
+                    change_24h=float(token_data['priceChange24h'])
+                )
             return None
         except Exception as e:
             logger.error(f"Error fetching Unisat data for {token}: {str(e)}")
-            # Fallback to OKX for ORDI
-            if token.lower() == 'ordi':
-                try:
-                    return self.get_okx_data('ORDI')
-                except Exception as e2:
-                    logger.error(f"Error fetching ORDI data from fallback: {str(e2)}")
             return None
 
+    @timed()
     def get_okx_data(self, symbol):
         """Get data from OKX API"""
         try:
-            # Get ticker data
-            url = "https://www.okx.com/api/v5/market/ticker"
-            params = {
-                'instId': f"{symbol}-USDT"
-            }
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
+            # Get ticker data from the live stream or the bulk OKX index
+            quote = self._okx_quote(f"{symbol}-USDT")
             
-            logger.debug(f"OKX ticker response for {symbol}: {data}")
+            logger.opt(lazy=True).debug("OKX quote for {}: {}", lambda: symbol, lambda: quote)
             
-            if data['code'] == '0' and data['data']:
-                ticker = data['data'][0]
-                price = float(ticker['last'])
-                volume_usdt = float(ticker['volCcy24h'])
+            if quote:
+                price, volume_usdt = quote
                 btc_price = self.get_btc_price()
                 
                 logger.debug(f"OKX {symbol} price: {price}, volume: {volume_usdt}, btc_price: {btc_price}")
                 
-                # Get 24h price change
-                url_candle = "https://www.okx.com/api/v5/market/candles"
-                params_candle = {
-                    'instId': f"{symbol}-USDT",
-                    'bar': '1D',
-                    'limit': '2'
-                }
-                response_candle = self.session.get(url_candle, params=params_candle)
-                response_candle.raise_for_status()
-                candle_data = response_candle.json()
+                # Get 24h price change from local history, falling back to daily candles
+                price_change = self.history.change_since(symbol, price, source='okx')
+                if price_change is None:
+                    price_change = self._get_okx_candle_change(symbol, price)
                 
-                logger.debug(f"OKX candle response for {symbol}: {candle_data}")
-                
-                if candle_data['code'] == '0' and len(candle_data['data']) >= 2:
-                    current_price = float(candle_data['data'][0][4])
-                    prev_price = float(candle_data['data'][1][4])
-                    price_change = ((current_price - prev_price) / prev_price) * 100
-                    logger.debug(f"OKX {symbol} price change calculation: current={current_price}, prev={prev_price}, change={price_change}%")
-                else:
-                    price_change = 0
-                    logger.warning(f"Could not calculate price change for {symbol}, using 0")
-                
-                return {
-                    'price': price,
-                    'volume': volume_usdt / btc_price if btc_price else 0,
-                    'change_24h': price_change
-                }
+                return Ticker(
+                    price=price,
+                    volume=volume_usdt / btc_price if btc_price else 0,
+                    change_24h=price_change
+                )
             return None
         except Exception as e:
             logger.error(f"Error fetching OKX data for {symbol}: {str(e)}")
             return None
 
+    def _okx_quote(self, inst_id):
+        """``(price, USDT volume)`` of an OKX pair, or None if OKX does not list it
+
+        Pairs the ticker stream holds are answered from it; the REST tickers are
+        only downloaded for the others, or while the stream is down.
+        """
+        if self.okx_stream is not None and self.okx_stream.has_all([inst_id]):
+            entry = self.okx_stream.get_market_data([inst_id])[inst_id]
+            return entry['price'], entry['volume']
+        ticker = self.ticker_index.get('okx', inst_id)
+        if not ticker:
+            return None
+        return float(ticker['last']), float(ticker['volCcy24h'])
+
+    def okx_pairs(self):
+        """OKX pairs a cycle reads: BTC-USDT for the reference rate and every token OKX may quote"""
+        venues = self.aggregation_venues if self.aggregate_sources else ()
+        pairs = ['BTC-USDT']
+        for entry in self.planner.build():
+            if 'okx' in venues or any(source.name == 'okx' for source in entry.sources):
+                pairs.append(f"{entry.token}-USDT")
+        return pairs
+
+    def _get_okx_candle_change(self, symbol, price):
+        """Get 24h price change against the last confirmed OKX daily close"""
+        price_change = self.candles.change(f"{symbol}-USDT", price)
+        if price_change is not None:
+            logger.debug(f"OKX {symbol} price change calculation: current={price}, change={price_change}%")
+            return price_change
+        
+        logger.warning(f"Could not calculate price change for {symbol}, using 0")
+        return 0
+
+    @timed()
     def get_magiceden_data(self, token):
         """Get data from Magic Eden API for Runes"""
         try:
-            # Try OKX first for DOGS
-            if token.lower() == 'dogs':
-                okx_data = self.get_okx_data('DOGS')
-                if okx_data:
-                    return okx_data
-
-            # Fallback to Magic Eden API
-            url = "https://api-mainnet.magiceden.dev/v2/ord/btc/runes/stats"
-            response = self.session.get(url)
-            response.raise_for_status()
-            data = response.json()
-            
-            # Find the token in the list
-            token_data = next((item for item in data if item['symbol'].lower() == token.lower()), None)
+            # Look the token up in the bulk runes stats index
+            token_data = self.ticker_index.get('magiceden', token)
             if token_data:
                 btc_price = self.get_btc_price()
                 volume_btc = float(token_data.get('volume24h', 0))
                 
-                return {
-                    'price': float(token_data['floorPrice']),
-                    'volume': volume_btc,
-                    'change_24h': float(token_data.get('change24h', 0))
-                }
+                return Ticker(
+                    price=float(token_data['floorPrice']),
+                    volume=volume_btc,
+                    change_24h=float(token_data.get('change24h', 0))
+                )
             return None
         except Exception as e:
             logger.error(f"Error fetching Magic Eden data for {token}: {str(e)}")
             return None
 
+    @timed()
     def get_coingecko_id(self, coin_id):
-        """Get correct CoinGecko ID using search API"""
+        """Get correct CoinGecko ID using search API
+
+        Exact symbol matches, and tokens CoinGecko does not list (None), are kept
+        in the persistent id cache, so each symbol is searched for once per TTL.
+        """
         try:
-            # First check our known mappings
-            coin_id_map = {
-                'stamp': 'stamp',  # We'll try to find the correct ID
-                'ordi': 'ordinals',
-                'dogs': 'doginals',
-                'ckb': 'nervos-network',
-                'fb': 'friendtech'
-            }
-            
-            mapped_id = coin_id_map.get(coin_id.lower())
-            if mapped_id:
-                return mapped_id
+            # First check the configured mappings and earlier resolutions
+            cg_id = self._known_coingecko_id(coin_id)
+            if cg_id is not UNKNOWN:
+                return cg_id
                 
-            # If not in our map, try to search
+            # If not known yet, try to search
             url = "https://pro-api.coingecko.com/api/v3/search"
-            headers = {
-                'x-cg-pro-api-key': 'CG-zNWWNicxnjMZYsB1TwFhWrdb'
-            }
+            headers = self._coingecko_headers()
             params = {
                 'query': coin_id
             }
@@ -165,30 +183,117 @@ class MarketDataHandler:
             data = response.json()
             
             if data and 'coins' in data and len(data['coins']) > 0:
-                # Find exact match first
-                for coin in data['coins']:
-                    if coin['symbol'].lower() == coin_id.lower():
-                        return coin['id']
-                # If no exact match, return first result
-                return data['coins'][0]['id']
+                # Find exact match first, else take the first result
+                cg_id = next(
+                    (coin['id'] for coin in data['coins'] if coin['symbol'].lower() == coin_id.lower()),
+                    None
+                )
+                if cg_id is None:
+                    # A guess is not worth remembering for a month; search again next cycle
+                    return data['coins'][0]['id']
+                self.coingecko_ids.put(coin_id, cg_id)
+                return cg_id
                 
-            return coin_id  # Return original if nothing found
+            # Remember that CoinGecko does not list it
+            self.coingecko_ids.put(coin_id, None)
+            return None
             
         except Exception as e:
             logger.error(f"Error searching CoinGecko ID for {coin_id}: {str(e)}")
             return coin_id
 
+    def _coingecko_headers(self):
+        """Pro API headers, with the key from ``COINGECKO_API_KEY``"""
+        return {'x-cg-pro-api-key': os.getenv('COINGECKO_API_KEY', '')}
+
+    def _known_coingecko_id(self, coin_id):
+        """The configured or cached CoinGecko ID for ``coin_id``, without searching"""
+        coin_id_map = self.config.get('data_sources', {}).get('bitcoin_ecosystem', {}).get('coingecko_ids', {})
+        mapped_id = coin_id_map.get(coin_id.upper())
+        if mapped_id:
+            return mapped_id
+        return self.coingecko_ids.get(coin_id)
+
+    @timed()
+    def get_coingecko_markets(self, cg_ids):
+        """Get data for many CoinGecko IDs from the bulk /coins/markets endpoint
+
+        Returns ``{id: data}`` for every ID in the pages that answered, with None
+        for IDs CoinGecko left out or priced at zero. IDs on a failed page are
+        omitted so they fall back to the per-coin request.
+        """
+        url = "https://pro-api.coingecko.com/api/v3/coins/markets"
+        headers = self._coingecko_headers()
+        btc_price = self.get_btc_price()
+        markets = {}
+        for start in range(0, len(cg_ids), COINGECKO_PAGE_SIZE):
+            page = cg_ids[start:start + COINGECKO_PAGE_SIZE]
+            params = {
+                'vs_currency': 'usd',
+                'ids': ','.join(page),
+                'per_page': COINGECKO_PAGE_SIZE,
+                'page': 1
+            }
+            try:
+                response = self.session.get(url, headers=headers, params=params, timeout=10)
+                response.raise_for_status()
+                rows = {row.get('id'): row for row in response.json()}
+            except Exception as e:
+                logger.error(f"Error fetching CoinGecko markets for {len(page)} ids: {str(e)}")
+                continue
+
+            for cg_id in page:
+                row = rows.get(cg_id) or {}
+                try:
+                    price = float(row.get('current_price') or 0)
+                    volume = float(row.get('total_volume') or 0)
+                    change = float(row.get('price_change_percentage_24h') or 0)
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Error parsing CoinGecko market data for {cg_id}: {str(e)}")
+                    price = volume = 0
+                markets[cg_id] = Ticker(
+                    price=price,
+                    volume=volume / btc_price if btc_price else 0,
+                    change_24h=change
+                ) if price > 0 and volume > 0 else None
+        return markets
+
+    def _prefetch_coingecko(self, plan):
+        """Quote every planned token with a known CoinGecko ID in bulk
+
+        Tokens not resolved yet are left to the per-token path, which searches
+        for them and caches the ID for later cycles. The bulk request runs under
+        the engine's source deadline; if it misses it, every token falls back to
+        the per-token path.
+        """
+        everywhere = self.aggregate_sources and 'coingecko' in self.aggregation_venues
+        cg_ids = set()
+        for entry in plan:
+            if everywhere or any(source.name == 'coingecko' for source in entry.sources):
+                cg_id = self._known_coingecko_id(entry.token)
+                if cg_id and cg_id is not UNKNOWN:
+                    cg_ids.add(cg_id)
+        if not cg_ids:
+            return None
+        results, _ = self.engine.run({'coingecko_markets': lambda: self.get_coingecko_markets(sorted(cg_ids))})
+        return results.get('coingecko_markets')
+
+    @timed()
     def get_coingecko_data(self, coin_id):
         """Get data from CoinGecko API with proper error handling"""
         try:
             # Get the correct CoinGecko ID
             cg_id = self.get_coingecko_id(coin_id)
+            if cg_id is None:
+                return None
+
+            # Tokens quoted in bulk at the start of the cycle need no request
+            if self._cycle_coingecko is not None and cg_id in self._cycle_coingecko:
+                return self._cycle_coingecko[cg_id]
             
             # Try Pro API first with coins endpoint
             url = f"https://pro-api.coingecko.com/api/v3/coins/{cg_id}"
-            headers = {
-                'x-cg-pro-api-key': 'CG-zNWWNicxnjMZYsB1TwFhWrdb'
-            }
+            headers = self._coingecko_headers()
             params = {
                 'localization': 'false',
                 'tickers': 'false',
@@ -225,11 +330,11 @@ class MarketDataHandler:
                         logger.warning(f"Invalid price or volume from CoinGecko for {cg_id}")
                         return None
                         
-                    return {
-                        'price': price,
-                        'volume': volume / btc_price if btc_price else 0,
-                        'change_24h': change
-                    }
+                    return Ticker(
+                        price=price,
+                        volume=volume / btc_price if btc_price else 0,
+                        change_24h=change
+                    )
                 except (ValueError, TypeError, KeyError) as e:
                     logger.error(f"Error parsing CoinGecko data values for {cg_id}: {str(e)}")
                     return None
@@ -264,11 +369,11 @@ class MarketDataHandler:
                     if price <= 0 or volume <= 0:
                         return None
                         
-                    return {
-                        'price': price,
-                        'volume': volume / btc_price if btc_price else 0,
-                        'change_24h': change
-                    }
+                    return Ticker(
+                        price=price,
+                        volume=volume / btc_price if btc_price else 0,
+                        change_24h=change
+                    )
             except Exception as e2:
                 logger.error(f"Fallback to free API also failed for {cg_id}: {str(e2)}")
             return None
@@ -276,65 +381,47 @@ class MarketDataHandler:
             logger.error(f"Unexpected error fetching CoinGecko data for {cg_id}: {str(e)}")
             return None
 
+    @timed()
     def get_gateio_data(self, symbol):
         """Get data from Gate.io API"""
         try:
-            # Map symbols to Gate.io trading pairs
-            pair_map = {
-                'STAMP': ['STAMP_USDT', 'STAMP_BTC'],  # Try both USDT and BTC pairs
-                'ORDI': ['ORDI_USDT', 'ORDI_BTC'],
-                'DOGS': ['DOGS_USDT', 'DOGS_BTC'],
-                'CKB': ['CKB_USDT'],
-                'FB': ['FB_USDT']
-            }
-            
-            # Get the correct trading pairs
-            currency_pairs = pair_map.get(symbol.upper(), [])
-            if not currency_pairs:
-                return None
+            # Try both USDT and BTC pairs
+            currency_pairs = [f"{symbol.upper()}_USDT", f"{symbol.upper()}_BTC"]
             
             btc_price = self.get_btc_price()
             if not btc_price:
                 logger.error("Failed to get BTC price for conversion")
                 return None
 
+            headers = {
+                'Accept': 'application/json',
+                'User-Agent': 'Mozilla/5.0'
+            }
+
             for currency_pair in currency_pairs:
                 try:
-                    # First try to get ticker data
-                    url = "https://api.gateio.ws/api/v4/spot/tickers"
-                    params = {
-                        'currency_pair': currency_pair
-                    }
-                    headers = {
-                        'Accept': 'application/json',
-                        'User-Agent': 'Mozilla/5.0'
-                    }
-                    response = self.session.get(url, params=params, headers=headers, timeout=5)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data and isinstance(data, list) and len(data) > 0:
-                            ticker = data[0]
-                            
-                            try:
-                                price = float(ticker['last'])
-                                volume = float(ticker['quote_volume'])
-                                change = float(ticker['change_percentage'])
-                                
-                                # Convert BTC prices to USD if needed
-                                if currency_pair.endswith('_BTC'):
-                                    price = price * btc_price
-                                    volume = volume * btc_price
-                                
-                                if price > 0 and volume > 0:
-                                    return {
-                                        'price': price,
-                                        'volume': volume / btc_price,  # Convert volume to BTC
-                                        'change_24h': change
-                                    }
-                            except (ValueError, TypeError, KeyError) as e:
-                                logger.error(f"Error parsing Gate.io ticker data for {currency_pair}: {str(e)}")
-                                continue
+                    # First try the bulk Gate.io ticker index
+                    ticker = self.ticker_index.get('gateio', currency_pair)
+                    if ticker:
+                        try:
+                            price = float(ticker['last'])
+                            volume = float(ticker['quote_volume'])
+                            change = float(ticker['change_percentage'])
+                        
+                            # Convert BTC prices to USD if needed
+                            if currency_pair.endswith('_BTC'):
+                                price = price * btc_price
+                                volume = volume * btc_price
+                        
+                            if price > 0 and volume > 0:
+                                return Ticker(
+                                    price=price,
+                                    volume=volume / btc_price,  # Convert volume to BTC
+                                    change_24h=change
+                                )
+                        except (ValueError, TypeError, KeyError) as e:
+                            logger.error(f"Error parsing Gate.io ticker data for {currency_pair}: {str(e)}")
+                            continue
                     
                     # If ticker fails, try candlestick data
                     url = "https://api.gateio.ws/api/v4/spot/candlesticks"
@@ -363,11 +450,11 @@ class MarketDataHandler:
                                     volume = volume * btc_price
                                 
                                 if price > 0 and volume > 0:
-                                    return {
-                                        'price': price,
-                                        'volume': volume / btc_price,  # Convert volume to BTC
-                                        'change_24h': change
-                                    }
+                                    return Ticker(
+                                        price=price,
+                                        volume=volume / btc_price,  # Convert volume to BTC
+                                        change_24h=change
+                                    )
                             except (ValueError, TypeError, IndexError) as e:
                                 logger.error(f"Error parsing Gate.io candlestick data for {currency_pair}: {str(e)}")
                                 continue
@@ -375,14 +462,13 @@ class MarketDataHandler:
                     logger.error(f"Error fetching Gate.io data for {currency_pair}: {str(e)}")
                     continue
             
-            # If all pairs fail, try market stats as last resort
-            url = "https://api.gateio.ws/api/v4/spot/markets"
-            response = self.session.get(url, headers=headers, timeout=5)
+            # If all pairs fail, try the cached market directory as last resort
+            with get_metrics().span('gateio_markets_fallback'):
+                directory = self.ticker_index.index('gateio_markets')
             
-            if response.status_code == 200:
-                data = response.json()
+            if directory:
                 for currency_pair in currency_pairs:
-                    market_data = next((item for item in data if item.get('id') == currency_pair), None)
+                    market_data = directory.get(currency_pair)
                     if market_data:
                         try:
                             price = float(market_data.get('last', 0))
@@ -395,11 +481,11 @@ class MarketDataHandler:
                                 volume = volume * btc_price
                             
                             if price > 0 and volume > 0:
-                                return {
-                                    'price': price,
-                                    'volume': volume / btc_price,  # Convert volume to BTC
-                                    'change_24h': change
-                                }
+                                return Ticker(
+                                    price=price,
+                                    volume=volume / btc_price,  # Convert volume to BTC
+                                    change_24h=change
+                                )
                         except (ValueError, TypeError) as e:
                             logger.error(f"Error parsing Gate.io market data for {currency_pair}: {str(e)}")
                             continue
@@ -409,41 +495,36 @@ class MarketDataHandler:
             logger.error(f"Error fetching Gate.io data for {symbol}: {str(e)}")
             return None
 
-    def get_stamp_data(self):
-        """Get data for STAMP token from Kucoin API"""
+    @timed()
+    def get_kucoin_data(self, symbol):
+        """Get data from Kucoin API"""
         try:
-            url = "https://api.kucoin.com/api/v1/market/stats"
-            params = {'symbol': 'STAMP-USDT'}
-            response = self.session.get(url, params=params, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data.get('code') == '200000' and data.get('data'):
-                    market_data = data['data']
-                    try:
-                        price = float(market_data.get('last', 0))
-                        volume = float(market_data.get('volValue', 0))
-                        change = float(market_data.get('changeRate', 0)) * 100
-                        btc_price = self.get_btc_price()
-                        
-                        if price > 0 and volume > 0 and btc_price:
-                            return {
-                                'price': price,
-                                'volume': volume / btc_price,
-                                'change_24h': change
-                            }
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Data parsing error from Kucoin: {str(e)}")
+            market_data = self.ticker_index.get('kucoin', f"{symbol.upper()}-USDT")
+            if market_data:
+                try:
+                    price = float(market_data.get('last', 0))
+                    volume = float(market_data.get('volValue', 0))
+                    change = float(market_data.get('changeRate', 0)) * 100
+                    btc_price = self.get_btc_price()
+                    
+                    if price > 0 and volume > 0 and btc_price:
+                        return Ticker(
+                            price=price,
+                            volume=volume / btc_price,
+                            change_24h=change
+                        )
+                except (ValueError, TypeError) as e:
+                    logger.error(f"Data parsing error from Kucoin for {symbol}: {str(e)}")
             return None
         except Exception as e:
-            logger.error(f"Error fetching STAMP data from Kucoin: {str(e)}")
-            try:
-                # Fallback to mock data for testing
-                mock_data = self.get_mock_data()
-                return mock_data.get('stamp', None)
-            except Exception as e:
-                logger.error(f"Error getting mock data for STAMP: {str(e)}")
-                return None
+            logger.error(f"Error fetching {symbol} data from Kucoin: {str(e)}")
+            return None
+
+    def get_stamp_data(self):
+        """Get data for STAMP token from Kucoin API"""
+        return self.get_kucoin_data('STAMP')
 
+    @timed()
     def get_binance_data(self, symbol):
         """Get data from Binance API"""
         try:
@@ -460,31 +541,38 @@ class MarketDataHandler:
                 btc_price = self.get_btc_price()
                 volume_usdt = float(data['quoteVolume'])
                 
-                return {
-                    'price': float(data['lastPrice']),
-                    'volume': volume_usdt / btc_price if btc_price else 0,
-                    'change_24h': float(data['priceChangePercent'])
-                }
+                return Ticker(
+                    price=float(data['lastPrice']),
+                    volume=volume_usdt / btc_price if btc_price else 0,
+                    change_24h=float(data['priceChangePercent'])
+                )
             return None
         except Exception as e:
             logger.error(f"Error fetching Binance data for {symbol}: {str(e)}")
             return None
 
     def get_btc_price(self):
-        """Get current BTC price in USD from OKX"""
+        """Get current BTC price in USD from the shared reference rate cache
+
+        During ``get_all_market_data`` the rate is pinned so every token's volume
+        is converted at the same price.
+        """
+        if self._cycle_btc_price:
+            return self._cycle_btc_price
+        return self.rate_cache.get('BTC-USDT', self._fetch_btc_price)
+
+    def _fetch_btc_price(self):
+        """Fetch current BTC price in USD from OKX"""
         try:
-            url = "https://www.okx.com/api/v5/market/ticker"
-            params = {'instId': 'BTC-USDT'}
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            if data['code'] == '0' and data['data']:
-                return float(data['data'][0]['last'])
+            quote = self._okx_quote('BTC-USDT')
+            if quote:
+                return quote[0]
             return None
         except Exception as e:
             logger.error(f"Error fetching BTC price from OKX: {str(e)}")
             return None
 
+    @timed()
     def get_cat20_data(self, token):
         """Get data from UniSat CAT Market API"""
         try:
@@ -500,90 +588,77 @@ class MarketDataHandler:
                 'Accept': 'application/json'
             }
             
-            all_data = []
             btc_price = self.get_btc_price()
             
-            for url in endpoints:
-                try:
-                    params = {'tick': token.lower()} if 'cat-dex' in url else {}
-                    response = self.session.get(url, headers=headers, params=params, timeout=5)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        if data.get('code') == 0 and data.get('data'):
-                            market_data = data['data']
-                            try:
-                                # Find token in the market data
-                                token_data = None
-                                if isinstance(market_data, list):
-                                    token_data = next((item for item in market_data if 
-                                        item.get('tick', '').lower() == token.lower() or 
-                                        item.get('ticker', '').lower() == token.lower()), None)
-                                else:
-                                    token_data = market_data
+            def fetch(url):
+                params = {'tick': token.lower()} if 'cat-dex' in url else {}
+                response = self.session.get(url, headers=headers, params=params, timeout=5)
+                
+                if response.status_code == 200:
+                    data = response.json()
+                    if data.get('code') == 0 and data.get('data'):
+                        market_data = data['data']
+                        try:
+                            # Find token in the market data
+                            token_data = None
+                            if isinstance(market_data, list):
+                                token_data = next((item for item in market_data if 
+                                    item.get('tick', '').lower() == token.lower() or 
+                                    item.get('ticker', '').lower() == token.lower()), None)
+                            else:
+                                token_data = market_data
+                            
+                            if token_data:
+                                # Try different field names
+                                price_fields = ['price', 'lastPrice', 'last', 'currentPrice']
+                                volume_fields = ['volume24h', 'volume', 'dailyVolume', 'vol24h']
+                                change_fields = ['priceChangePercent', 'priceChange24h', 'change24h', 'change']
                                 
-                                if token_data:
-                                    # Try different field names
-                                    price_fields = ['price', 'lastPrice', 'last', 'currentPrice']
-                                    volume_fields = ['volume24h', 'volume', 'dailyVolume', 'vol24h']
-                                    change_fields = ['priceChangePercent', 'priceChange24h', 'change24h', 'change']
-                                    
-                                    price = 0
-                                    volume = 0
-                                    change = 0
-                                    
-                                    for field in price_fields:
-                                        if token_data.get(field):
-                                            try:
-                                                price = float(token_data[field])
-                                                break
-                                            except (ValueError, TypeError):
-                                                continue
-                                                
-                                    for field in volume_fields:
-                                        if token_data.get(field):
-                                            try:
-                                                volume = float(token_data[field])
-                                                break
-                                            except (ValueError, TypeError):
-                                                continue
-                                                
-                                    for field in change_fields:
-                                        if token_data.get(field):
-                                            try:
-                                                change = float(token_data[field])
-                                                break
-                                            except (ValueError, TypeError):
-                                                continue
-                                    
-                                    if price > 0 and volume > 0:
-                                        all_data.append({
-                                            'price': price,
-                                            'volume': volume / btc_price if btc_price else 0,
-                                            'change_24h': change
-                                        })
-                            except (ValueError, TypeError) as e:
-                                logger.error(f"Data parsing error from {url}: {str(e)}")
-                except Exception as e:
-                    logger.error(f"Error fetching data from {url}: {str(e)}")
-                    continue
+                                price = 0
+                                volume = 0
+                                change = None
+                                
+                                for field in price_fields:
+                                    if token_data.get(field):
+                                        try:
+                                            price = float(token_data[field])
+                                            break
+                                        except (ValueError, TypeError):
+                                            continue
+                                            
+                                for field in volume_fields:
+                                    if token_data.get(field):
+                                        try:
+                                            volume = float(token_data[field])
+                                            break
+                                        except (ValueError, TypeError):
+                                            continue
+                                            
+                                for field in change_fields:
+                                    if token_data.get(field):
+                                        try:
+                                            change = float(token_data[field])
+                                            break
+                                        except (ValueError, TypeError):
+                                            continue
+                                
+                                if price > 0 and volume > 0:
+                                    return Ticker(
+                                        price=price,
+                                        volume=volume / btc_price if btc_price else 0,
+                                        # Ignore implausible changes rather than averaging them in
+                                        change_24h=change if change is not None and abs(change) <= 100 else None
+                                    )
+                        except (ValueError, TypeError) as e:
+                            logger.error(f"Data parsing error from {url}: {str(e)}")
+                return None
             
-            # If we have multiple data points, aggregate them
-            if len(all_data) > 0:
-                # Calculate median values to avoid outliers
-                prices = [d['price'] for d in all_data if d['price'] > 0]
-                volumes = [d['volume'] for d in all_data if d['volume'] > 0]
-                changes = [d['change_24h'] for d in all_data if abs(d['change_24h']) <= 100]
-                
-                if prices and volumes:
-                    return {
-                        'price': sorted(prices)[len(prices)//2],  # Median price
-                        'volume': sum(volumes) / len(volumes),    # Average volume
-                        'change_24h': sum(changes) / len(changes) if changes else 0  # Average change
-                    }
-                elif len(all_data) > 0:
-                    # If we don't have all metrics, use the first available complete data
-                    return next((d for d in all_data if d['price'] > 0 and d['volume'] > 0), all_data[0])
+            # Query every endpoint in parallel and merge what answers; the endpoints
+            # describe the same market, so volumes are averaged rather than summed
+            return self.aggregator.aggregate(
+                {url: (lambda url=url: fetch(url)) for url in endpoints},
+                sum_volume=False
+            )
                     
         except Exception as e:
             logger.error(f"Error fetching CAT20 data for {token}: {str(e)}")
@@ -591,120 +666,105 @@ class MarketDataHandler:
 
     def get_fb_data(self):
         """Get data for FB token from Gate.io API"""
-        try:
-            url = "https://api.gateio.ws/api/v4/spot/tickers"
-            params = {'currency_pair': 'FB_USDT'}
-            response = self.session.get(url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data and isinstance(data, list) and len(data) > 0:
-                    ticker = data[0]
-                    try:
-                        price = float(ticker['last'])
-                        volume = float(ticker['quote_volume'])
-                        change = float(ticker['change_percentage'])
-                        btc_price = self.get_btc_price()
-                        
-                        if price > 0 and volume > 0 and btc_price:
-                            return {
-                                'price': price,
-                                'volume': volume / btc_price,
-                                'change_24h': change
-                            }
-                    except (ValueError, TypeError) as e:
-                        logger.error(f"Data parsing error from Gate.io: {str(e)}")
-            return None
-        except Exception as e:
-            logger.error(f"Error fetching FB data from Gate.io: {str(e)}")
-            try:
-                mock_data = self.get_mock_data()
-                return mock_data.get('fb', None)
-            except Exception as e:
-                logger.error(f"Error getting mock data for FB: {str(e)}")
-                return None
+        return self.get_gateio_data('FB')
+
+    def fetch_with_fallbacks(self, entry):
+        """Fetch one planned token, trying its healthiest sources first
+
+        With aggregation enabled the token is instead quoted by several sources at
+        once and the quotes are merged.
+        """
+        if self.aggregate_sources:
+            return self.fetch_aggregated(entry)
+
+        for source in self.health.rank(entry.sources):
+            data = source.fetch(self, entry.token)
+            if data:
+                # History compares each source's prices only with its own
+                data = Ticker.from_mapping(data)
+                data.source = source.name
+                return data
+            logger.warning(f"No {entry.token} data from {source.name}, trying next source")
+            get_metrics().inc('source_fallbacks_total', token=entry.token, source=source.name)
+        return None
+
+    def fetch_aggregated(self, entry):
+        """Quote one planned token from its sources and the aggregation venues in parallel"""
+        sources = list(entry.sources)
+        for name in self.aggregation_venues:
+            adapter = self.planner.registry.get(name)
+            if adapter and adapter not in sources and adapter.covers(entry.token, entry.protocol):
+                sources.append(adapter)
+
+        merged = self.aggregator.aggregate(
+            {
+                source.name: (lambda source=source: source.fetch(self, entry.token))
+                for source in self.health.rank(sources)
+            },
+            # The token's configured first source wins a two-quote disagreement
+            primary=entry.sources[0].name if entry.sources else None
+        )
+        if merged:
+            merged.source = 'aggregated'
+        return merged
 
+    @timed('cycle_duration_seconds')
     def get_all_market_data(self):
-        """Get market data for all tracked assets"""
+        """Get market data for all tracked assets
+
+        Tokens and their sources come from the fetch plan. Every token is fetched
+        concurrently; tokens whose sources miss the deadline are kept with a
+        ``timed_out`` marker instead of a price.
+        """
+        plan = self.planner.build()
+        logger.debug(f"Fetch plan by venue: {dict(plan.by_venue())}")
+
+        # Fetch the BTC reference rate once, before any source needs it
+        self._cycle_btc_price = self.get_btc_price()
+        try:
+            self._cycle_coingecko = self._prefetch_coingecko(plan)
+            results, timed_out = self.engine.run({
+                entry.token.lower(): (lambda entry=entry: self.fetch_with_fallbacks(entry))
+                for entry in plan
+            })
+        finally:
+            self._cycle_btc_price = None
+            self._cycle_coingecko = None
+            # Persist the CoinGecko IDs resolved during the cycle
+            self.coingecko_ids.flush()
+
         market_data = {}
-        
-        # Get DOGS data from OKX
-        dogs_data = self.get_okx_data('DOGS')
-        if dogs_data:
-            market_data['dogs'] = {
-                'protocol': 'Runes',
-                **dogs_data
-            }
-            
-        # Get STAMP data from Kucoin
-        stamp_data = self.get_stamp_data()
-        if stamp_data:
-            market_data['stamp'] = {
-                'protocol': 'SRC20',
-                **stamp_data
-            }
-            
-        # Get ORDI data from OKX
-        ordi_data = self.get_okx_data('ORDI')
-        if ordi_data:
-            market_data['ordi'] = {
-                'protocol': 'BRC20',
-                **ordi_data
-            }
-            
-        # Get FB data from Binance
-        fb_data = self.get_fb_data()
-        if fb_data:
-            market_data['fb'] = {
-                'protocol': 'FB',
-                **fb_data
-            }
+        for entry in plan:
+            token = entry.token.lower()
+            if token in timed_out:
+                market_data[token] = Ticker(protocol=entry.protocol, timed_out=True)
+            elif results.get(token):
+                # Tag the fetched record in place rather than copying it
+                ticker = Ticker.from_mapping(results[token])
+                ticker.protocol = entry.protocol
+                market_data[token] = ticker
             
-        # Get CKB data from Gate.io
+        # Calculate overall market trend
+        market_data['overall_trend'] = TickerFrame.from_market_data(market_data).trend()
+
+        # Keep the snapshot so later cycles can compute changes locally
         try:
-            url = "https://api.gateio.ws/api/v4/spot/tickers"
-            params = {'currency_pair': 'CKB_USDT'}
-            response = self.session.get(url, timeout=5)
-            if response.status_code == 200:
-                data = response.json()
-                if data and isinstance(data, list):
-                    for ticker in data:
-                        if ticker.get('currency_pair') == 'CKB_USDT':
-                            try:
-                                price = float(ticker['last'])
-                                volume = float(ticker['quote_volume'])
-                                change = float(ticker['change_percentage'])
-                                btc_price = self.get_btc_price()
-                                
-                                if price > 0 and volume > 0 and btc_price:
-                                    market_data['ckb'] = {
-                                        'protocol': 'CKB',
-                                        'price': price,
-                                        'volume': volume / btc_price,
-                                        'change_24h': change
-                                    }
-                                    break
-                            except (ValueError, TypeError) as e:
-                                logger.error(f"Data parsing error from Gate.io for CKB: {str(e)}")
+            self.history.append_many(market_data)
         except Exception as e:
-            logger.error(f"Error fetching CKB data from Gate.io: {str(e)}")
-            
-        # Calculate overall market trend
-        changes = [data['change_24h'] for data in market_data.values() if data]
-        market_data['overall_trend'] = 'up' if sum(changes) > 0 else 'down'
+            logger.error(f"Error recording market history: {str(e)}")
             
         return market_data
 
+    @timed()
     def format_market_update(self, market_data):
         """Format market data into a tweet"""
         trend_word = "上升" if market_data.get('overall_trend') == 'up' else "下降"
         message = f"今日比特币生态市值整体{trend_word}，\n\n"
 
         # Sort assets by volume
-        sorted_assets = sorted(
-            [(k, v) for k, v in market_data.items() if k != 'overall_trend' and v and v.get('price', 0) > 0],
-            key=lambda x: x[1]['volume'] if x[1].get('volume', 0) > 0 else 0,
-            reverse=True
-        )
+        assets = {k: v for k, v in market_data.items() if k != 'overall_trend' and v and v.get('price', 0) > 0}
+        frame = TickerFrame.from_market_data(assets)
+        sorted_assets = [(frame.symbols[i], assets[frame.symbols[i]]) for i in frame.ranks('volume')]
 
         for symbol, data in sorted_assets:
             change = data['change_24h']
@@ -767,8 +827,7 @@ class MarketDataHandler:
         }
         
         # Calculate overall market trend
-        changes = [data['change_24h'] for data in mock_data.values()]
-        mock_data['overall_trend'] = 'up' if sum(changes) > 0 else 'down'
+        mock_data['overall_trend'] = TickerFrame.from_market_data(mock_data).trend()
         
         return mock_data
 
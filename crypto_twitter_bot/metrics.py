@@ -0,0 +1,215 @@
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from loguru import logger
+from .config import load_config
+
+PREFIX = "crypto_bot_"
+
+# Seconds; spans from a cache hit (~1ms) up to a slow venue near the fetch deadline
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Counters and latency histograms keyed by metric name and labels
+
+    Everything renders in the Prometheus text format, which can be served over
+    HTTP (``serve``) or written to a file (``write``) for node_exporter's
+    textfile collector.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def counter_value(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def histogram(self, name, **labels):
+        with self._lock:
+            return self._histograms.get((name, _label_key(labels)))
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block into the ``span_duration_seconds`` histogram"""
+        start = time.perf_counter()
+        outcome = 'ok'
+        try:
+            yield
+        except Exception:
+            outcome = 'error'
+            raise
+        finally:
+            self.observe('span_duration_seconds', time.perf_counter() - start, span=name, **labels)
+            self.inc('spans_total', span=name, outcome=outcome, **labels)
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+
+        seen = set()
+        for (name, labels), value in counters:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} counter")
+            lines.append(f"{PREFIX}{name}{_render_labels(labels)} {value}")
+
+        for (name, labels), histogram in histograms:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {PREFIX}{name} histogram")
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                lines.append(f"{PREFIX}{name}_bucket{_render_labels(labels + (('le', repr(float(bound))),))} {count}")
+            lines.append(f"{PREFIX}{name}_bucket{_render_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{PREFIX}{name}_sum{_render_labels(labels)} {histogram.sum}")
+            lines.append(f"{PREFIX}{name}_count{_render_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Atomically write the metrics to ``path``"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(self.render(), encoding='utf-8')
+        os.replace(tmp_path, path)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve ``/metrics`` on ``host:port`` from a daemon thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+        logger.info(f"Serving metrics on http://{host}:{self._server.server_port}/metrics")
+        return self._server.server_port
+
+    def start_export(self, path=None, port=None, interval=60):
+        """Serve metrics over HTTP if ``port`` is set and rewrite ``path`` every ``interval`` seconds if set"""
+        if port is not None:
+            self.serve(port)
+        if path:
+            def export():
+                while True:
+                    try:
+                        self.write(path)
+                    except OSError as e:
+                        logger.error(f"Error writing metrics file: {str(e)}")
+                    time.sleep(interval)
+            threading.Thread(target=export, name='metrics-file', daemon=True).start()
+
+    def shutdown(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def timed(metric='call_duration_seconds', **labels):
+    """Decorator recording each call's duration and outcome in the process-wide registry
+
+    The outcome is ``ok``, ``empty`` (the call returned None, which is how the
+    fetchers report failure), ``failed`` (the call returned False, as the
+    Twitter client does) or ``error`` (the call raised).
+    """
+    def decorate(func):
+        call_labels = {'function': func.__name__, **labels}
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            metrics = get_metrics()
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = func(*args, **kwargs)
+                if result is None:
+                    outcome = 'empty'
+                elif result is False:
+                    outcome = 'failed'
+                else:
+                    outcome = 'ok'
+                return result
+            finally:
+                metrics.observe(metric, time.perf_counter() - start, **call_labels)
+                metrics.inc('calls_total', outcome=outcome, **call_labels)
+        return wrapper
+    return decorate
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _render_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (key, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for key, value in labels
+    )
+    return '{' + ','.join(f'{key}="{value}"' for key, value in escaped) + '}'
+
+def get_metrics():
+    """Get the process-wide metrics registry"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = MetricsRegistry()
+        return _metrics
+
+def start_export():
+    """Start the exports configured in the ``metrics`` section of crypto_bot.json"""
+    settings = load_config().get('metrics', {})
+    get_metrics().start_export(settings.get('file'), settings.get('port'), settings.get('interval', 60))
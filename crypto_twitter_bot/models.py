@@ -0,0 +1,106 @@
+import math
+from array import array
+from collections.abc import Mapping
+
+class Ticker(Mapping):
+    """Market data for one asset as a fixed set of slots
+
+    Reads like the dicts the fetchers used to return: ``ticker['price']``,
+    ``ticker.get('volume', 0)`` and ``dict(ticker)`` work, and fields left at
+    None are simply absent from the mapping.
+    """
+
+    FIELDS = ('protocol', 'price', 'volume', 'change_24h', 'high_24h', 'low_24h', 'timestamp',
+              'market_strength', 'timed_out', 'source')
+    __slots__ = FIELDS
+
+    def __init__(self, price=None, volume=None, change_24h=None, protocol=None, high_24h=None, low_24h=None,
+                 timestamp=None, market_strength=None, timed_out=None, source=None):
+        self.protocol = protocol
+        self.price = price
+        self.volume = volume
+        self.change_24h = change_24h
+        self.high_24h = high_24h
+        self.low_24h = low_24h
+        self.timestamp = timestamp
+        self.market_strength = market_strength
+        self.timed_out = timed_out
+        # Name of the data source that priced it
+        self.source = source
+
+    @classmethod
+    def from_mapping(cls, data):
+        """Build a ticker from a dict, ignoring unknown keys"""
+        if isinstance(data, cls):
+            return data
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+
+    def __getitem__(self, key):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return (field for field in self.FIELDS if getattr(self, field) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Ticker({dict(self)})"
+
+class MarketSnapshot(Mapping):
+    """Latest ticker per symbol stored column-wise
+
+    Numeric fields live in one ``array('d')`` per field and each symbol owns a
+    row, so updating a symbol overwrites its row in place instead of allocating
+    a new record. Lookups return a ``Ticker`` built from the row.
+    """
+
+    NUMERIC = tuple(field for field in Ticker.FIELDS if field not in ('protocol', 'timed_out', 'source'))
+
+    def __init__(self, tickers=None):
+        self.symbols = []
+        self.protocols = []
+        self.columns = {field: array('d') for field in self.NUMERIC}
+        self._rows = {}
+        for symbol, ticker in (tickers or {}).items():
+            self.update(symbol, ticker)
+
+    def update(self, symbol, ticker):
+        """Store ``ticker`` (a Ticker or dict) as the latest row for ``symbol``"""
+        row = self._rows.get(symbol)
+        if row is None:
+            row = self._rows[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            self.protocols.append(None)
+            for column in self.columns.values():
+                column.append(math.nan)
+
+        self.protocols[row] = ticker.get('protocol')
+        for field, column in self.columns.items():
+            value = ticker.get(field)
+            column[row] = math.nan if value is None else value
+
+    def __getitem__(self, symbol):
+        row = self._rows[symbol]
+        values = {field: column[row] for field, column in self.columns.items()}
+        return Ticker(
+            protocol=self.protocols[row],
+            **{field: None if math.isnan(value) else value for field, value in values.items()}
+        )
+
+    def __iter__(self):
+        return iter(self.symbols)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self._rows
@@ -1,19 +1,90 @@
 import os
-import os
 import hmac
+import json
+import codecs
 import base64
 import time
-import requests
 import logging
 from datetime import datetime
 from zoneinfo import ZoneInfo
+from .analytics import TickerFrame
+from .logger import truncate
+from .models import Ticker
+from .transport import get_session
+
+def iter_json_array(chunks, key):
+    """Yield the items of the ``key`` array in a JSON document read from byte ``chunks``
+
+    Items are decoded one at a time as soon as they are complete, so the whole
+    document is never held in memory. Stopping iteration early stops reading.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    marker = f'"{key}"'
+    buffer = ''
+    in_array = False
+
+    for chunk in chunks:
+        buffer += text.decode(chunk)
+        pos = 0
+
+        if not in_array:
+            start = buffer.find(marker)
+            bracket = buffer.find('[', start + len(marker)) if start != -1 else -1
+            if bracket == -1:
+                # Keep enough of the tail to match a marker split across chunks
+                buffer = buffer[start:] if start != -1 else buffer[-len(marker):]
+                continue
+            in_array = True
+            pos = bracket + 1
+
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                item, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                # Item is incomplete; wait for the next chunk
+                break
+            yield item
+
+        buffer = buffer[pos:]
+
+    raise ValueError(f"JSON array '{key}' is missing or truncated")
+
+def parse_ticker(ticker):
+    """Build the market data entry for one OKX ticker
+
+    Scalar twin of ``TickerFrame.from_okx(...).records()`` for the stream, which
+    parses one pushed ticker at a time. Raises ValueError, TypeError or
+    KeyError on a malformed ticker.
+    """
+    price = float(ticker['last'])
+    high = float(ticker['high24h'])
+    low = float(ticker['low24h'])
+    spread = high - low
+    return Ticker(
+        price=price,
+        change_24h=float(ticker['vol24h']),
+        volume=float(ticker['volCcy24h']),
+        high_24h=high,
+        low_24h=low,
+        timestamp=time.time(),
+        # Market strength indicator
+        market_strength=(price - low) / (spread if spread != 0 else 1) * 100
+    )
 
 class OKXHandler:
-    def __init__(self, api_key=None, api_secret=None, passphrase=None):
+    def __init__(self, api_key=None, api_secret=None, passphrase=None, stream=None, session=None):
         self.api_key = api_key or os.getenv('OKX_API_KEY')
         self.api_secret = api_secret or os.getenv('OKX_SECRET_KEY')
         self.passphrase = passphrase or os.getenv('OKX_PASSPHRASE')
         self.base_url = "https://www.okx.com"
+        self.session = session or get_session()
+        # Optional OKXTickerStream; when live it answers instead of REST polling
+        self.stream = stream
 
     def _get_timestamp(self):
         """Get ISO 8601 timestamp"""
@@ -39,46 +110,47 @@ class OKXHandler:
             'Content-Type': 'application/json'
         }
 
-    def get_market_data(self, pairs):
+    def get_market_data(self, pairs=None):
+        """Market data for the given SPOT pairs, or the whole SPOT universe when None"""
+        if pairs is not None and self.stream and self.stream.has_all(pairs):
+            return self.stream.get_market_data(pairs)
+
         endpoint = '/api/v5/market/tickers'
         params = {'instType': 'SPOT'}
         headers = self._get_headers('GET', endpoint)
         logging.debug(f"Fetching OKX market data for pairs: {pairs}")
         
-        response = requests.get(
+        response = self.session.get(
             f"{self.base_url}{endpoint}",
             params=params,
-            headers=headers
+            headers=headers,
+            stream=True
         )
         
-        if response.status_code != 200:
-            logging.error(f"Error fetching OKX data: {response.status_code} - {response.text}")
-            raise Exception(f"Error fetching OKX data: {response.text}")
-        logging.debug(f"OKX API response: {response.text}")
-            
-        data = response.json()
-        market_data = {}
-        
-        for ticker in data['data']:
-            inst_id = ticker['instId']
-            if inst_id in pairs:
-                market_data[inst_id] = {
-                    'price': float(ticker['last']),
-                    'change_24h': float(ticker['vol24h']),
-                    'volume': float(ticker['volCcy24h']),
-                    'high_24h': float(ticker['high24h']),
-                    'low_24h': float(ticker['low24h']),
-                    'timestamp': time.time()
-                }
-                
-                # Calculate market strength indicator
-                price = float(ticker['last'])
-                high = float(ticker['high24h'])
-                low = float(ticker['low24h'])
-                market_data[inst_id]['market_strength'] = (
-                    ((price - low) / (high - low if high != low else 1)) * 100
-                )
-        
+        try:
+            if response.status_code != 200:
+                # Error pages can be large; keep the log line and exception bounded
+                body = truncate(response.text)
+                logging.error(f"Error fetching OKX data: {response.status_code} - {body}")
+                raise Exception(f"Error fetching OKX data: {body}")
+
+            # Parse the SPOT ticker list as it streams in, keeping only the requested
+            # pairs (all of them when pairs is None) and stopping as soon as all of
+            # them have been seen
+            wanted = set(pairs) if pairs is not None else None
+            tickers = {}
+            for ticker in iter_json_array(response.iter_content(chunk_size=65536), 'data'):
+                inst_id = ticker.get('instId')
+                if wanted is None or inst_id in wanted:
+                    tickers[inst_id] = ticker
+                    if wanted is not None and len(tickers) == len(wanted):
+                        break
+        finally:
+            response.close()
+
+        # Derive every entry, market strength included, in one pass over the columns
+        market_data = TickerFrame.from_okx(list(tickers.values())).records()
+        logging.debug(f"Parsed {len(market_data)} of {len(wanted) if wanted is not None else 'all'} requested OKX tickers")
         return market_data
 
     def handle_action(self, action, context):
@@ -0,0 +1,132 @@
+import asyncio
+import json
+import logging
+import threading
+import websockets
+from .models import MarketSnapshot
+from .okx_handler import parse_ticker
+
+PUBLIC_WS_URL = "wss://ws.okx.com:8443/ws/v5/public"
+
+class OKXTickerStream:
+    """Long-lived subscription to the OKX tickers channel
+
+    A background thread keeps a WebSocket open, subscribes to the ticker channel
+    of every pair, and keeps an in-memory snapshot in the same shape as
+    ``OKXHandler.get_market_data``. Dropped connections are re-established with
+    exponential backoff and the pairs are subscribed again.
+    """
+
+    def __init__(self, pairs, url=PUBLIC_WS_URL, ping_interval=25, reconnect_delay=1, max_reconnect_delay=60):
+        self.pairs = list(pairs)
+        self.url = url
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.connected = threading.Event()
+        self._snapshot = MarketSnapshot()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._loop = None
+        self._ws = None
+        self._stopping = False
+
+    def start(self):
+        """Start the subscription in a background thread"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run_loop, name='okx-ticker-stream', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """Close the connection and stop the background thread"""
+        self._stopping = True
+        if self._loop and self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close(), self._loop)
+        if self._thread:
+            self._thread.join(timeout)
+        self.connected.clear()
+
+    def has_all(self, pairs):
+        """Whether the stream is live and holds a ticker for every pair"""
+        if not self.connected.is_set():
+            return False
+        with self._lock:
+            return all(pair in self._snapshot for pair in pairs)
+
+    def get_market_data(self, pairs=None):
+        """Get the latest snapshot for ``pairs`` (all subscribed pairs by default)"""
+        with self._lock:
+            if pairs is None:
+                pairs = self._snapshot.symbols
+            return {pair: self._snapshot[pair] for pair in pairs if pair in self._snapshot}
+
+    def _run_loop(self):
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._loop.run_until_complete(self._run())
+        finally:
+            self._loop.close()
+
+    async def _run(self):
+        delay = self.reconnect_delay
+        while not self._stopping:
+            try:
+                async with websockets.connect(self.url, ping_interval=None) as ws:
+                    self._ws = ws
+                    await self._subscribe(ws)
+                    delay = self.reconnect_delay
+                    await self._consume(ws)
+            except Exception as e:
+                if not self._stopping:
+                    logging.error(f"OKX ticker stream disconnected: {str(e)}")
+            finally:
+                self._ws = None
+                self.connected.clear()
+
+            if not self._stopping:
+                logging.info(f"Reconnecting OKX ticker stream in {delay}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def _close(self):
+        if self._ws is not None:
+            await self._ws.close()
+
+    async def _subscribe(self, ws):
+        args = [{'channel': 'tickers', 'instId': pair} for pair in self.pairs]
+        await ws.send(json.dumps({'op': 'subscribe', 'args': args}))
+        logging.debug(f"Subscribed to OKX tickers for {self.pairs}")
+
+    async def _consume(self, ws):
+        while True:
+            try:
+                message = await asyncio.wait_for(ws.recv(), self.ping_interval)
+            except asyncio.TimeoutError:
+                # OKX drops connections that stay silent for 30s
+                await ws.send('ping')
+                continue
+
+            if message == 'pong':
+                continue
+            self._handle(json.loads(message))
+
+    def _handle(self, message):
+        if message.get('event') == 'error':
+            logging.error(f"OKX ticker stream error: {message.get('msg')}")
+            return
+        if message.get('event') == 'subscribe':
+            self.connected.set()
+            return
+        if message.get('arg', {}).get('channel') != 'tickers':
+            return
+
+        for ticker in message.get('data', []):
+            try:
+                entry = parse_ticker(ticker)
+            except (KeyError, ValueError, TypeError) as e:
+                logging.error(f"Error parsing OKX ticker push: {str(e)}")
+                continue
+            with self._lock:
+                self._snapshot.update(ticker['instId'], entry)
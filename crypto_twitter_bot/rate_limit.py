@@ -0,0 +1,142 @@
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from loguru import logger
+from .config import load_config
+
+# Rate for hosts that have no configured limit but must honour a backoff
+UNPACED_RATE = 1000
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second, holding at most ``burst``
+
+    Callers queue in arrival order, so concurrent fetchers are served fairly and
+    together never exceed the configured rate. ``penalize`` blocks the bucket
+    entirely for a while, e.g. after the venue answered 429.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.blocked_until = 0.0
+        self._updated = time.monotonic()
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Take one token, waiting in line for it; False if ``timeout`` passes first
+
+        Returns False at once when the bucket is blocked past the timeout, as no
+        amount of waiting could succeed.
+        """
+        ticket = object()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._cond:
+            self._queue.append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if deadline is not None and self.blocked_until > deadline:
+                        return False
+                    self._refill(now)
+                    wait = None
+                    if self._queue[0] is ticket:
+                        if now >= self.blocked_until and self.tokens >= 1:
+                            self.tokens -= 1
+                            return True
+                        wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            return False
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            finally:
+                self._queue.remove(ticket)
+                self._cond.notify_all()
+
+    def penalize(self, delay):
+        """Refuse all tokens for the next ``delay`` seconds"""
+        with self._cond:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self._cond.notify_all()
+
+class RateLimiter:
+    """Token bucket per host with adaptive backoff after 429 responses
+
+    ``hosts`` maps a host name to ``{"rate": ..., "burst": ...}``; hosts without
+    an entry are not paced. Each consecutive 429 from a host doubles its backoff
+    (with full jitter) unless the response carries ``Retry-After``.
+    """
+
+    def __init__(self, hosts=None, max_retries=2, backoff_base=1.0, max_backoff=30):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self._buckets = {
+            host: TokenBucket(limit['rate'], limit.get('burst', 1))
+            for host, limit in (hosts or {}).items()
+        }
+        self._strikes = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, host, timeout=None):
+        """Wait for the host's next request slot; True right away for unpaced hosts"""
+        bucket = self._buckets.get(host)
+        return bucket.acquire(timeout) if bucket else True
+
+    def backoff(self, host, retry_after=None):
+        """Record a 429 from ``host`` and return how long to back off in seconds"""
+        with self._lock:
+            strikes = self._strikes.get(host, 0) + 1
+            self._strikes[host] = strikes
+
+        delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** strikes))
+        delay = min(delay, self.max_backoff)
+
+        with self._lock:
+            # Unpaced hosts get an effectively unlimited bucket so the backoff still applies
+            bucket = self._buckets.setdefault(host, TokenBucket(UNPACED_RATE, UNPACED_RATE))
+        bucket.penalize(delay)
+        logger.warning(f"Rate limited by {host}, backing off {delay:.1f}s (strike {strikes})")
+        return delay
+
+    def reset(self, host):
+        """Forget earlier 429s after a successful response"""
+        with self._lock:
+            self._strikes.pop(host, None)
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def get_rate_limiter():
+    """Get the process-wide rate limiter configured from crypto_bot.json"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter(**load_config().get('rate_limits', {}))
+        return _limiter
@@ -0,0 +1,141 @@
+import threading
+import time
+from collections.abc import Mapping
+from loguru import logger
+from .config import load_config
+from .market_data_handler import MarketDataHandler
+from .okx_handler import OKXHandler
+from .okx_stream import OKXTickerStream
+
+class SnapshotStore:
+    """Latest market data per source, shared between the refresher and its readers"""
+
+    def __init__(self):
+        self._snapshots = {}
+        self._lock = threading.Lock()
+
+    def put(self, name, data, timestamp=None):
+        with self._lock:
+            self._snapshots[name] = (data, timestamp if timestamp is not None else time.time())
+
+    def get(self, name, max_age=None):
+        """The stored data for ``name``, or None if missing or older than ``max_age`` seconds"""
+        with self._lock:
+            data, fetched_at = self._snapshots.get(name, (None, 0.0))
+        if data is None or (max_age is not None and time.time() - fetched_at > max_age):
+            return None
+        return data
+
+    def age(self, name):
+        """Seconds since ``name`` was stored, or None"""
+        with self._lock:
+            if name not in self._snapshots:
+                return None
+            return time.time() - self._snapshots[name][1]
+
+# Scheduled refreshes are skipped while the snapshot is younger than this
+# fraction of the interval; the margin absorbs scheduler jitter
+FRESH_FRACTION = 0.9
+
+class MarketDataRefresher:
+    """Poll each scheduled data source at its own interval into a SnapshotStore
+
+    Sources are ``okx`` (``data_sources.okx.pairs``) and ``bitcoin_ecosystem``
+    (``get_all_market_data`` every ``update_interval`` seconds). Only the
+    sources in ``scheduled`` are polled; ``okx`` has no scheduled reader and is
+    fetched on demand by ``latest``. Readers take the latest snapshot instead
+    of fetching; a reader that arrives during a refresh waits for it rather
+    than starting another. With ``data_sources.okx.mode`` set to
+    ``"websocket"`` an OKXTickerStream, run between ``start`` and ``stop``,
+    subscribes to the OKX pairs and to the pairs the market data cycle reads,
+    and both read from it; REST is only used for pairs the stream does not
+    hold, such as while it is down.
+    """
+
+    scheduled = ('bitcoin_ecosystem',)
+
+    def __init__(self, store=None, handler=None, okx_handler=None, config=None):
+        self.config = config if config is not None else load_config()
+        self.store = store or SnapshotStore()
+        self.handler = handler or MarketDataHandler(config=self.config)
+        settings = self.config.get('data_sources', {})
+        self.stream = None
+        if okx_handler is None and settings.get('okx', {}).get('mode', 'rest') == 'websocket':
+            pairs = list(settings.get('okx', {}).get('pairs', []))
+            pairs += [pair for pair in self.handler.okx_pairs() if pair not in pairs]
+            self.stream = OKXTickerStream(pairs)
+            self.handler.okx_stream = self.stream
+        self.okx_handler = okx_handler or OKXHandler(stream=self.stream)
+        self.sources = {
+            'okx': (
+                settings.get('okx', {}).get('interval', 300),
+                lambda: self.okx_handler.get_market_data(settings.get('okx', {}).get('pairs', []))
+            ),
+            'bitcoin_ecosystem': (
+                settings.get('bitcoin_ecosystem', {}).get('update_interval', 86400),
+                self.handler.get_all_market_data
+            )
+        }
+        self._locks = {name: threading.Lock() for name in self.sources}
+
+    def start(self):
+        """Start the OKX ticker stream, if one is configured"""
+        if self.stream is not None:
+            self.stream.start()
+            logger.info(f"Started OKX ticker stream for {len(self.stream.pairs)} pairs")
+
+    def stop(self):
+        """Stop the OKX ticker stream and close its connection"""
+        if self.stream is not None:
+            self.stream.stop()
+
+    def refresh(self, name, max_age=None):
+        """Fetch ``name`` and store it; the previous snapshot is kept on failure
+
+        With ``max_age``, a snapshot younger than that many seconds (possibly
+        stored by a refresh this call waited for) is returned without fetching.
+        """
+        _, fetch = self.sources[name]
+        with self._locks[name]:
+            if max_age is not None:
+                data = self.store.get(name, max_age)
+                if data is not None:
+                    logger.debug(f"Skipping refresh of {name} market data, snapshot is still fresh")
+                    return data
+            start = time.monotonic()
+            try:
+                data = fetch()
+            except Exception as e:
+                logger.error(f"Error refreshing {name} market data: {str(e)}")
+                return None
+            if not has_prices(data):
+                # A cycle where every source failed still carries the trend marker
+                logger.warning(f"Refresh of {name} market data priced nothing, keeping previous snapshot")
+                return None
+            self.store.put(name, data)
+            logger.info(f"Refreshed {name} market data in {time.monotonic() - start:.1f}s")
+            return data
+
+    def latest(self, name, max_age=None, max_stale=None):
+        """The latest snapshot of ``name``, refreshing first if none is younger than ``max_age``
+
+        A fresh snapshot is read without taking the refresh lock. If that
+        refresh fails, the older snapshot is returned as long as it is younger
+        than ``max_stale`` seconds (any age when None); otherwise None.
+        """
+        data = self.store.get(name, max_age)
+        if data is None:
+            data = self.refresh(name, max_age if max_age is not None else float('inf')) or self.store.get(name, max_stale)
+        return data
+
+    def schedule(self, scheduler):
+        """Add an immediate and then a periodic refresh job per scheduled source to ``scheduler``"""
+        for name in self.scheduled:
+            interval, _ = self.sources[name]
+            job = lambda name=name, interval=interval: self.refresh(name, max_age=interval * FRESH_FRACTION)
+            scheduler.schedule(scheduler.clock(), job, name=f"refresh_{name}_initial")
+            scheduler.every(interval, job, name=f"refresh_{name}")
+
+def has_prices(data):
+    """Whether ``data`` holds at least one priced entry"""
+    return bool(data) and any(isinstance(entry, Mapping) and entry.get('price') for entry in data.values())
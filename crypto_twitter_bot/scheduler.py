@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from datetime import time as wall_time
+from loguru import logger
+
+class Scheduler:
+    """Timer loop that sleeps until the next job is due
+
+    Jobs are kept in a heap ordered by due time. The loop waits exactly until the
+    earliest one is due (or until a new job is scheduled) and hands it to a worker
+    thread, so a long-running job never delays the next deadline. Repeating jobs
+    fire on wall-clock slots aligned to their interval, or on the times a
+    callable interval gives.
+    """
+
+    def __init__(self, max_workers=4, clock=time.time):
+        self.clock = clock
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._heap = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def schedule(self, due, job, name=None, interval=None):
+        """Run ``job`` at epoch time ``due``, then every ``interval`` seconds if given
+
+        ``interval`` may instead be a callable mapping the current time to the
+        next due time.
+        """
+        with self._lock:
+            heapq.heappush(self._heap, (due, next(self._counter), name or job.__name__, job, interval))
+        self._wake.set()
+
+    def every(self, interval, job, name=None, offset=0):
+        """Run ``job`` on every multiple of ``interval`` since the epoch, shifted by ``offset`` seconds
+
+        A negative offset runs the job that long before each slot.
+        """
+        self.schedule(next_slot(self.clock(), interval, offset), job, name, interval)
+
+    def daily(self, at, job, name=None, offset=0):
+        """Run ``job`` every day at local ``HH:MM`` time, shifted by ``offset`` seconds
+
+        Each run is placed on the local calendar, so the job keeps its wall-clock
+        time across DST changes.
+        """
+        following = lambda now: next_daily(now, at, offset)
+        self.schedule(following(self.clock()), job, name, following)
+
+    def next_run(self, name):
+        """Epoch time of the next run of the named job, or None"""
+        with self._lock:
+            return min((due for due, _, job_name, _, _ in self._heap if job_name == name), default=None)
+
+    def run(self):
+        """Run due jobs until ``stop`` is called"""
+        while not self._stopping:
+            with self._lock:
+                due = self._heap[0][0] if self._heap else None
+
+            timeout = None if due is None else max(0, due - self.clock())
+            if timeout is None or timeout > 0:
+                # Woken early by a new job or stop(); re-check the heap
+                if self._wake.wait(timeout):
+                    self._wake.clear()
+                    continue
+
+            with self._lock:
+                if not self._heap or self._heap[0][0] > self.clock():
+                    continue
+                due, _, name, job, interval = heapq.heappop(self._heap)
+                if callable(interval):
+                    following = interval(max(due, self.clock()))
+                elif interval:
+                    # Skip slots missed while the process was suspended
+                    following = next_slot(max(due, self.clock()), interval, due % interval)
+                if interval:
+                    heapq.heappush(self._heap, (following, next(self._counter), name, job, interval))
+
+            logger.debug(f"Running {name} ({self.clock() - due:.3f}s after its slot)")
+            self._executor.submit(self._call, name, job)
+
+    def start(self):
+        """Run the loop in a background daemon thread"""
+        self._stopping = False
+        self._thread = threading.Thread(target=self.run, name='scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=False):
+        """Stop the loop; with ``wait``, also wait for running jobs to finish"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+
+    @staticmethod
+    def _call(name, job):
+        try:
+            job()
+        except Exception as e:
+            logger.error(f"Scheduled job {name} failed: {str(e)}")
+
+def next_slot(now, interval, offset=0):
+    """First time after ``now`` that is a multiple of ``interval`` shifted by ``offset``"""
+    return (math.floor((now - offset) / interval) + 1) * interval + offset
+
+def next_daily(now, at, offset=0):
+    """First time after ``now`` that is local ``HH:MM`` on some day, shifted by ``offset`` seconds"""
+    hours, minutes = (int(part) for part in at.split(':'))
+    day = datetime.fromtimestamp(now).date() - timedelta(days=1)
+    while True:
+        # A naive datetime converts at the UTC offset in force on that day
+        due = datetime.combine(day, wall_time(hours, minutes)).timestamp() + offset
+        if due > now:
+            return due
+        day += timedelta(days=1)
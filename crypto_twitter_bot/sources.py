@@ -0,0 +1,149 @@
+from collections import OrderedDict
+from loguru import logger
+from .config import load_token_list
+
+class SourceAdapter:
+    """A market data source and the tokens it can serve
+
+    ``fetch`` is called as ``fetch(handler, symbol)`` and returns a
+    ``{price, volume, change_24h}`` dict or None. ``host`` is the API host whose
+    health decides where the adapter ranks among a token's fallbacks; an adapter
+    that falls back to other hosts itself lists them in ``fallback_hosts`` and
+    stays usable while any of its hosts is. ``symbols`` and ``protocols``
+    restrict coverage (``None`` means any); ``batched`` adapters read from a bulk
+    per-venue index, so any number of their tokens costs one request.
+    """
+
+    def __init__(self, name, venue, fetch, host=None, symbols=None, protocols=None,
+                 capabilities=('price', 'volume', 'change_24h'), priority=100, batched=False, fallback_hosts=()):
+        self.name = name
+        self.venue = venue
+        self.fetch = fetch
+        self.host = host
+        self.hosts = (host,) + tuple(fallback_hosts)
+        self.symbols = set(symbols) if symbols is not None else None
+        self.protocols = set(protocols) if protocols is not None else None
+        self.capabilities = frozenset(capabilities)
+        self.priority = priority
+        self.batched = batched
+
+    def covers(self, symbol, protocol=None):
+        """Whether this adapter can serve ``symbol`` of the given ``protocol``"""
+        if self.symbols is not None and symbol.upper() not in self.symbols:
+            return False
+        if self.protocols is not None and protocol not in self.protocols:
+            return False
+        return True
+
+    def __repr__(self):
+        return f"SourceAdapter({self.name!r})"
+
+class SourceRegistry:
+    """Registry of every known market data source"""
+
+    def __init__(self):
+        self._adapters = OrderedDict()
+
+    def register(self, adapter):
+        self._adapters[adapter.name] = adapter
+        return adapter
+
+    def get(self, name):
+        return self._adapters.get(name)
+
+    def adapters_for(self, symbol, protocol=None, capability='price'):
+        """All adapters covering ``symbol``, best priority first"""
+        adapters = [
+            adapter for adapter in self._adapters.values()
+            if adapter.covers(symbol, protocol) and capability in adapter.capabilities
+        ]
+        return sorted(adapters, key=lambda adapter: adapter.priority)
+
+class PlanEntry:
+    """The sources to try, in order, for one token"""
+
+    def __init__(self, token, protocol, sources):
+        self.token = token
+        self.protocol = protocol
+        self.sources = sources
+
+    def __repr__(self):
+        return f"PlanEntry({self.token!r}, {self.protocol!r}, {[s.name for s in self.sources]})"
+
+class FetchPlan(list):
+    """Ordered list of PlanEntry items"""
+
+    def by_venue(self):
+        """Group tokens by the venue of their primary source"""
+        venues = OrderedDict()
+        for entry in self:
+            if entry.sources:
+                venues.setdefault(entry.sources[0].venue, []).append(entry.token)
+        return venues
+
+class FetchPlanner:
+    """Build a fetch plan for the configured tokens from a source registry
+
+    Tokens come from ``data_sources.bitcoin_ecosystem.tokens`` in crypto_bot.json,
+    or from token_list.txt when the config has none. A token's protocol comes from
+    ``protocols`` in the same section (defaulting to the symbol itself) and its
+    sources from ``sources``; tokens without a configured source list use every
+    covering adapter by priority, up to ``max_sources``.
+    """
+
+    def __init__(self, registry, config=None, max_sources=3):
+        self.registry = registry
+        self.settings = (config or {}).get('data_sources', {}).get('bitcoin_ecosystem', {})
+        self.max_sources = max_sources
+
+    def tokens(self):
+        return self.settings.get('tokens') or load_token_list()
+
+    def build(self, tokens=None):
+        plan = FetchPlan()
+        protocols = self.settings.get('protocols', {})
+        preferred = self.settings.get('sources', {})
+
+        for token in tokens or self.tokens():
+            symbol = token.upper()
+            protocol = protocols.get(symbol, symbol)
+
+            if symbol in preferred:
+                sources = []
+                for name in preferred[symbol]:
+                    adapter = self.registry.get(name)
+                    if adapter is None:
+                        logger.warning(f"Unknown data source {name} configured for {symbol}")
+                        continue
+                    sources.append(adapter)
+            else:
+                sources = self.registry.adapters_for(symbol, protocol)[:self.max_sources]
+
+            if not sources:
+                logger.warning(f"No data source covers {symbol}")
+            plan.append(PlanEntry(symbol, protocol, sources))
+
+        return plan
+
+def default_registry():
+    """Registry with every source MarketDataHandler can query"""
+    registry = SourceRegistry()
+    registry.register(SourceAdapter('okx', 'okx', lambda h, s: h.get_okx_data(s),
+                                    host='www.okx.com', priority=10, batched=True))
+    registry.register(SourceAdapter('unisat', 'unisat', lambda h, s: h.get_unisat_data(s),
+                                    host='open-api.unisat.io', protocols={'BRC20'}, priority=15))
+    registry.register(SourceAdapter('cat20', 'unisat', lambda h, s: h.get_cat20_data(s),
+                                    host='open-api.unisat.io', protocols={'CAT20'}, priority=15))
+    registry.register(SourceAdapter('gateio', 'gateio', lambda h, s: h.get_gateio_data(s),
+                                    host='api.gateio.ws', priority=20, batched=True))
+    registry.register(SourceAdapter('magiceden', 'magiceden', lambda h, s: h.get_magiceden_data(s),
+                                    host='api-mainnet.magiceden.dev', protocols={'Runes'}, priority=25,
+                                    batched=True))
+    registry.register(SourceAdapter('kucoin', 'kucoin', lambda h, s: h.get_kucoin_data(s),
+                                    host='api.kucoin.com', priority=30, batched=True))
+    registry.register(SourceAdapter('binance', 'binance', lambda h, s: h.get_binance_data(s),
+                                    host='api.binance.com', priority=40))
+    registry.register(SourceAdapter('coingecko', 'coingecko', lambda h, s: h.get_coingecko_data(s),
+                                    host='pro-api.coingecko.com', priority=50,
+                                    fallback_hosts=('api.coingecko.com',)))
+    return registry
@@ -0,0 +1,99 @@
+from loguru import logger
+from .cache import TTLCache
+
+# Bulk ticker endpoint per venue: where the ticker list lives in the response,
+# which field identifies the symbol and, optionally, how symbols are normalized
+VENUES = {
+    'okx': {
+        'url': "https://www.okx.com/api/v5/market/tickers",
+        'params': {'instType': 'SPOT'},
+        'extract': lambda data: data['data'] if data.get('code') == '0' else None,
+        'key': 'instId'
+    },
+    'gateio': {
+        'url': "https://api.gateio.ws/api/v4/spot/tickers",
+        'params': {},
+        'extract': lambda data: data if isinstance(data, list) else None,
+        'key': 'currency_pair'
+    },
+    # Gate.io's market directory, the last resort when tickers and candles fail
+    'gateio_markets': {
+        'url': "https://api.gateio.ws/api/v4/spot/markets",
+        'params': {},
+        'extract': lambda data: data if isinstance(data, list) else None,
+        'key': 'id'
+    },
+    'kucoin': {
+        'url': "https://api.kucoin.com/api/v1/market/allTickers",
+        'params': {},
+        'extract': lambda data: data['data']['ticker'] if data.get('code') == '200000' else None,
+        'key': 'symbol'
+    },
+    'magiceden': {
+        'url': "https://api-mainnet.magiceden.dev/v2/ord/btc/runes/stats",
+        'params': {},
+        'extract': lambda data: data if isinstance(data, list) else None,
+        'key': 'symbol',
+        # Rune symbols are matched case-insensitively
+        'fold': str.casefold
+    }
+}
+
+class TickerIndex:
+    """Per-venue index of tickers built from one bulk request per venue
+
+    The first lookup for a venue downloads its full ticker list and indexes it
+    by symbol; every other lookup within ``ttl`` seconds is served from that
+    index, so requests per cycle do not grow with the number of tracked tokens.
+    Refreshes are conditional requests: when the venue answers 304 Not Modified
+    to the previous ETag or Last-Modified, the existing index is kept without
+    downloading or parsing the list again.
+    """
+
+    def __init__(self, session, ttl=30):
+        self.session = session
+        self._indexes = TTLCache(ttl=ttl, name='ticker_index')
+        self._validators = {}
+
+    def get(self, venue, symbol):
+        """Get the raw ticker for ``symbol`` on ``venue``, or None if it is not listed"""
+        index = self.index(venue)
+        if index is None:
+            return None
+        fold = VENUES[venue].get('fold')
+        return index.get(fold(symbol) if fold else symbol)
+
+    def index(self, venue):
+        """Get the symbol-keyed ticker index for ``venue``"""
+        return self._indexes.get(venue, lambda: self._fetch_index(venue))
+
+    def _fetch_index(self, venue):
+        spec = VENUES[venue]
+        etag, last_modified, previous = self._validators.get(venue, (None, None, None))
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        try:
+            response = self.session.get(spec['url'], params=spec['params'], headers=headers, timeout=10)
+            if response.status_code == 304 and previous is not None:
+                logger.debug(f"{venue} tickers not modified, keeping {len(previous)} indexed")
+                return previous
+            response.raise_for_status()
+            tickers = spec['extract'](response.json())
+            if tickers is None:
+                logger.warning(f"Unexpected bulk ticker response from {venue}")
+                return None
+
+            key, fold = spec['key'], spec.get('fold')
+            index = {
+                fold(ticker[key]) if fold else ticker[key]: ticker
+                for ticker in tickers if ticker.get(key) is not None
+            }
+            self._validators[venue] = (response.headers.get('ETag'), response.headers.get('Last-Modified'), index)
+            logger.debug(f"Indexed {len(index)} {venue} tickers")
+            return index
+        except Exception as e:
+            logger.error(f"Error fetching bulk tickers from {venue}: {str(e)}")
+            return None
@@ -0,0 +1,117 @@
+import threading
+import time
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from .config import load_config
+from .health import get_health
+from .metrics import get_metrics
+from .rate_limit import get_rate_limiter
+
+DEFAULT_TIMEOUT = 10
+DEFAULT_POOL_SIZE = 4
+
+# Add headers to avoid API blocks
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    'Accept': 'application/json'
+}
+
+# Responses that count against a source's health; 404 is a valid "not listed" answer
+FAILURE_STATUS_CODES = {403, 429}
+
+_session = None
+_session_lock = threading.Lock()
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+class RateLimitTimeout(requests.exceptions.Timeout):
+    """Raised when no request slot for a host frees up within the timeout"""
+
+class PooledSession(requests.Session):
+    """HTTP session with a keep-alive connection pool per host and a timeout on every request
+
+    Each host in ``pool_sizes`` gets its own adapter holding up to that many
+    persistent connections; other hosts share ``default_pool_size``. Requests
+    without an explicit timeout use ``timeout`` seconds. With a ``health``
+    registry, every response feeds the host's circuit breaker and requests to a
+    host whose circuit is open fail immediately with CircuitOpenError. With a
+    ``rate_limiter``, requests wait for the host's token bucket and a 429 is
+    retried after an adaptive backoff.
+    """
+
+    def __init__(self, pool_sizes=None, default_pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT,
+                 health=None, rate_limiter=None):
+        super().__init__()
+        self.timeout = timeout
+        self.health = health
+        self.rate_limiter = rate_limiter
+        self.headers.update(DEFAULT_HEADERS)
+
+        self.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=default_pool_size))
+        self.mount('http://', HTTPAdapter(pool_connections=16, pool_maxsize=default_pool_size))
+        for host, size in (pool_sizes or {}).items():
+            self.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=size))
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        host = urlsplit(url).hostname
+        if self.rate_limiter is None:
+            return self._send(method, url, host, **kwargs)
+
+        response = None
+        for attempt in range(self.rate_limiter.max_retries + 1):
+            if not self.rate_limiter.acquire(host, self.timeout):
+                if response is not None:
+                    # The backoff outlasts the timeout; the caller gets the 429 itself
+                    return response
+                raise RateLimitTimeout(f"No request slot for {host} within {self.timeout}s")
+
+            response = self._send(method, url, host, **kwargs)
+            if response.status_code != 429:
+                self.rate_limiter.reset(host)
+                return response
+            if attempt == self.rate_limiter.max_retries:
+                return response
+
+            # The backoff blocks the host's bucket, so the retry waits in acquire
+            get_metrics().inc('http_retries_total', host=host)
+            self.rate_limiter.backoff(host, response.headers.get('Retry-After'))
+            response.close()
+
+    def _send(self, method, url, host, **kwargs):
+        if self.health is None:
+            return super().request(method, url, **kwargs)
+
+        if not self.health.allow(host):
+            get_metrics().inc('circuit_rejections_total', host=host)
+            raise CircuitOpenError(f"Circuit open for {host}, skipping request")
+
+        start = time.monotonic()
+        # Timeouts and connection errors are timed too, as outcome="error"
+        outcome = 'error'
+        try:
+            response = super().request(method, url, **kwargs)
+            failed = response.status_code >= 500 or response.status_code in FAILURE_STATUS_CODES
+            outcome = 'failed' if failed else 'ok'
+            return response
+        finally:
+            self.health.record(host, outcome == 'ok', time.monotonic() - start)
+            get_metrics().observe('http_request_duration_seconds', time.monotonic() - start, host=host, outcome=outcome)
+
+def get_session():
+    """Get the process-wide pooled session configured from crypto_bot.json"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            settings = load_config().get('transport', {})
+            _session = PooledSession(
+                pool_sizes=settings.get('pool_sizes'),
+                default_pool_size=settings.get('default_pool_size', DEFAULT_POOL_SIZE),
+                timeout=settings.get('timeout', DEFAULT_TIMEOUT),
+                health=get_health(),
+                rate_limiter=get_rate_limiter()
+            )
+        return _session
@@ -0,0 +1,239 @@
+import hashlib
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from loguru import logger
+from .config import load_config
+from .tweet_text import split_thread
+
+DEFAULT_QUEUE_PATH = "data/tweet_queue.db"
+DAY = 86400
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+class TweetQueue:
+    """Durable SQLite outbox of tweets
+
+    Each tweet is keyed by the SHA-256 of its content, so queueing the same text
+    again (for example after a restart) is a no-op. Failed posts are retried
+    with exponential backoff up to ``max_attempts`` times. Posts are paced to at
+    least ``min_interval`` seconds apart and at most ``max_per_day`` per 24 hours.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH, max_attempts=5, backoff_base=60, max_backoff=3600,
+                 min_interval=60, max_per_day=50, retention=30 * DAY):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.min_interval = min_interval
+        self.max_per_day = max_per_day
+        self.retention = retention
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS tweets ("
+                " hash TEXT PRIMARY KEY, content TEXT NOT NULL, status TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0, next_attempt REAL NOT NULL, created REAL NOT NULL,"
+                " sent_at REAL, last_error TEXT, parts_sent INTEGER NOT NULL DEFAULT 0, last_tweet_id TEXT)"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tweets)")}
+            # Queues created before threads were supported lack the progress columns
+            if 'parts_sent' not in columns:
+                self._conn.execute("ALTER TABLE tweets ADD COLUMN parts_sent INTEGER NOT NULL DEFAULT 0")
+                self._conn.execute("ALTER TABLE tweets ADD COLUMN last_tweet_id TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS tweets_status ON tweets (status, next_attempt)")
+
+    def enqueue(self, content, timestamp=None):
+        """Queue ``content``; False if the same content was already queued or sent"""
+        now = timestamp if timestamp is not None else time.time()
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tweets WHERE status != 'pending' AND created < ?", (now - self.retention,))
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO tweets (hash, content, next_attempt, created) VALUES (?, ?, ?, ?)",
+                (digest, content, now, now)
+            )
+        if not cursor.rowcount:
+            logger.info(f"Skipping duplicate tweet {digest[:12]}")
+        return bool(cursor.rowcount)
+
+    def next_due(self):
+        """The oldest pending tweet as ``(hash, content, parts_sent, last_tweet_id)``, or None"""
+        rows = self._query(
+            "SELECT hash, content, parts_sent, last_tweet_id FROM tweets WHERE status = 'pending'"
+            " ORDER BY next_attempt, created LIMIT 1", ()
+        )
+        return rows[0] if rows else None
+
+    def mark_progress(self, digest, tweet_id):
+        """Record that one more part of a thread was posted as ``tweet_id``"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tweets SET parts_sent = parts_sent + 1, last_tweet_id = ? WHERE hash = ?",
+                (None if tweet_id is None else str(tweet_id), digest)
+            )
+
+    def next_post_time(self, now=None):
+        """Earliest time the next pending tweet may go out, or None with nothing pending"""
+        now = now if now is not None else time.time()
+        rows = self._query("SELECT MIN(next_attempt) FROM tweets WHERE status = 'pending'", ())
+        due = rows[0][0]
+        if due is None:
+            return None
+
+        # A thread counts once per posted part, not once per queued item
+        sent = self._query(
+            "SELECT sent_at, MAX(parts_sent, 1) FROM tweets WHERE status = 'sent' AND sent_at > ?"
+            " ORDER BY sent_at DESC", (now - DAY,)
+        )
+        if sent:
+            due = max(due, sent[0][0] + self.min_interval)
+        posted = 0
+        for sent_at, parts in sent:
+            posted += parts
+            if posted >= self.max_per_day:
+                # Wait until enough of the last day's posts drop out of the window
+                due = max(due, sent_at + DAY)
+                break
+        return due
+
+    def mark_sent(self, digest, timestamp=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE tweets SET status = 'sent', sent_at = ?, attempts = attempts + 1 WHERE hash = ?",
+                (timestamp if timestamp is not None else time.time(), digest)
+            )
+
+    def mark_failed(self, digest, error, timestamp=None, permanent=False):
+        """Record a failed attempt and schedule the retry, giving up after ``max_attempts``
+
+        A ``permanent`` failure, which no retry could fix, gives up at once.
+        """
+        now = timestamp if timestamp is not None else time.time()
+        with self._lock, self._conn:
+            attempts = self._conn.execute("SELECT attempts FROM tweets WHERE hash = ?", (digest,)).fetchone()[0] + 1
+            if attempts >= self.max_attempts or permanent:
+                self._conn.execute(
+                    "UPDATE tweets SET status = 'failed', attempts = ?, last_error = ? WHERE hash = ?",
+                    (attempts, error, digest)
+                )
+                logger.error(f"Giving up on tweet {digest[:12]} after {attempts} attempts: {error}")
+                return None
+
+            delay = random.uniform(0.5, 1.0) * min(self.max_backoff, self.backoff_base * 2 ** (attempts - 1))
+            self._conn.execute(
+                "UPDATE tweets SET attempts = ?, next_attempt = ?, last_error = ? WHERE hash = ?",
+                (attempts, now + delay, error, digest)
+            )
+        logger.warning(f"Tweet {digest[:12]} failed ({error}), retrying in {delay:.0f}s")
+        return delay
+
+    def counts(self):
+        """Number of tweets per status"""
+        return dict(self._query("SELECT status, COUNT(*) FROM tweets GROUP BY status", ()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+class TweetSender:
+    """Background thread that drains a TweetQueue through a Twitter handler
+
+    ``submit`` only writes to the queue, so callers never wait on Twitter. Text
+    over the tweet limit is posted as a thread; a retry continues after the last
+    part that went out.
+    """
+
+    def __init__(self, queue, handler):
+        self.queue = queue
+        self.handler = handler
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+    def submit(self, content):
+        """Queue ``content`` for posting; False if it is a duplicate"""
+        queued = self.queue.enqueue(content)
+        if queued:
+            self._wake.set()
+        return queued
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self.run, name='tweet-sender', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def run(self):
+        while not self._stopping:
+            due = self.queue.next_post_time()
+            delay = None if due is None else due - time.time()
+            if delay is None or delay > 0:
+                if self._wake.wait(delay):
+                    self._wake.clear()
+                continue
+            self.send_next()
+
+    def send_next(self):
+        """Post the next due tweet; True if one was posted"""
+        item = self.queue.next_due()
+        if item is None:
+            return False
+        digest, content, parts_sent, last_tweet_id = item
+        parts = split_thread(content)[parts_sent:]
+        try:
+            if (len(parts) > 1 or last_tweet_id) and not self.handler.supports_replies():
+                if parts_sent:
+                    self.queue.mark_failed(digest, "Twitter client cannot post replies to continue the thread",
+                                           permanent=True)
+                    return False
+                # Parts break at line boundaries, so the first one is a complete, shorter update
+                logger.warning(f"Twitter client cannot post replies, posting only the first of "
+                               f"{len(parts)} parts of tweet {digest[:12]}")
+                parts = parts[:1]
+            posted = self.handler.post_thread(
+                parts,
+                reply_to=last_tweet_id,
+                on_posted=lambda tweet_id: self.queue.mark_progress(digest, tweet_id)
+            )
+            error = None if posted else "post_thread returned False"
+        except Exception as e:
+            posted, error = False, str(e)
+
+        if posted:
+            self.queue.mark_sent(digest)
+            self.handler.close()
+            return True
+        self.queue.mark_failed(digest, error)
+        return False
+
+def get_outbox():
+    """Get the process-wide tweet sender configured from crypto_bot.json, started"""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            # Imported here so the queue itself does not need the Twitter client installed
+            from .twitter_client import get_twitter_handler
+            settings = dict(load_config().get('features', {}).get('twitter', {}).get('queue', {}))
+            queue = TweetQueue(settings.pop('path', DEFAULT_QUEUE_PATH), **settings)
+            _outbox = TweetSender(queue, get_twitter_handler())
+            _outbox.start()
+        return _outbox
@@ -0,0 +1,52 @@
+MAX_WEIGHTED_LENGTH = 280
+
+# Code point ranges that count as one character in twitter-text (v3 config);
+# everything else, including CJK and emoji, counts as two
+LIGHT_RANGES = (
+    (0, 4351),
+    (8192, 8205),
+    (8208, 8223),
+    (8242, 8247)
+)
+
+def char_weight(char):
+    code = ord(char)
+    return 1 if any(start <= code <= end for start, end in LIGHT_RANGES) else 2
+
+def weighted_length(text):
+    """Length of ``text`` as Twitter counts it against the 280 limit"""
+    return sum(char_weight(char) for char in text)
+
+def split_thread(text, limit=MAX_WEIGHTED_LENGTH):
+    """Split ``text`` into tweets of at most ``limit`` weighted characters
+
+    Parts break at line boundaries, so each asset line of a market update stays
+    whole; a single line longer than ``limit`` is cut at the limit. Blank lines
+    at the edges of a part are dropped.
+    """
+    parts = []
+    current = []
+    for line in text.split('\n'):
+        for piece in _cut(line, limit):
+            candidate = '\n'.join(current + [piece]).strip()
+            if current and weighted_length(candidate) > limit:
+                parts.append('\n'.join(current).strip())
+                current = [piece]
+            else:
+                current.append(piece)
+    if current:
+        parts.append('\n'.join(current).strip())
+    return [part for part in parts if part]
+
+def _cut(line, limit):
+    if weighted_length(line) <= limit:
+        return [line]
+    pieces, piece, length = [], '', 0
+    for char in line:
+        weight = char_weight(char)
+        if length + weight > limit:
+            pieces.append(piece)
+            piece, length = '', 0
+        piece += char
+        length += weight
+    return pieces + [piece]
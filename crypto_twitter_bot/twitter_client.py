@@ -1,43 +1,200 @@
+import inspect
+import json
 import os
+import re
+import threading
+from pathlib import Path
 from loguru import logger
+from .metrics import timed
 from elyza_os_twitter_client import TwitterClient
 
+DEFAULT_DATA_DIR = "./twitter_data"
+
+# Error text that means the session was rejected and a fresh login may help;
+# bare words like 'session' or 'auth' also turn up in unrelated errors
+AUTH_ERROR_MARKERS = ('unauthorized', 'forbidden', 'not authenticated', 'could not authenticate',
+                      'session expired', 'session has expired', 'invalid session', 'login required')
+
+# 401/403 as a status token of their own, not digits inside a tweet id, timestamp or delay
+AUTH_STATUS_PATTERN = re.compile(r'(?<![\w.:])(?:401|403)(?![\w.:])')
+
+_handler = None
+_handler_lock = threading.Lock()
+
 class TwitterHandler:
-    def __init__(self):
+    """Twitter client that stays logged in across posts
+
+    The session cookies are saved under ``TWITTER_DATA_DIR`` after every login
+    and restored on startup, so a restart does not need a new login either. A
+    full login happens only when there is no saved session or when Twitter
+    rejects the current one.
+    """
+
+    def __init__(self, data_dir=None):
         self.username = os.getenv("TWITTER_USERNAME")
         self.password = os.getenv("TWITTER_PASSWORD")
+        self.data_dir = Path(data_dir or os.getenv("TWITTER_DATA_DIR") or DEFAULT_DATA_DIR)
         self.client = None
-        
+        self._lock = threading.RLock()
+
+    @property
+    def cookie_path(self):
+        return self.data_dir / "cookies.json"
+
     def initialize(self):
-        """Initialize Twitter client"""
-        try:
-            if not self.client:
-                self.client = TwitterClient()
-                self.client.login(self.username, self.password)
-                logger.info("Twitter client initialized successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Twitter client: {str(e)}")
-            raise
-            
+        """Initialize Twitter client, restoring the saved session when there is one"""
+        with self._lock:
+            try:
+                if not self.client:
+                    self.client = TwitterClient()
+                    if self._restore_session():
+                        logger.info("Twitter client restored saved session")
+                    else:
+                        self._login()
+            except Exception as e:
+                self.client = None
+                logger.error(f"Failed to initialize Twitter client: {str(e)}")
+                raise
+
+    @timed()
     def post_tweet(self, content):
-        """Post a tweet using Elyza OS client"""
+        """Post a tweet using Elyza OS client, logging in again once if the session was rejected"""
+        with self._lock:
+            try:
+                self._tweet(content)
+                logger.info(f"Successfully posted tweet: {content[:50]}...")
+                return True
+            except Exception as e:
+                logger.error(f"Failed to post tweet: {str(e)}")
+                return False
+
+    @timed()
+    def post_thread(self, parts, reply_to=None, on_posted=None):
+        """Post ``parts`` in order, each replying to the previous one
+
+        ``reply_to`` continues an earlier, partly posted thread. ``on_posted`` is
+        called with each tweet id as soon as that part is out, so a caller can
+        resume after a failure without posting parts twice. A thread is refused
+        outright if the client cannot post replies, rather than posted as
+        unlinked tweets.
+        """
+        with self._lock:
+            try:
+                if len(parts) > 1 or reply_to:
+                    if not self.supports_replies():
+                        logger.error("Twitter client cannot post replies, refusing to post a thread")
+                        return False
+                for index, content in enumerate(parts):
+                    tweet_id = self._tweet(content, reply_to)
+                    logger.info(f"Posted thread part {index + 1}/{len(parts)}: {content[:50]}...")
+                    if tweet_id is None and index + 1 < len(parts):
+                        # Recording progress without an id would post the rest unlinked on retry
+                        raise ValueError("Twitter client returned no tweet id, cannot link the next part")
+                    if on_posted:
+                        on_posted(tweet_id)
+                    reply_to = tweet_id
+                return True
+            except Exception as e:
+                logger.error(f"Failed to post thread: {str(e)}")
+                return False
+
+    def _tweet(self, content, reply_to=None):
+        if not self.client:
+            self.initialize()
+
         try:
-            if not self.client:
-                self.initialize()
-            
-            self.client.tweet(content)
-            logger.info(f"Successfully posted tweet: {content[:50]}...")
-            return True
+            return self._send(content, reply_to)
         except Exception as e:
-            logger.error(f"Failed to post tweet: {str(e)}")
+            if not is_auth_error(e):
+                raise
+            logger.warning(f"Twitter session rejected, logging in again: {str(e)}")
+            self._login()
+            return self._send(content, reply_to)
+
+    def supports_replies(self):
+        """Whether the client's ``tweet`` accepts the ``reply_to`` threads need"""
+        if not self.client:
+            self.initialize()
+        try:
+            parameters = inspect.signature(self.client.tweet).parameters.values()
+        except (TypeError, ValueError):
             return False
-            
+        return any(p.name == 'reply_to' or p.kind is inspect.Parameter.VAR_KEYWORD for p in parameters)
+
+    def _send(self, content, reply_to):
+        result = self.client.tweet(content, reply_to=reply_to) if reply_to else self.client.tweet(content)
+        # Return the new tweet's id so the next part can reply to it, or None
+        if isinstance(result, dict):
+            return result.get('id') or result.get('id_str')
+        tweet_id = getattr(result, 'id', None) or getattr(result, 'id_str', None)
+        if tweet_id is None and isinstance(result, (str, int)) and not isinstance(result, bool):
+            tweet_id = result
+        return str(tweet_id) if tweet_id is not None else None
+
     def close(self):
-        """Close the Twitter client session"""
-        if self.client:
-            try:
-                self.client.logout()
+        """Save the session for the next run, staying logged in"""
+        with self._lock:
+            if self.client:
+                self._save_session()
+
+    def logout(self):
+        """Log out and forget the saved session"""
+        with self._lock:
+            if self.client:
+                try:
+                    self.client.logout()
+                    logger.info("Twitter client closed successfully")
+                except Exception as e:
+                    logger.error(f"Failed to close Twitter client: {str(e)}")
                 self.client = None
-                logger.info("Twitter client closed successfully")
-            except Exception as e:
-                logger.error(f"Failed to close Twitter client: {str(e)}") 
\ No newline at end of file
+            self.cookie_path.unlink(missing_ok=True)
+
+    @timed(function='twitter_login')
+    def _login(self):
+        self.client.login(self.username, self.password)
+        logger.info("Twitter client initialized successfully")
+        self._save_session()
+
+    def _save_session(self):
+        try:
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            if hasattr(self.client, 'save_cookies'):
+                self.client.save_cookies(str(self.cookie_path))
+            elif hasattr(self.client, 'session'):
+                with open(self.cookie_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.client.session.cookies.get_dict(), f)
+            else:
+                logger.warning("Twitter client does not expose its session, cannot persist login")
+        except Exception as e:
+            logger.error(f"Failed to save Twitter session: {str(e)}")
+
+    def _restore_session(self):
+        if not self.cookie_path.exists():
+            return False
+        try:
+            if hasattr(self.client, 'load_cookies'):
+                self.client.load_cookies(str(self.cookie_path))
+                return True
+            if hasattr(self.client, 'session'):
+                with open(self.cookie_path, encoding='utf-8') as f:
+                    self.client.session.cookies.update(json.load(f))
+                return True
+        except Exception as e:
+            logger.warning(f"Discarding unusable saved Twitter session: {str(e)}")
+        return False
+
+def is_auth_error(error):
+    """Whether ``error`` looks like Twitter rejecting the session"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status in (401, 403):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in AUTH_ERROR_MARKERS) or bool(AUTH_STATUS_PATTERN.search(message))
+
+def get_twitter_handler():
+    """Get the process-wide Twitter handler"""
+    global _handler
+    with _handler_lock:
+        if _handler is None:
+            _handler = TwitterHandler()
+        return _handler
@@ -0,0 +1,73 @@
+import pytest
+import time
+from crypto_twitter_bot.aggregation import QuoteAggregator, merge_quotes
+from crypto_twitter_bot.models import Ticker
+
+def quote(price, volume=1.0, change=0.0, delay=0):
+    """Build a fetcher answering with one quote after ``delay`` seconds"""
+    def fetch():
+        time.sleep(delay)
+        return Ticker(price=price, volume=volume, change_24h=change)
+    return fetch
+
+def test_merge_weights_by_volume():
+    """Test that price and change are volume-weighted and volumes summed"""
+    merged = merge_quotes({
+        'okx': Ticker(price=1.00, volume=3.0, change_24h=4.0),
+        'gateio': Ticker(price=1.04, volume=1.0, change_24h=0.0)
+    })
+
+    assert merged['price'] == pytest.approx(1.01)
+    assert merged['volume'] == pytest.approx(4.0)
+    assert merged['change_24h'] == pytest.approx(3.0)
+
+def test_merge_rejects_outliers():
+    """Test that a quote far from the others is left out"""
+    merged = merge_quotes({
+        'okx': Ticker(price=1.00, volume=1.0, change_24h=1.0),
+        'gateio': Ticker(price=1.01, volume=1.0, change_24h=1.0),
+        'kucoin': Ticker(price=0.99, volume=1.0, change_24h=1.0),
+        'coingecko': Ticker(price=50.0, volume=100.0, change_24h=90.0)
+    })
+
+    assert merged['price'] == pytest.approx(1.0)
+    assert merged['volume'] == pytest.approx(3.0)
+    assert merged['change_24h'] == pytest.approx(1.0)
+
+def test_two_quotes_never_outvote_each_other():
+    """Test that a disagreeing pair keeps only the primary quote, or neither"""
+    quotes = {
+        'gateio': Ticker(price=0.5, volume=1.0, change_24h=1.0),
+        'coingecko': Ticker(price=5.0, volume=1.0, change_24h=1.0)
+    }
+
+    assert merge_quotes(quotes) is None
+    assert merge_quotes(quotes, primary='gateio')['price'] == pytest.approx(0.5)
+    assert merge_quotes(quotes, primary='okx') is None
+
+def test_merge_without_quotes():
+    assert merge_quotes({'okx': None, 'gateio': Ticker(price=0)}) is None
+
+def test_aggregate_returns_at_quorum():
+    """Test that a slow venue does not delay the merged quote"""
+    aggregator = QuoteAggregator(quorum=2, timeout=5)
+
+    start = time.monotonic()
+    merged = aggregator.aggregate({
+        'okx': quote(1.0),
+        'gateio': quote(1.0, delay=0.05),
+        'binance': quote(1.0, delay=2)
+    })
+
+    assert time.monotonic() - start < 1
+    assert merged['volume'] == pytest.approx(2.0)
+
+def test_aggregate_skips_failed_sources():
+    """Test that errors and empty answers do not count towards the quorum"""
+    def broken():
+        raise ValueError("bad response")
+
+    aggregator = QuoteAggregator(quorum=2, timeout=1)
+    quotes = aggregator.collect({'okx': broken, 'gateio': lambda: None, 'kucoin': quote(2.0)})
+
+    assert list(quotes) == ['kucoin']
@@ -0,0 +1,61 @@
+import pytest
+from crypto_twitter_bot.analytics import TickerFrame
+
+@pytest.fixture
+def frame():
+    return TickerFrame.from_market_data({
+        'dogs': {'protocol': 'Runes', 'price': 0.8, 'volume': 0.5, 'change_24h': 30.0},
+        'stamp': {'protocol': 'SRC20', 'price': 0.4, 'volume': 1.5, 'change_24h': -10.0},
+        'ckb': {'protocol': 'CKB', 'timed_out': True},
+        'overall_trend': 'up'
+    })
+
+def test_from_market_data_skips_non_dicts(frame):
+    """Test that the trend marker is not treated as a ticker"""
+    assert frame.symbols == ['dogs', 'stamp', 'ckb']
+    assert frame.median('price') == pytest.approx(0.6)
+
+def test_trend_and_weighted_change(frame):
+    """Test that changes are summed for the trend and volume-weighted for the average"""
+    assert frame.trend() == 'up'
+    assert frame.vwap_change() == pytest.approx((30.0 * 0.5 - 10.0 * 1.5) / 2.0)
+
+def test_ranks_by_volume(frame):
+    """Test ordering by volume with missing volumes last"""
+    assert [frame.symbols[i] for i in frame.ranks('volume')] == ['stamp', 'dogs', 'ckb']
+
+def test_from_okx_strength():
+    """Test market strength for many tickers at once, including a flat range"""
+    tickers = [
+        {'instId': 'BTC-USDT', 'last': '50000', 'high24h': '51000', 'low24h': '49000',
+         'vol24h': '1000', 'volCcy24h': '50000000'},
+        {'instId': 'ETH-USDT', 'last': '3000', 'high24h': '3000', 'low24h': '3000',
+         'vol24h': '10', 'volCcy24h': '30000'}
+    ]
+
+    records = TickerFrame.from_okx(tickers).records()
+    assert records['BTC-USDT']['market_strength'] == 50.0
+    assert records['ETH-USDT']['market_strength'] == 0.0
+    assert records['ETH-USDT']['volume'] == 30000.0
+
+def test_from_okx_drops_malformed_tickers():
+    """Test that a ticker with empty or bad fields is dropped instead of failing the frame"""
+    good = {'instId': 'BTC-USDT', 'last': '50000', 'high24h': '51000', 'low24h': '49000',
+            'vol24h': '1000', 'volCcy24h': '50000000'}
+    tickers = [
+        good,
+        {**good, 'instId': 'NEW-USDT', 'high24h': '', 'low24h': ''},
+        {**good, 'instId': 'BAD-USDT', 'last': 'n/a'},
+        {key: value for key, value in good.items() if key != 'instId'}
+    ]
+
+    assert list(TickerFrame.from_okx(tickers).records()) == ['BTC-USDT']
+
+def test_empty_frame():
+    """Test that an empty universe yields empty results instead of errors"""
+    frame = TickerFrame.from_okx([])
+
+    assert frame.records() == {}
+    assert frame.trend() == 'down'
+    assert frame.median('price') is None
+    assert frame.vwap_change() is None
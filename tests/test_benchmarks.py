@@ -0,0 +1,58 @@
+import pytest
+import requests
+from benchmarks import replay_server
+from benchmarks.fixtures import Universe, build_routes
+from benchmarks.replay_server import ReplayServer
+from benchmarks.run import SCENARIOS, compare, run_scenario
+
+@pytest.fixture
+def universe():
+    return Universe(20)
+
+@pytest.fixture
+def server(universe):
+    server = ReplayServer(build_routes(universe, extra=10))
+    server.start()
+    yield server
+    server.stop()
+
+def test_replayed_cycle_prices_every_token(server, universe):
+    """Test that a full market data cycle runs against the replayed exchanges"""
+    results = {
+        scenario.name: run_scenario(scenario, server.url, universe, repeat=1, deadline=30)
+        for scenario in SCENARIOS
+    }
+
+    cycle = results['get_all_market_data']
+    assert cycle['priced'] == 20
+    assert cycle['requests'] == sum(cycle['requests_by_host'].values())
+    assert cycle['requests_by_host']['api.kucoin.com'] == 1
+    assert cycle['peak_kb'] > 0
+    # Every tenth token is not listed on OKX
+    assert results['okx_get_market_data']['priced'] == 18
+    assert results['okx_get_market_data']['requests'] == 1
+
+def test_error_injection_and_latency(universe):
+    """Test that injected failures replace the replayed response"""
+    server = ReplayServer(build_routes(universe, extra=0), error_rate=1.0, error_status=429,
+                          host_latency={'api.binance.com': 0.05})
+    base_url = server.start()
+    try:
+        session = replay_server.install(requests.Session(), base_url)
+        response = session.get("https://api.binance.com/api/v3/ticker/24hr", params={'symbol': 'DOGSUSDT'})
+
+        assert response.status_code == 429
+        assert response.elapsed.total_seconds() >= 0.05
+        assert replay_server.stats(base_url) == {'api.binance.com': 1}
+    finally:
+        server.stop()
+
+def test_compare_flags_regressions():
+    """Test that only growth beyond the tolerance counts as a regression"""
+    baseline = {'cycle[5]': {'wall_s': 1.0, 'requests': 100, 'peak_kb': 1000}}
+    results = {'cycle[5]': {'wall_s': 1.2, 'requests': 120, 'peak_kb': 500}, 'cycle[100]': {'wall_s': 9}}
+
+    regressions = compare(results, baseline)
+
+    assert len(regressions) == 1
+    assert regressions[0].startswith('cycle[5] requests: 120')
@@ -0,0 +1,76 @@
+import pytest
+import time
+import threading
+from crypto_twitter_bot.cache import TTLCache
+
+def test_cache_hit_within_ttl():
+    """Test that a fresh value is served without calling the loader"""
+    cache = TTLCache(ttl=60)
+    calls = []
+    loader = lambda: calls.append(1) or 42
+
+    assert cache.get('key', loader) == 42
+    assert cache.get('key', loader) == 42
+    assert len(calls) == 1
+
+def test_cache_reloads_after_ttl():
+    """Test that an expired value is reloaded"""
+    cache = TTLCache(ttl=0.05)
+    values = iter([1, 2])
+
+    assert cache.get('key', lambda: next(values)) == 1
+    time.sleep(0.1)
+    assert cache.get('key', lambda: next(values)) == 2
+
+def test_cache_coalesces_concurrent_misses():
+    """Test that concurrent callers share one in-flight load"""
+    cache = TTLCache(ttl=60)
+    calls = []
+    barrier = threading.Barrier(8)
+    results = []
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get('key', loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ['value'] * 8
+
+def test_cache_serves_stale_while_revalidating():
+    """Test that a stale value is returned immediately and refreshed in the background"""
+    cache = TTLCache(ttl=0.05, stale_ttl=60)
+    cache.get('key', lambda: 'old')
+    time.sleep(0.1)
+
+    refreshed = threading.Event()
+
+    def loader():
+        refreshed.set()
+        return 'new'
+
+    assert cache.get('key', loader) == 'old'
+    assert refreshed.wait(1)
+    time.sleep(0.05)
+    assert cache.get('key', loader) == 'new'
+
+def test_cache_does_not_store_failures():
+    """Test that failed loads are not cached"""
+    cache = TTLCache(ttl=60)
+
+    def broken():
+        raise ValueError("boom")
+
+    assert cache.get('key', broken) is None
+    assert cache.get('key', lambda: None) is None
+    assert cache.get('key', lambda: 7) == 7
@@ -0,0 +1,51 @@
+import json
+import pytest
+import requests
+import responses
+import time
+from crypto_twitter_bot.candles import CandleCache
+
+URL = "https://www.okx.com/api/v5/market/candles"
+
+def daily_candle(days_ago, close, confirmed=True):
+    """Build an OKX daily candle row opened ``days_ago`` days before today"""
+    ts = (int(time.time()) // 86400 - days_ago) * 86400 * 1000
+    return [str(ts), close, close, close, close, '1', '1', '1', '1' if confirmed else '0']
+
+@pytest.fixture
+def cache(tmp_path):
+    return CandleCache(requests.Session(), tmp_path)
+
+@responses.activate
+def test_keeps_confirmed_candles_on_disk(cache, tmp_path):
+    """Test that only closed candles are cached and survive a restart"""
+    responses.add(responses.GET, URL, json={'code': '0', 'data': [
+        daily_candle(0, '3', confirmed=False), daily_candle(1, '2'), daily_candle(2, '1')
+    ]})
+
+    assert cache.closes('ORDI-USDT', count=2) == [2.0, 1.0]
+    assert cache.change('ORDI-USDT', 2.5) == pytest.approx(25.0)
+    assert len(json.loads((tmp_path / "okx_ORDI-USDT_1D.json").read_text())) == 2
+
+    restarted = CandleCache(requests.Session(), tmp_path)
+    assert restarted.closes('ORDI-USDT') == [2.0]
+    assert len(responses.calls) == 1
+
+@responses.activate
+def test_fetches_only_newer_candles(cache, tmp_path):
+    """Test that a stale cache asks OKX only for candles after the last stored one"""
+    stored = [[int(row[0]), 1.0, 1.0, 1.0, float(row[4])] for row in (daily_candle(4, '1'), daily_candle(3, '2'))]
+    (tmp_path / "okx_DOGS-USDT_1D.json").write_text(json.dumps(stored))
+    responses.add(responses.GET, URL, json={'code': '0', 'data': [
+        daily_candle(0, '5', confirmed=False), daily_candle(1, '4'), daily_candle(2, '3')
+    ]})
+
+    assert cache.closes('DOGS-USDT', count=5) == [4.0, 3.0, 2.0, 1.0]
+    assert responses.calls[0].request.params['before'] == str(stored[-1][0])
+
+@responses.activate
+def test_change_without_candles(cache):
+    """Test that a failed fetch leaves the change undetermined"""
+    responses.add(responses.GET, URL, json={'code': '51001', 'msg': 'Instrument ID does not exist', 'data': []})
+
+    assert cache.change('NOPE-USDT', 1.0) is None
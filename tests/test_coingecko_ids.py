@@ -0,0 +1,40 @@
+import json
+from crypto_twitter_bot.coingecko_ids import UNKNOWN, CoinGeckoIdCache
+
+def test_resolutions_survive_restart(tmp_path):
+    """Test that flushed resolutions are loaded by the next process"""
+    path = tmp_path / 'ids.json'
+    cache = CoinGeckoIdCache(path)
+    cache.put('ordi', 'ordinals')
+    cache.put('NOPE', None)
+
+    assert cache.get('ORDI') == 'ordinals'
+    assert not path.exists()
+    cache.flush()
+
+    restarted = CoinGeckoIdCache(path)
+    assert restarted.get('ordi') == 'ordinals'
+    assert restarted.get('NOPE') is None
+    assert restarted.get('OTHER') is UNKNOWN
+
+def test_negative_entries_expire_sooner(tmp_path):
+    """Test that unlisted symbols are searched for again after the negative TTL"""
+    cache = CoinGeckoIdCache(tmp_path / 'ids.json', ttl=1000, negative_ttl=10)
+    cache.put('ORDI', 'ordinals', now=0)
+    cache.put('NOPE', None, now=0)
+
+    assert cache.get('NOPE', now=5) is None
+    assert cache.get('NOPE', now=10) is UNKNOWN
+    assert cache.get('ORDI', now=999) == 'ordinals'
+    assert cache.get('ORDI', now=1000) is UNKNOWN
+
+def test_unreadable_file_discarded(tmp_path):
+    """Test that a corrupt cache file starts an empty cache"""
+    path = tmp_path / 'ids.json'
+    path.write_text('{not json')
+    assert CoinGeckoIdCache(path).get('ORDI') is UNKNOWN
+
+    path.write_text(json.dumps({'ORDI': 'ordinals', 'DOGS': {'id': 'dogs', 'resolved_at': 0}}))
+    cache = CoinGeckoIdCache(path, ttl=float('inf'))
+    assert cache.get('ORDI') is UNKNOWN
+    assert cache.get('DOGS') == 'dogs'
@@ -0,0 +1,83 @@
+import pytest
+import time
+import responses
+from crypto_twitter_bot.health import CircuitBreaker, HealthRegistry
+from crypto_twitter_bot.sources import SourceAdapter
+from crypto_twitter_bot.transport import CircuitOpenError, PooledSession
+
+def test_breaker_opens_after_failures():
+    """Test that repeated failures open the circuit"""
+    breaker = CircuitBreaker(min_calls=3, cooldown=60)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+    assert breaker.score() == 0.0
+
+def test_breaker_probes_after_cooldown():
+    """Test that one probe is allowed after the cool-down and closes the circuit on success"""
+    breaker = CircuitBreaker(min_calls=1, cooldown=0.05)
+    breaker.record(False, 0.1)
+    assert not breaker.allow()
+
+    time.sleep(0.1)
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe at a time
+    breaker.record(True, 0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+def test_breaker_reopens_on_failed_probe():
+    """Test that a failed probe reopens the circuit"""
+    breaker = CircuitBreaker(min_calls=1, cooldown=0.05)
+    breaker.record(False, 0.1)
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+def test_rank_orders_by_health():
+    """Test that unhealthy sources move down and open ones are skipped"""
+    health = HealthRegistry(min_calls=2, cooldown=60)
+    okx = SourceAdapter('okx', 'okx', None, host='okx')
+    unisat = SourceAdapter('unisat', 'unisat', None, host='unisat')
+    gateio = SourceAdapter('gateio', 'gateio', None, host='gateio')
+
+    assert health.rank([okx, unisat, gateio]) == [okx, unisat, gateio]
+
+    health.record('okx', True, 0.1)
+    health.record('okx', False, 0.1)
+    for _ in range(2):
+        health.record('unisat', False, 0.1)
+
+    assert health.rank([okx, unisat, gateio]) == [gateio, okx]
+
+@responses.activate
+def test_session_skips_open_hosts():
+    """Test that the transport fails fast once a host's circuit is open"""
+    url = "https://open-api.unisat.io/v1/indexer/brc20/ticker"
+    responses.add(responses.GET, url, status=503)
+    session = PooledSession(health=HealthRegistry(min_calls=2, cooldown=60))
+
+    assert session.get(url).status_code == 503
+    assert session.get(url).status_code == 503
+    with pytest.raises(CircuitOpenError):
+        session.get(url)
+    assert len(responses.calls) == 2
+
+@responses.activate
+def test_not_found_does_not_count_as_failure():
+    """Test that a 404 leaves the circuit closed"""
+    url = "https://pro-api.coingecko.com/api/v3/coins/unknown"
+    responses.add(responses.GET, url, status=404)
+    health = HealthRegistry(min_calls=1)
+    session = PooledSession(health=health)
+
+    for _ in range(3):
+        session.get(url)
+    assert health.breaker('pro-api.coingecko.com').state == CircuitBreaker.CLOSED
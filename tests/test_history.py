@@ -0,0 +1,80 @@
+import pytest
+import sqlite3
+import time
+from crypto_twitter_bot.history import MarketHistory
+
+@pytest.fixture
+def history(tmp_path):
+    store = MarketHistory(str(tmp_path / "history.db"))
+    yield store
+    store.close()
+
+def test_append_and_range(history):
+    """Test recording snapshots and reading them back by time range"""
+    history.append_many({
+        'dogs': {'protocol': 'Runes', 'price': 0.8, 'volume': 0.5, 'change_24h': 3.0},
+        'stamp': {'protocol': 'SRC20', 'timed_out': True},
+        'overall_trend': 'up'
+    }, timestamp=1000)
+    history.append('dogs', {'price': 0.9, 'volume': 0.6, 'change_24h': 4.0, 'market_strength': 70.0}, timestamp=2000)
+
+    assert [s['price'] for s in history.range('DOGS')] == [0.8, 0.9]
+    assert history.range('dogs', start=1500) == [
+        {'timestamp': 2000, 'price': 0.9, 'volume': 0.6, 'change_24h': 4.0, 'market_strength': 70.0}
+    ]
+    assert history.range('stamp') == []
+
+def test_downsample(history):
+    """Test averaging snapshots into fixed buckets"""
+    for ts, price in [(0, 1.0), (30, 3.0), (60, 5.0)]:
+        history.append('ordi', {'price': price, 'volume': 1.0, 'change_24h': 0}, timestamp=ts)
+
+    buckets = history.downsample('ordi', 60)
+    assert [(b['timestamp'], b['price'], b['high'], b['samples']) for b in buckets] == [(0, 2.0, 3.0, 2), (60, 5.0, 5.0, 1)]
+
+def test_change_since(history):
+    """Test computing the 24h change from a recorded price"""
+    now = time.time()
+    history.append('ckb', {'price': 0.02, 'volume': 1.0, 'change_24h': 0}, timestamp=now - 86400 - 60)
+
+    assert history.change_since('ckb', 0.025) == pytest.approx(25.0)
+    assert history.change_since('ckb', 0.025, tolerance=10) is None
+    assert history.change_since('fb', 0.3) is None
+
+def test_change_since_compares_like_with_like(history):
+    """Test that a source's change ignores prices other sources recorded"""
+    then = time.time() - 86400
+    history.append('dogs', {'price': 0.000012, 'source': 'magiceden'}, timestamp=then)
+    history.append('dogs', {'price': 0.0008, 'source': 'okx'}, timestamp=then - 600)
+
+    assert history.change_since('dogs', 0.001, source='okx') == pytest.approx(25.0)
+    assert history.change_since('dogs', 0.001, source='gateio') is None
+
+def test_retention(tmp_path):
+    """Test that old snapshots are pruned and data survives reopening"""
+    path = str(tmp_path / "history.db")
+    store = MarketHistory(path, retention=100)
+    store.append('fb', {'price': 1.0}, timestamp=1000)
+    store.append('fb', {'price': 2.0}, timestamp=1050)
+    store.append('fb', {'price': 3.0}, timestamp=1200)
+    store.close()
+
+    reopened = MarketHistory(path, retention=100)
+    assert [s['price'] for s in reopened.range('fb')] == [3.0]
+    reopened.close()
+
+def test_adds_source_column_to_old_history(tmp_path):
+    """Test that a history written before sources were tracked is upgraded in place"""
+    path = str(tmp_path / "history.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE snapshots (token TEXT NOT NULL, ts REAL NOT NULL, price REAL, volume REAL,"
+                 " change_24h REAL, market_strength REAL)")
+    conn.execute("INSERT INTO snapshots VALUES ('fb', ?, 1.0, 1.0, 0, NULL)", (time.time() - 86400,))
+    conn.commit()
+    conn.close()
+
+    store = MarketHistory(path)
+    store.append('fb', {'price': 2.0, 'source': 'gateio'})
+    assert store.change_since('fb', 1.5, source='gateio') is None
+    assert store.change_since('fb', 1.5) == pytest.approx(50.0)
+    store.close()
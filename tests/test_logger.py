@@ -2,7 +2,9 @@ import pytest
 import os
 import shutil
 from pathlib import Path
-from crypto_twitter_bot.logger import get_logger
+from loguru import logger as loguru_logger
+from crypto_twitter_bot import logger as logger_module
+from crypto_twitter_bot.logger import get_logger, truncate
 
 @pytest.fixture(autouse=True)
 def setup_and_cleanup():
@@ -10,10 +12,13 @@ def setup_and_cleanup():
     # Setup
     if Path("logs").exists():
         shutil.rmtree("logs")
+    logger_module._configured = False
     
     yield
     
     # Cleanup
+    loguru_logger.complete()
+    logger_module._configured = False
     if Path("logs").exists():
         shutil.rmtree("logs")
 
@@ -37,6 +42,7 @@ def test_logger_instance():
     logger.error("Error message")
     
     # Verify log files exist and have content
+    loguru_logger.complete()
     assert os.path.getsize("logs/debug.log") > 0
     assert os.path.getsize("logs/error.log") > 0
 
@@ -49,6 +55,7 @@ def test_logger_error_with_exception():
         logger.error("Error occurred: {}", e)
     
     # Verify error was logged
+    loguru_logger.complete()
     assert os.path.getsize("logs/error.log") > 0
 
 def test_logger_name_binding():
@@ -58,7 +65,31 @@ def test_logger_name_binding():
     
     # Log a message and verify it contains the module name
     logger.info("Test message")
+    loguru_logger.complete()
     
     with open("logs/debug.log", "r") as f:
         log_content = f.read()
-        assert test_name in log_content 
\ No newline at end of file
+        assert test_name in log_content 
+
+def test_setup_runs_once():
+    """Test that repeated get_logger calls keep the same handlers"""
+    get_logger("first")
+    handlers = dict(loguru_logger._core.handlers)
+    get_logger("second")
+    assert dict(loguru_logger._core.handlers) == handlers
+
+def test_unbound_records_are_named():
+    """Test that records logged without get_logger still format"""
+    get_logger("setup")
+    loguru_logger.info("Plain message")
+    loguru_logger.complete()
+
+    with open("logs/debug.log", "r") as f:
+        assert "crypto_twitter_bot:" in f.read()
+
+def test_truncate_large_payload():
+    payload = {'data': ['x' * 50] * 100}
+    text = truncate(payload, limit=100)
+    assert text.startswith("{'data'")
+    assert text.endswith(f"({len(repr(payload)) - 100} more chars)")
+    assert truncate("short") == "short"
@@ -0,0 +1,360 @@
+import pytest
+import requests
+import responses
+import time
+import threading
+from crypto_twitter_bot.cache import TTLCache
+from crypto_twitter_bot.candles import CandleCache
+from crypto_twitter_bot.coingecko_ids import CoinGeckoIdCache
+from crypto_twitter_bot.fetch_engine import FetchEngine
+from crypto_twitter_bot.health import HealthRegistry
+from crypto_twitter_bot.history import MarketHistory
+from crypto_twitter_bot.market_data_handler import MarketDataHandler
+from crypto_twitter_bot.models import Ticker
+from crypto_twitter_bot.sources import PlanEntry, default_registry
+from crypto_twitter_bot.ticker_index import TickerIndex
+from crypto_twitter_bot.transport import PooledSession
+
+@pytest.fixture
+def config():
+    """Tracked tokens and their sources"""
+    return {
+        'data_sources': {
+            'bitcoin_ecosystem': {
+                'tokens': ['DOGS', 'STAMP', 'ORDI', 'FB', 'CKB'],
+                'protocols': {'DOGS': 'Runes', 'STAMP': 'SRC20', 'ORDI': 'BRC20', 'FB': 'FB', 'CKB': 'CKB'},
+                'sources': {
+                    'DOGS': ['okx'],
+                    'STAMP': ['kucoin'],
+                    'ORDI': ['okx', 'unisat'],
+                    'FB': ['gateio'],
+                    'CKB': ['gateio']
+                }
+            }
+        }
+    }
+
+@pytest.fixture
+def handler(config, tmp_path):
+    """Create a market data handler with short deadlines"""
+    session = requests.Session()
+    return MarketDataHandler(
+        engine=FetchEngine(max_workers=8, source_timeout=0.5, cycle_timeout=1),
+        rate_cache=TTLCache(ttl=60),
+        config=config,
+        health=HealthRegistry(),
+        history=MarketHistory(':memory:'),
+        session=session,
+        candles=CandleCache(session, tmp_path / 'candles'),
+        coingecko_ids=CoinGeckoIdCache(tmp_path / 'coingecko_ids.json')
+    )
+
+@pytest.fixture
+def bulk_tickers():
+    """Register bulk ticker responses for OKX, Gate.io and KuCoin"""
+    okx = [{'instId': f"{s}-USDT", 'last': '2', 'volCcy24h': '100000'} for s in ['BTC', 'DOGS', 'ORDI']]
+    okx[0]['last'] = '50000'
+    gateio = [
+        {'currency_pair': pair, 'last': '0.5', 'quote_volume': '50000', 'change_percentage': '-1.5'}
+        for pair in ['FB_USDT', 'CKB_USDT']
+    ]
+    kucoin = [{'symbol': 'STAMP-USDT', 'last': '0.1', 'volValue': '5000', 'changeRate': '0.02'}]
+
+    with responses.RequestsMock(assert_all_requests_are_fired=False) as rsps:
+        rsps.add(responses.GET, "https://www.okx.com/api/v5/market/tickers", json={'code': '0', 'data': okx})
+        rsps.add(responses.GET, "https://api.gateio.ws/api/v4/spot/tickers", json=gateio)
+        rsps.add(responses.GET, "https://api.kucoin.com/api/v1/market/allTickers",
+                 json={'code': '200000', 'data': {'ticker': kucoin}})
+        rsps.add(responses.GET, "https://www.okx.com/api/v5/market/candles",
+                 json={'code': '0', 'data': [daily_candle(0, '2', confirmed=False), daily_candle(1, '1')]})
+        yield rsps
+
+def daily_candle(days_ago, close, confirmed=True):
+    """Build an OKX daily candle row opened ``days_ago`` days before today"""
+    ts = (int(time.time()) // 86400 - days_ago) * 86400 * 1000
+    return [str(ts), close, close, close, close, '1', '1', '1', '1' if confirmed else '0']
+
+def slow_quote(delay, price):
+    """Build a fetcher that answers after ``delay`` seconds"""
+    def fetch(*args):
+        time.sleep(delay)
+        return {'price': price, 'volume': 1.0, 'change_24h': 1.0}
+    return fetch
+
+def test_fetch_engine_runs_tasks_concurrently():
+    """Test that wall-clock time follows the slowest task, not the sum"""
+    engine = FetchEngine(max_workers=5, source_timeout=2, cycle_timeout=5)
+    tasks = {f"task{i}": slow_quote(0.2, i) for i in range(5)}
+
+    start = time.monotonic()
+    results, timed_out = engine.run(tasks)
+    elapsed = time.monotonic() - start
+
+    assert timed_out == []
+    assert len(results) == 5
+    assert elapsed < 0.6
+
+def test_fetch_engine_source_deadline():
+    """Test that a slow source is reported as timed out"""
+    engine = FetchEngine(max_workers=2, source_timeout=0.2, cycle_timeout=2)
+    results, timed_out = engine.run({'fast': slow_quote(0, 1), 'slow': slow_quote(1, 2)})
+
+    assert results['fast']['price'] == 1
+    assert 'slow' not in results
+    assert timed_out == ['slow']
+
+def test_fetch_engine_task_error():
+    """Test that a failing task yields None without affecting others"""
+    def broken():
+        raise ValueError("boom")
+
+    results, timed_out = FetchEngine().run({'ok': slow_quote(0, 1), 'broken': broken})
+    assert results['broken'] is None
+    assert results['ok']['price'] == 1
+    assert timed_out == []
+
+def test_get_all_market_data_marks_timed_out(mocker, handler):
+    """Test that tokens missing the deadline are marked and the rest are returned"""
+    mocker.patch.object(handler, 'get_okx_data', side_effect=slow_quote(0, 0.5))
+    mocker.patch.object(handler, 'get_kucoin_data', side_effect=slow_quote(2, 0.4))
+    mocker.patch.object(handler, 'get_gateio_data', side_effect=lambda s: slow_quote(0, 0.3)() if s == 'FB' else None)
+    mocker.patch.object(handler, '_fetch_btc_price', return_value=50000.0)
+
+    market_data = handler.get_all_market_data()
+
+    assert market_data['dogs'] == {'protocol': 'Runes', 'price': 0.5, 'volume': 1.0, 'change_24h': 1.0, 'source': 'okx'}
+    assert market_data['stamp'] == {'protocol': 'SRC20', 'timed_out': True}
+    assert 'ckb' not in market_data
+    assert market_data['overall_trend'] == 'up'
+
+    message = handler.format_market_update(market_data)
+    assert '$stamp' not in message
+    assert '$dogs' in message
+
+def test_btc_price_fetched_once_per_cycle(mocker, handler):
+    """Test that concurrent conversions share one BTC reference request"""
+    fetch_btc = mocker.patch.object(handler, '_fetch_btc_price', side_effect=lambda: time.sleep(0.1) or 50000.0)
+    barrier = threading.Barrier(5)
+
+    def convert():
+        barrier.wait()
+        return {'price': 1.0, 'volume': 1.0 / handler.get_btc_price(), 'change_24h': 1.0}
+
+    handler.rate_cache.clear()
+    results, _ = FetchEngine().run({f"token{i}": convert for i in range(5)})
+
+    assert fetch_btc.call_count == 1
+    assert {r['volume'] for r in results.values()} == {1.0 / 50000.0}
+
+def test_get_all_market_data_uses_bulk_tickers(handler, bulk_tickers):
+    """Test that each venue is queried once regardless of how many tokens it serves"""
+    handler.engine.source_timeout = handler.engine.cycle_timeout = 5
+
+    market_data = handler.get_all_market_data()
+
+    assert market_data['dogs']['price'] == 2.0
+    assert market_data['dogs']['change_24h'] == 100.0
+    assert market_data['stamp']['change_24h'] == pytest.approx(2.0)
+    assert market_data['fb']['volume'] == 1.0
+    assert market_data['ckb']['price'] == 0.5
+
+    urls = [call.request.url.split('?')[0] for call in bulk_tickers.calls]
+    assert urls.count("https://www.okx.com/api/v5/market/tickers") == 1
+    assert urls.count("https://api.gateio.ws/api/v4/spot/tickers") == 1
+    assert urls.count("https://api.kucoin.com/api/v1/market/allTickers") == 1
+
+@responses.activate
+def test_ticker_index_lookup_is_flat(handler):
+    """Test that looking up many symbols costs one bulk request"""
+    tickers = [{'currency_pair': f"T{i}_USDT", 'last': str(i)} for i in range(100)]
+    responses.add(responses.GET, "https://api.gateio.ws/api/v4/spot/tickers", json=tickers)
+
+    index = TickerIndex(handler.session)
+    assert [index.get('gateio', f"T{i}_USDT")['last'] for i in range(100)] == [str(i) for i in range(100)]
+    assert index.get('gateio', 'MISSING_USDT') is None
+    assert len(responses.calls) == 1
+
+@responses.activate
+def test_magiceden_runes_from_one_download(handler):
+    """Test that runes tokens are matched case-insensitively from one stats download"""
+    runes = [{'symbol': s, 'floorPrice': '0.5', 'volume24h': '2', 'change24h': '3'} for s in ['dogs', 'Puppet', 'RSIC']]
+    responses.add(responses.GET, "https://api-mainnet.magiceden.dev/v2/ord/btc/runes/stats", json=runes)
+    handler._cycle_btc_price = 50000.0
+
+    assert [handler.get_magiceden_data(token)['price'] for token in ['DOGS', 'puppet', 'rsic']] == [0.5] * 3
+    assert handler.get_magiceden_data('MISSING') is None
+    assert len(responses.calls) == 1
+
+@responses.activate
+def test_ticker_index_revalidates_with_etag():
+    """Test that an unchanged list is kept on 304 instead of being downloaded again"""
+    url = "https://api-mainnet.magiceden.dev/v2/ord/btc/runes/stats"
+    responses.add(responses.GET, url, json=[{'symbol': 'DOGS', 'floorPrice': '0.5'}], headers={'ETag': '"v1"'})
+    responses.add(responses.GET, url, status=304)
+
+    index = TickerIndex(requests.Session(), ttl=0)
+    assert index.get('magiceden', 'dogs')['floorPrice'] == '0.5'
+    assert index.get('magiceden', 'dogs')['floorPrice'] == '0.5'
+
+    assert 'If-None-Match' not in responses.calls[0].request.headers
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+
+@responses.activate
+def test_gateio_market_directory_shared_across_tokens(handler):
+    """Test that the last-resort market directory is downloaded once for every token"""
+    responses.add(responses.GET, "https://api.gateio.ws/api/v4/spot/tickers", json=[])
+    responses.add(responses.GET, "https://api.gateio.ws/api/v4/spot/candlesticks", status=400, json={})
+    responses.add(responses.GET, "https://api.gateio.ws/api/v4/spot/markets", json=[
+        {'id': pair, 'last': '0.5', 'quote_volume': '50000', 'change_percentage': '2'}
+        for pair in ['FB_USDT', 'CKB_USDT']
+    ])
+    handler._cycle_btc_price = 50000.0
+
+    assert handler.get_fb_data()['volume'] == 1.0
+    assert handler.get_gateio_data('CKB')['change_24h'] == 2.0
+    assert handler.get_gateio_data('MISSING') is None
+
+    urls = [call.request.url.split('?')[0] for call in responses.calls]
+    assert urls.count("https://api.gateio.ws/api/v4/spot/markets") == 1
+
+@responses.activate
+def test_coingecko_search_cached_including_misses(handler):
+    """Test that each symbol is searched once and unlisted ones skip the coin request"""
+    search = "https://pro-api.coingecko.com/api/v3/search"
+    responses.add(responses.GET, search, match=[responses.matchers.query_param_matcher({'query': 'RSIC'})],
+                  json={'coins': [{'id': 'other', 'symbol': 'x'}, {'id': 'rsic-genesis', 'symbol': 'rsic'}]})
+    responses.add(responses.GET, search, match=[responses.matchers.query_param_matcher({'query': 'NOPE'})],
+                  json={'coins': []})
+    responses.add(responses.GET, search, match=[responses.matchers.query_param_matcher({'query': 'FUZZ'})],
+                  json={'coins': [{'id': 'fuzzy-coin', 'symbol': 'fuzzy'}]})
+
+    assert handler.get_coingecko_id('RSIC') == 'rsic-genesis'
+    assert handler.get_coingecko_id('RSIC') == 'rsic-genesis'
+    assert handler.get_coingecko_data('NOPE') is None
+    assert handler.get_coingecko_data('NOPE') is None
+    assert len(responses.calls) == 2
+
+    # Without an exact symbol match the first result is used but not remembered
+    assert handler.get_coingecko_id('FUZZ') == 'fuzzy-coin'
+    assert handler.get_coingecko_id('FUZZ') == 'fuzzy-coin'
+    assert len(responses.calls) == 4
+
+    handler.coingecko_ids.flush()
+    assert CoinGeckoIdCache(handler.coingecko_ids.path).get('RSIC') == 'rsic-genesis'
+
+@responses.activate
+def test_coingecko_quoted_in_bulk_per_cycle(mocker, handler):
+    """Test that resolved CoinGecko IDs are quoted by one /coins/markets request per cycle"""
+    mocker.patch.object(handler, '_fetch_btc_price', return_value=50000.0)
+    responses.add(responses.GET, "https://pro-api.coingecko.com/api/v3/coins/markets", json=[
+        {'id': 'ordinals', 'current_price': 30.0, 'total_volume': 100000.0, 'price_change_percentage_24h': 4.0},
+        {'id': 'dogs-token', 'current_price': 0, 'total_volume': 0}
+    ])
+    handler.coingecko_ids.put('DOGS', 'dogs-token')
+    handler.coingecko_ids.put('STAMP', 'stamp')
+    handler.config['data_sources']['bitcoin_ecosystem'].update({
+        'tokens': ['ORDI', 'DOGS', 'STAMP'],
+        'sources': {token: ['coingecko'] for token in ['ORDI', 'DOGS', 'STAMP']},
+        'coingecko_ids': {'ORDI': 'ordinals'}
+    })
+
+    market_data = handler.get_all_market_data()
+
+    assert market_data['ordi']['price'] == 30.0
+    assert market_data['ordi']['volume'] == 2.0
+    assert 'dogs' not in market_data and 'stamp' not in market_data
+    assert len(responses.calls) == 1
+    assert responses.calls[0].request.params['ids'] == 'dogs-token,ordinals,stamp'
+
+def test_coingecko_bulk_quote_bounded_by_source_deadline(mocker, handler):
+    """Test that a slow /coins/markets request is abandoned at the source deadline"""
+    mocker.patch.object(handler, 'get_coingecko_markets', side_effect=slow_quote(2, 30.0))
+    entry = PlanEntry('ORDI', 'BRC20', [default_registry().get('coingecko')])
+    handler.coingecko_ids.put('ORDI', 'ordinals')
+
+    start = time.monotonic()
+    assert handler._prefetch_coingecko([entry]) is None
+    assert time.monotonic() - start < 1
+
+def test_fetch_falls_back_to_next_source(mocker, handler):
+    """Test that a token is served by its next source when the first has no data"""
+    mocker.patch.object(handler, 'get_okx_data', return_value=None)
+    mocker.patch.object(handler, 'get_unisat_data', return_value={'price': 9.0, 'volume': 1.0, 'change_24h': 2.0})
+    entry = handler.planner.build(['ORDI'])[0]
+
+    assert handler.fetch_with_fallbacks(entry)['price'] == 9.0
+    handler.get_okx_data.assert_called_once_with('ORDI')
+
+@responses.activate
+def test_okx_read_from_live_stream(mocker, handler):
+    """Test that pairs the ticker stream holds are not fetched over REST"""
+    stream = mocker.MagicMock()
+    stream.has_all.side_effect = lambda pairs: all(pair in ('BTC-USDT', 'DOGS-USDT') for pair in pairs)
+    stream.get_market_data.side_effect = lambda pairs: {
+        pair: {'price': 50000.0 if pair == 'BTC-USDT' else 2.0, 'volume': 100000.0} for pair in pairs
+    }
+    handler.okx_stream = stream
+    handler.history.append('dogs', {'price': 1.6, 'volume': 1.0, 'change_24h': 0, 'source': 'okx'},
+                           timestamp=time.time() - 86400)
+
+    ticker = handler.get_okx_data('DOGS')
+
+    assert ticker['price'] == 2.0
+    assert ticker['volume'] == 2.0
+    assert len(responses.calls) == 0
+    assert handler.okx_pairs() == ['BTC-USDT', 'DOGS-USDT', 'ORDI-USDT']
+
+def test_okx_change_computed_from_history(handler, bulk_tickers):
+    """Test that recorded history replaces the candle request for the 24h change"""
+    handler.history.append('dogs', {'price': 1.6, 'volume': 1.0, 'change_24h': 0, 'source': 'okx'},
+                           timestamp=time.time() - 86400)
+
+    assert handler.get_okx_data('DOGS')['change_24h'] == pytest.approx(25.0)
+    urls = [call.request.url.split('?')[0] for call in bulk_tickers.calls]
+    assert "https://www.okx.com/api/v5/market/candles" not in urls
+
+def test_get_all_market_data_records_history(mocker, handler):
+    """Test that each cycle's snapshots are appended to the history"""
+    mocker.patch.object(handler, '_fetch_btc_price', return_value=50000.0)
+    mocker.patch.object(handler, 'fetch_with_fallbacks', return_value={'price': 2.0, 'volume': 1.0, 'change_24h': 3.0})
+
+    handler.get_all_market_data()
+
+    snapshots = handler.history.range('ordi')
+    assert len(snapshots) == 1
+    assert snapshots[0]['price'] == 2.0
+
+def test_handler_aggregates_across_venues(mocker, handler):
+    """Test that the handler adds the aggregation venues to a token's sources"""
+    handler.aggregate_sources = True
+    handler.aggregation_venues = ['okx', 'kucoin']
+    mocker.patch.object(handler, 'get_gateio_data', return_value=Ticker(price=0.50, volume=1.0, change_24h=2.0))
+    mocker.patch.object(handler, 'get_kucoin_data', return_value=Ticker(price=0.52, volume=1.0, change_24h=4.0))
+    mocker.patch.object(handler, 'get_okx_data', return_value=None)
+
+    merged = handler.fetch_with_fallbacks(PlanEntry('FB', 'FB', [handler.planner.registry.get('gateio')]))
+
+    assert merged['price'] == pytest.approx(0.51)
+    assert merged['change_24h'] == pytest.approx(3.0)
+
+@responses.activate
+def test_coingecko_falls_back_to_free_api_when_pro_circuit_open(mocker, handler):
+    """Test that an open Pro circuit keeps CoinGecko ranked and quoted through the free API"""
+    health = HealthRegistry(min_calls=1, cooldown=60)
+    handler.health = health
+    handler.session = PooledSession(health=health)
+    mocker.patch.object(handler, '_fetch_btc_price', return_value=50000.0)
+    handler.coingecko_ids.put('ORDI', 'ordinals')
+    health.record('pro-api.coingecko.com', False, 0.1)
+    responses.add(responses.GET, "https://api.coingecko.com/api/v3/coins/ordinals", json={'market_data': {
+        'current_price': {'usd': 40.0}, 'total_volume': {'usd': 1000000.0}, 'price_change_percentage_24h': 2.5
+    }})
+
+    coingecko = default_registry().get('coingecko')
+    assert health.rank([coingecko]) == [coingecko]
+    ticker = handler.get_coingecko_data('ORDI')
+
+    assert ticker.price == 40.0
+    assert [call.request.url.split('?')[0] for call in responses.calls] == [
+        "https://api.coingecko.com/api/v3/coins/ordinals"
+    ]
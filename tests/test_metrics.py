@@ -0,0 +1,85 @@
+import pytest
+import urllib.request
+from crypto_twitter_bot import metrics as metrics_module
+from crypto_twitter_bot.cache import TTLCache
+from crypto_twitter_bot.metrics import MetricsRegistry, get_metrics, timed
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, '_metrics', registry)
+    yield registry
+    registry.shutdown()
+
+def test_timed_counts_outcomes(registry):
+    """Test that timed records ok, empty, failed and error calls separately"""
+    @timed()
+    def fetch(value):
+        if value == 'boom':
+            raise ValueError(value)
+        return value
+
+    fetch('data')
+    fetch(None)
+    fetch(False)
+    with pytest.raises(ValueError):
+        fetch('boom')
+
+    assert registry.counter_value('calls_total', function='fetch', outcome='ok') == 1
+    assert registry.counter_value('calls_total', function='fetch', outcome='empty') == 1
+    assert registry.counter_value('calls_total', function='fetch', outcome='failed') == 1
+    assert registry.counter_value('calls_total', function='fetch', outcome='error') == 1
+    assert registry.histogram('call_duration_seconds', function='fetch').count == 4
+
+def test_span_records_error_outcome(registry):
+    """Test that a span re-raises and counts the failure"""
+    with pytest.raises(RuntimeError):
+        with registry.span('fallback', source='gateio'):
+            raise RuntimeError("down")
+
+    assert registry.counter_value('spans_total', span='fallback', source='gateio', outcome='error') == 1
+    assert registry.histogram('span_duration_seconds', span='fallback', source='gateio').count == 1
+
+def test_render_prometheus_format(registry):
+    """Test the text exposition of counters and cumulative histogram buckets"""
+    registry.inc('source_fallbacks_total', token='ORDI', source='okx')
+    registry.inc('source_fallbacks_total', token='ORDI', source='okx')
+    registry.inc('errors_total', message='say "hi"\n')
+    registry.observe('latency_seconds', 0.02, host='www.okx.com')
+    registry.observe('latency_seconds', 3, host='www.okx.com')
+
+    text = registry.render()
+
+    assert '# TYPE crypto_bot_source_fallbacks_total counter' in text
+    assert 'crypto_bot_source_fallbacks_total{source="okx",token="ORDI"} 2' in text
+    assert 'crypto_bot_errors_total{message="say \\"hi\\"\\n"} 1' in text
+    assert '# TYPE crypto_bot_latency_seconds histogram' in text
+    assert 'crypto_bot_latency_seconds_bucket{host="www.okx.com",le="0.01"} 0' in text
+    assert 'crypto_bot_latency_seconds_bucket{host="www.okx.com",le="0.025"} 1' in text
+    assert 'crypto_bot_latency_seconds_bucket{host="www.okx.com",le="5.0"} 2' in text
+    assert 'crypto_bot_latency_seconds_bucket{host="www.okx.com",le="+Inf"} 2' in text
+    assert 'crypto_bot_latency_seconds_sum{host="www.okx.com"} 3.02' in text
+    assert 'crypto_bot_latency_seconds_count{host="www.okx.com"} 2' in text
+
+def test_write_and_serve(registry, tmp_path):
+    """Test exporting to the textfile collector and over HTTP"""
+    registry.inc('calls_total', function='fetch', outcome='ok')
+
+    path = tmp_path / 'metrics' / 'bot.prom'
+    registry.write(path)
+    assert 'crypto_bot_calls_total{function="fetch",outcome="ok"} 1' in path.read_text()
+
+    port = registry.serve(0)
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        assert response.status == 200
+        assert 'crypto_bot_calls_total' in response.read().decode('utf-8')
+
+def test_cache_hit_counting(registry):
+    """Test that a named cache counts misses and hits"""
+    cache = TTLCache(ttl=60, name='tickers')
+    cache.get('BTC', lambda: 1)
+    cache.get('BTC', lambda: 2)
+
+    assert get_metrics() is registry
+    assert registry.counter_value('cache_requests_total', cache='tickers', result='miss') == 1
+    assert registry.counter_value('cache_requests_total', cache='tickers', result='hit') == 1
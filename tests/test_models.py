@@ -0,0 +1,45 @@
+import pytest
+from crypto_twitter_bot.analytics import TickerFrame
+from crypto_twitter_bot.models import MarketSnapshot, Ticker
+
+def test_ticker_reads_like_a_dict():
+    """Test the dict view of a ticker, leaving unset fields out"""
+    ticker = Ticker(price=0.8, volume=0.5, change_24h=0.0, protocol='Runes')
+
+    assert ticker == {'protocol': 'Runes', 'price': 0.8, 'volume': 0.5, 'change_24h': 0.0}
+    assert ticker.get('market_strength', 0) == 0
+    assert 'timed_out' not in ticker
+    assert {**ticker}['price'] == 0.8
+    assert not hasattr(ticker, '__dict__')
+
+def test_ticker_from_mapping():
+    """Test converting a fetcher dict and rejecting unknown fields on write"""
+    ticker = Ticker.from_mapping({'price': 1.0, 'volume': 2.0, 'change_24h': 3.0, 'extra': 'ignored'})
+
+    assert dict(ticker) == {'price': 1.0, 'volume': 2.0, 'change_24h': 3.0}
+    ticker['protocol'] = 'BRC20'
+    assert ticker.protocol == 'BRC20'
+    with pytest.raises(KeyError):
+        ticker['extra'] = 1
+
+def test_snapshot_updates_rows_in_place():
+    """Test that a symbol keeps its row when updated"""
+    snapshot = MarketSnapshot({'BTC-USDT': {'price': 50000.0, 'volume': 10.0, 'change_24h': 1.0}})
+    snapshot.update('ETH-USDT', Ticker(price=3000.0, volume=5.0))
+    snapshot.update('BTC-USDT', Ticker(price=51000.0, volume=12.0, change_24h=2.0))
+
+    assert list(snapshot) == ['BTC-USDT', 'ETH-USDT']
+    assert len(snapshot.columns['price']) == 2
+    assert snapshot['BTC-USDT'] == {'price': 51000.0, 'volume': 12.0, 'change_24h': 2.0}
+    assert 'change_24h' not in snapshot['ETH-USDT']
+
+def test_frame_from_snapshot():
+    """Test reading snapshot columns into the analytics frame"""
+    snapshot = MarketSnapshot({
+        'a': {'price': 1.0, 'volume': 1.0, 'change_24h': 4.0},
+        'b': {'price': 2.0, 'volume': 3.0, 'change_24h': -2.0}
+    })
+
+    frame = TickerFrame.from_snapshot(snapshot)
+    assert frame.vwap_change() == pytest.approx((4.0 - 6.0) / 4.0)
+    assert [frame.symbols[i] for i in frame.ranks()] == ['b', 'a']
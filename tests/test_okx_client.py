@@ -2,7 +2,8 @@ import pytest
 import responses
 import json
 from unittest.mock import patch
-from crypto_twitter_bot.okx_handler import OKXHandler
+from crypto_twitter_bot.analytics import TickerFrame
+from crypto_twitter_bot.okx_handler import OKXHandler, iter_json_array, parse_ticker
 from datetime import datetime, UTC
 
 @pytest.fixture
@@ -161,4 +162,45 @@ def test_market_data_edge_cases(okx_client):
         
         result = okx_client.get_market_data(['BTC-USDT'])
         # When high == low, market_strength should be 0.0 since (price - low) / 1 = 0
-        assert result['BTC-USDT']['market_strength'] == 0.0 
\ No newline at end of file
+        assert result['BTC-USDT']['market_strength'] == 0.0
+
+def test_parse_ticker_matches_frame(mock_okx_response):
+    """Test that the scalar parse used by the stream agrees with the columnar one"""
+    for ticker in mock_okx_response['data']:
+        expected = TickerFrame.from_okx([ticker]).records()[ticker['instId']]
+        entry = parse_ticker(ticker)
+        for field in ('price', 'volume', 'change_24h', 'high_24h', 'low_24h', 'market_strength'):
+            assert entry[field] == pytest.approx(expected[field])
+
+    with pytest.raises(ValueError):
+        parse_ticker({**mock_okx_response['data'][0], 'last': ''})
+
+def test_iter_json_array_across_chunks(mock_okx_response):
+    """Test that array items are decoded when split across arbitrary chunks"""
+    payload = json.dumps(mock_okx_response).encode()
+    chunks = [payload[i:i + 7] for i in range(0, len(payload), 7)]
+
+    items = list(iter_json_array(iter(chunks), 'data'))
+    assert [item['instId'] for item in items] == ['BTC-USDT', 'ETH-USDT']
+
+def test_iter_json_array_truncated():
+    """Test that a truncated document is reported"""
+    with pytest.raises(ValueError):
+        list(iter_json_array(iter([b'{"code":"0","data":[{"instId":"BTC']), 'data'))
+
+def test_get_market_data_stops_after_requested_pairs(okx_client, mock_okx_response):
+    """Test that only requested pairs are built and parsing stops once all are found"""
+    # Anything after the requested pair is never parsed
+    body = json.dumps(mock_okx_response).replace(']}', ', {"instId": broken]}')
+
+    with responses.RequestsMock() as rsps:
+        rsps.add(
+            responses.GET,
+            f"{okx_client.base_url}/api/v5/market/tickers",
+            body=body,
+            status=200
+        )
+
+        result = okx_client.get_market_data(['ETH-USDT'])
+        assert list(result) == ['ETH-USDT']
+        assert result['ETH-USDT']['price'] == 3000.0
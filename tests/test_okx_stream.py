@@ -0,0 +1,112 @@
+import pytest
+import asyncio
+import json
+import threading
+import time
+import websockets
+from crypto_twitter_bot.okx_handler import OKXHandler
+from crypto_twitter_bot.okx_stream import OKXTickerStream
+
+def ticker(inst_id, last):
+    return {
+        'instId': inst_id,
+        'last': str(last),
+        'vol24h': '1000',
+        'volCcy24h': '50000000',
+        'high24h': str(last + 100),
+        'low24h': str(last - 100)
+    }
+
+class StandInServer:
+    """Local stand-in for the OKX public WebSocket"""
+
+    def __init__(self, drop_first=False):
+        self.drop_first = drop_first
+        self.subscriptions = []
+        self.port = None
+        self._ready = threading.Event()
+        self._loop = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        self._ready.wait(5)
+        return self
+
+    def __exit__(self, *exc):
+        self._loop.call_soon_threadsafe(self._stop.set_result, None)
+        self._thread.join(5)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._loop.run_until_complete(self._serve())
+
+    async def _serve(self):
+        self._stop = self._loop.create_future()
+        async with websockets.serve(self._handler, '127.0.0.1', 0) as server:
+            self.port = list(server.sockets)[0].getsockname()[1]
+            self._ready.set()
+            await self._stop
+
+    async def _handler(self, ws, path=None):
+        request = json.loads(await ws.recv())
+        self.subscriptions.append([arg['instId'] for arg in request['args']])
+        for arg in request['args']:
+            await ws.send(json.dumps({'event': 'subscribe', 'arg': arg}))
+
+        price = 50000 + len(self.subscriptions)
+        for arg in request['args']:
+            await ws.send(json.dumps({'arg': arg, 'data': [ticker(arg['instId'], price)]}))
+
+        if self.drop_first and len(self.subscriptions) == 1:
+            return
+        async for message in ws:
+            if message == 'ping':
+                await ws.send('pong')
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_stream_builds_snapshot():
+    """Test that pushed tickers are exposed in the REST result shape"""
+    with StandInServer() as server:
+        stream = OKXTickerStream(['BTC-USDT', 'ETH-USDT'], url=f"ws://127.0.0.1:{server.port}")
+        stream.start()
+        try:
+            assert wait_for(lambda: stream.has_all(['BTC-USDT', 'ETH-USDT']))
+            data = stream.get_market_data(['BTC-USDT'])
+            assert data['BTC-USDT']['price'] == 50001.0
+            assert data['BTC-USDT']['market_strength'] == 50.0
+            assert set(data['BTC-USDT']) == {
+                'price', 'change_24h', 'volume', 'high_24h', 'low_24h', 'timestamp', 'market_strength'
+            }
+        finally:
+            stream.stop()
+
+def test_stream_reconnects_and_resubscribes():
+    """Test that a dropped connection is re-established with the same subscriptions"""
+    with StandInServer(drop_first=True) as server:
+        stream = OKXTickerStream(['BTC-USDT'], url=f"ws://127.0.0.1:{server.port}", reconnect_delay=0.05)
+        stream.start()
+        try:
+            assert wait_for(lambda: len(server.subscriptions) == 2 and stream.has_all(['BTC-USDT']))
+            assert wait_for(lambda: stream.get_market_data()['BTC-USDT']['price'] == 50002.0)
+            assert server.subscriptions == [['BTC-USDT'], ['BTC-USDT']]
+        finally:
+            stream.stop()
+
+def test_handler_reads_from_live_stream(mocker):
+    """Test that OKXHandler skips REST polling while the stream is live"""
+    stream = mocker.MagicMock()
+    stream.has_all.return_value = True
+    stream.get_market_data.return_value = {'BTC-USDT': {'price': 1.0}}
+    session = mocker.MagicMock()
+
+    handler = OKXHandler('key', 'secret', 'passphrase', stream=stream, session=session)
+    assert handler.get_market_data(['BTC-USDT']) == {'BTC-USDT': {'price': 1.0}}
+    session.get.assert_not_called()
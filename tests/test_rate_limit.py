@@ -0,0 +1,104 @@
+import pytest
+import threading
+import time
+import responses
+from crypto_twitter_bot.rate_limit import RateLimiter, TokenBucket, parse_retry_after
+from crypto_twitter_bot.transport import PooledSession
+
+def test_bucket_paces_concurrent_callers():
+    """Test that concurrent callers together never exceed the bucket rate"""
+    bucket = TokenBucket(rate=20, burst=2)
+    stamps = []
+
+    def worker():
+        bucket.acquire()
+        stamps.append(time.monotonic())
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Two burst tokens, then four more at 20/s
+    assert time.monotonic() - start >= 0.18
+    assert len(stamps) == 6
+
+def test_bucket_acquire_timeout():
+    """Test that acquire gives up when no token frees up in time"""
+    bucket = TokenBucket(rate=1, burst=1)
+    assert bucket.acquire(timeout=0.01)
+    assert not bucket.acquire(timeout=0.05)
+
+def test_penalize_blocks_bucket():
+    """Test that a penalty delays the next token"""
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.penalize(0.1)
+
+    start = time.monotonic()
+    bucket.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_acquire_fails_fast_past_a_long_penalty():
+    """Test that a penalty outlasting the timeout fails acquire without waiting"""
+    bucket = TokenBucket(rate=100, burst=10)
+    bucket.penalize(25)
+
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=1.0)
+    assert time.monotonic() - start < 0.1
+
+def test_backoff_grows_and_honours_retry_after(mocker):
+    """Test exponential backoff with jitter and the Retry-After override"""
+    mocker.patch('crypto_twitter_bot.rate_limit.random.uniform', side_effect=lambda low, high: high)
+    limiter = RateLimiter(backoff_base=0.01, max_backoff=1)
+
+    assert limiter.backoff('api.gateio.ws') == pytest.approx(0.02)
+    assert limiter.backoff('api.gateio.ws') == pytest.approx(0.04)
+    assert limiter.backoff('api.gateio.ws', retry_after='0.5') == 0.5
+    limiter.reset('api.gateio.ws')
+    assert limiter.backoff('api.gateio.ws') == pytest.approx(0.02)
+
+def test_parse_retry_after():
+    assert parse_retry_after('3') == 3.0
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+@responses.activate
+def test_session_retries_after_429():
+    """Test that a 429 is retried once the backoff has passed"""
+    url = "https://api.coingecko.com/api/v3/coins/ordinals"
+    responses.add(responses.GET, url, status=429, headers={'Retry-After': '0.1'})
+    responses.add(responses.GET, url, json={'id': 'ordinals'})
+    session = PooledSession(rate_limiter=RateLimiter({'api.coingecko.com': {'rate': 100, 'burst': 5}}))
+
+    start = time.monotonic()
+    response = session.get(url)
+
+    assert response.json() == {'id': 'ordinals'}
+    assert len(responses.calls) == 2
+    assert time.monotonic() - start >= 0.09
+
+@responses.activate
+def test_session_gives_up_after_max_retries():
+    """Test that the last 429 is returned to the caller"""
+    url = "https://api.binance.com/api/v3/ticker/24hr"
+    responses.add(responses.GET, url, status=429, headers={'Retry-After': '0'})
+    session = PooledSession(rate_limiter=RateLimiter(max_retries=1))
+
+    assert session.get(url).status_code == 429
+    assert len(responses.calls) == 2
+
+@responses.activate
+def test_session_returns_429_when_backoff_outlasts_timeout():
+    """Test that a Retry-After longer than the timeout returns the 429 at once"""
+    url = "https://api.binance.com/api/v3/ticker/24hr"
+    responses.add(responses.GET, url, status=429, headers={'Retry-After': '25'})
+    session = PooledSession(timeout=1, rate_limiter=RateLimiter(max_retries=2))
+
+    start = time.monotonic()
+    assert session.get(url).status_code == 429
+    assert len(responses.calls) == 1
+    assert time.monotonic() - start < 0.5
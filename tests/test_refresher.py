@@ -0,0 +1,128 @@
+import pytest
+import threading
+import time
+from crypto_twitter_bot.refresher import MarketDataRefresher, SnapshotStore
+from crypto_twitter_bot.scheduler import Scheduler
+
+@pytest.fixture
+def config():
+    return {
+        'data_sources': {
+            'okx': {'pairs': ['BTC-USDT'], 'interval': 300},
+            'bitcoin_ecosystem': {'tokens': ['ORDI'], 'update_interval': 86400}
+        }
+    }
+
+@pytest.fixture
+def refresher(mocker, config):
+    handler = mocker.MagicMock()
+    handler.get_all_market_data.return_value = {'ordi': {'price': 30.0}, 'overall_trend': 'up'}
+    okx_handler = mocker.MagicMock()
+    okx_handler.get_market_data.return_value = {'BTC-USDT': {'price': 50000.0}}
+    return MarketDataRefresher(handler=handler, okx_handler=okx_handler, config=config)
+
+def test_store_max_age():
+    """Test that snapshots older than the requested age are not returned"""
+    store = SnapshotStore()
+    store.put('okx', {'BTC-USDT': {}}, timestamp=time.time() - 600)
+
+    assert store.get('okx') == {'BTC-USDT': {}}
+    assert store.get('okx', max_age=300) is None
+    assert store.age('okx') == pytest.approx(600, abs=1)
+    assert store.get('missing') is None
+
+def test_latest_reads_without_fetching(refresher):
+    """Test that readers take the stored snapshot instead of fetching again"""
+    refresher.refresh('bitcoin_ecosystem')
+
+    assert refresher.latest('bitcoin_ecosystem')['ordi']['price'] == 30.0
+    assert refresher.latest('bitcoin_ecosystem', max_age=60)['overall_trend'] == 'up'
+    assert refresher.handler.get_all_market_data.call_count == 1
+
+def test_failed_refresh_keeps_snapshot(refresher):
+    """Test that a failed refresh leaves the previous snapshot in place"""
+    refresher.store.put('okx', {'BTC-USDT': {'price': 49000.0}}, timestamp=time.time() - 600)
+    refresher.okx_handler.get_market_data.side_effect = Exception("OKX API error")
+
+    assert refresher.latest('okx', max_age=300) == {'BTC-USDT': {'price': 49000.0}}
+
+def test_reader_waits_for_running_refresh(refresher):
+    """Test that a read during a refresh waits for it instead of fetching twice"""
+    release = threading.Event()
+
+    def slow_fetch():
+        release.wait(2)
+        return {'ordi': {'price': 31.0}}
+
+    refresher.handler.get_all_market_data.side_effect = slow_fetch
+    worker = threading.Thread(target=refresher.refresh, args=('bitcoin_ecosystem',))
+    worker.start()
+    time.sleep(0.05)
+    threading.Timer(0.1, release.set).start()
+
+    assert refresher.latest('bitcoin_ecosystem')['ordi']['price'] == 31.0
+    worker.join()
+    assert refresher.handler.get_all_market_data.call_count == 1
+
+def test_schedule_refreshes_read_sources(refresher):
+    """Test that scheduled sources are refreshed at startup and then on their own interval"""
+    scheduler = Scheduler()
+    refresher.schedule(scheduler)
+    scheduler.start()
+    try:
+        time.sleep(0.2)
+        assert refresher.store.get('bitcoin_ecosystem')
+        assert scheduler.next_run('refresh_bitcoin_ecosystem') - time.time() > 300
+        # Nothing reads the OKX pairs on a schedule, so they are only fetched on demand
+        assert scheduler.next_run('refresh_okx') is None
+        refresher.okx_handler.get_market_data.assert_not_called()
+    finally:
+        scheduler.stop()
+
+def test_scheduled_refresh_skips_fresh_snapshot(refresher):
+    """Test that a refresh with max_age keeps a snapshot younger than it"""
+    refresher.refresh('bitcoin_ecosystem')
+
+    assert refresher.refresh('bitcoin_ecosystem', max_age=60)['overall_trend'] == 'up'
+    assert refresher.handler.get_all_market_data.call_count == 1
+    refresher.store.put('bitcoin_ecosystem', {'ordi': {'price': 29.0}}, timestamp=time.time() - 120)
+    refresher.refresh('bitcoin_ecosystem', max_age=60)
+    assert refresher.handler.get_all_market_data.call_count == 2
+
+def test_fresh_read_does_not_wait_for_refresh(refresher):
+    """Test that a fresh snapshot is returned while a refresh holds the lock"""
+    refresher.store.put('bitcoin_ecosystem', {'ordi': {'price': 30.0}})
+    with refresher._locks['bitcoin_ecosystem']:
+        assert refresher.latest('bitcoin_ecosystem', max_age=60) == {'ordi': {'price': 30.0}}
+
+def test_websocket_mode_runs_okx_stream(mocker, config):
+    """Test that websocket mode hands a started OKX ticker stream to the OKX handler"""
+    config['data_sources']['okx']['mode'] = 'websocket'
+    stream_class = mocker.patch('crypto_twitter_bot.refresher.OKXTickerStream')
+    handler = mocker.MagicMock()
+    handler.okx_pairs.return_value = ['BTC-USDT', 'ORDI-USDT']
+    refresher = MarketDataRefresher(handler=handler, config=config)
+
+    stream_class.assert_called_once_with(['BTC-USDT', 'ORDI-USDT'])
+    assert refresher.okx_handler.stream is stream_class.return_value
+    assert handler.okx_stream is stream_class.return_value
+    refresher.start()
+    stream_class.return_value.start.assert_called_once()
+    refresher.stop()
+    stream_class.return_value.stop.assert_called_once()
+
+def test_unpriced_refresh_keeps_snapshot(refresher):
+    """Test that a cycle where every source failed does not replace the snapshot"""
+    refresher.refresh('bitcoin_ecosystem')
+    refresher.handler.get_all_market_data.return_value = {'overall_trend': 'down'}
+
+    assert refresher.refresh('bitcoin_ecosystem') is None
+    assert refresher.store.get('bitcoin_ecosystem')['ordi']['price'] == 30.0
+
+def test_stale_fallback_is_capped(refresher):
+    """Test that a failed refresh falls back only to a snapshot younger than max_stale"""
+    refresher.store.put('bitcoin_ecosystem', {'ordi': {'price': 29.0}}, timestamp=time.time() - 12 * 3600)
+    refresher.handler.get_all_market_data.side_effect = Exception("every host down")
+
+    assert refresher.latest('bitcoin_ecosystem', max_age=240, max_stale=3600) is None
+    assert refresher.latest('bitcoin_ecosystem', max_age=240)['ordi']['price'] == 29.0
@@ -0,0 +1,96 @@
+import pytest
+import threading
+import time
+from datetime import datetime
+from crypto_twitter_bot.scheduler import Scheduler, next_daily, next_slot
+
+@pytest.fixture
+def scheduler():
+    scheduler = Scheduler()
+    scheduler.start()
+    yield scheduler
+    scheduler.stop()
+
+def test_next_slot_alignment():
+    """Test that slots fall on multiples of the interval, shifted by the offset"""
+    assert next_slot(1000, 14400) == 14400
+    assert next_slot(14400, 14400) == 28800
+    assert next_slot(1000, 14400, offset=-120) == 14280
+
+def test_job_runs_on_its_deadline(scheduler):
+    """Test that a one-off job fires at its due time, not on a polling tick"""
+    fired = []
+    done = threading.Event()
+    due = time.time() + 0.2
+    scheduler.schedule(due, lambda: (fired.append(time.time()), done.set()), name='once')
+
+    assert done.wait(2)
+    assert 0 <= fired[0] - due < 0.1
+
+def test_repeating_jobs_in_slot_order(scheduler):
+    """Test that a job offset before the slot runs before the job on the slot"""
+    order = []
+    scheduler.every(0.2, lambda: order.append('prewarm'), name='prewarm', offset=-0.05)
+    scheduler.every(0.2, lambda: order.append('post'), name='post')
+
+    time.sleep(0.65)
+    if order[0] == 'post':
+        # Started inside the lead window of the first slot
+        order = order[1:]
+    assert order[:4] == ['prewarm', 'post', 'prewarm', 'post']
+    assert scheduler.next_run('post') > time.time()
+
+def test_slow_job_does_not_delay_others(scheduler):
+    """Test that jobs run on workers, so the loop keeps its timing"""
+    release = threading.Event()
+    done = threading.Event()
+    now = time.time()
+    scheduler.schedule(now + 0.05, lambda: release.wait(2), name='slow')
+    scheduler.schedule(now + 0.1, done.set, name='fast')
+
+    assert done.wait(0.5)
+    release.set()
+
+def test_failing_job_keeps_repeating(scheduler):
+    """Test that an exception in a job does not stop its schedule"""
+    calls = []
+
+    def broken():
+        calls.append(1)
+        raise ValueError("boom")
+
+    scheduler.every(0.1, broken, name='broken')
+    time.sleep(0.35)
+    assert len(calls) >= 2
+
+def test_callable_interval_requeues_job(scheduler):
+    """Test that a job with a callable interval is requeued at the time it gives"""
+    calls = []
+    scheduler.schedule(time.time() + 0.05, lambda: calls.append(1), name='custom', interval=lambda now: now + 0.1)
+
+    time.sleep(0.3)
+    assert len(calls) >= 2
+
+def test_daily_slots_follow_local_time_across_dst(monkeypatch):
+    """Test that daily jobs keep their local wall-clock time when the clocks change"""
+    monkeypatch.setenv('TZ', 'Europe/Berlin')
+    time.tzset()
+    try:
+        # Clocks go forward on 2026-03-29 and back on 2026-10-25
+        before_spring = datetime(2026, 3, 28, 9, 0).timestamp()
+        before_autumn = datetime(2026, 10, 24, 9, 0).timestamp()
+        for now in (before_spring, before_autumn):
+            due = next_daily(now, "08:00")
+            assert datetime.fromtimestamp(due).hour == 8
+            assert datetime.fromtimestamp(next_daily(due, "08:00")).hour == 8
+        assert next_daily(before_spring, "08:00") - before_spring == 22 * 3600
+        assert next_daily(datetime(2026, 3, 28, 7, 0).timestamp(), "08:00", offset=-120) == \
+            datetime(2026, 3, 28, 7, 58).timestamp()
+
+        scheduler = Scheduler(clock=lambda: before_spring)
+        scheduler.daily("08:00", lambda: None, name='morning')
+        assert scheduler.next_run('morning') == datetime(2026, 3, 29, 8, 0).timestamp()
+        scheduler.stop()
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
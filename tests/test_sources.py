@@ -0,0 +1,58 @@
+import pytest
+from crypto_twitter_bot.sources import FetchPlanner, SourceAdapter, SourceRegistry, default_registry
+
+@pytest.fixture
+def registry():
+    return default_registry()
+
+def make_config(**settings):
+    return {'data_sources': {'bitcoin_ecosystem': settings}}
+
+def test_plan_uses_configured_sources(registry):
+    """Test that configured source lists are kept in order"""
+    config = make_config(tokens=['DOGS'], protocols={'DOGS': 'Runes'}, sources={'DOGS': ['okx', 'magiceden']})
+    plan = FetchPlanner(registry, config).build()
+
+    assert len(plan) == 1
+    assert plan[0].token == 'DOGS'
+    assert plan[0].protocol == 'Runes'
+    assert [source.name for source in plan[0].sources] == ['okx', 'magiceden']
+
+def test_plan_defaults_to_covering_sources_by_priority(registry):
+    """Test that a new token only needs to be listed in the config"""
+    config = make_config(tokens=['PUPS'], protocols={'PUPS': 'BRC20'})
+    plan = FetchPlanner(registry, config).build()
+
+    assert plan[0].protocol == 'BRC20'
+    assert [source.name for source in plan[0].sources] == ['okx', 'unisat', 'gateio']
+
+def test_plan_skips_sources_for_other_protocols(registry):
+    """Test that protocol-specific adapters only serve their protocol"""
+    plan = FetchPlanner(registry, make_config(tokens=['CKB']), max_sources=10).build()
+    names = [source.name for source in plan[0].sources]
+
+    assert plan[0].protocol == 'CKB'
+    assert 'unisat' not in names
+    assert 'magiceden' not in names
+    assert names[0] == 'okx'
+
+def test_plan_falls_back_to_token_list(registry, mocker):
+    """Test that token_list.txt is used when the config lists no tokens"""
+    mocker.patch('crypto_twitter_bot.sources.load_token_list', return_value=['ORDI', 'FB'])
+    plan = FetchPlanner(registry, make_config()).build()
+
+    assert [entry.token for entry in plan] == ['ORDI', 'FB']
+
+def test_plan_groups_by_venue():
+    """Test grouping planned tokens by their primary venue"""
+    registry = SourceRegistry()
+    registry.register(SourceAdapter('okx', 'okx', None, priority=1, batched=True))
+    registry.register(SourceAdapter('gateio', 'gateio', None, symbols={'FB'}, priority=0, batched=True))
+    plan = FetchPlanner(registry, make_config(tokens=['DOGS', 'FB', 'ORDI'])).build()
+
+    assert plan.by_venue() == {'okx': ['DOGS', 'ORDI'], 'gateio': ['FB']}
+
+def test_unknown_configured_source_is_ignored(registry):
+    """Test that a misspelt source name does not break the plan"""
+    plan = FetchPlanner(registry, make_config(tokens=['FB'], sources={'FB': ['nope', 'gateio']})).build()
+    assert [source.name for source in plan[0].sources] == ['gateio']
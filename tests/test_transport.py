@@ -0,0 +1,60 @@
+import pytest
+import requests
+import responses
+from crypto_twitter_bot import metrics as metrics_module
+from crypto_twitter_bot.candles import CandleCache
+from crypto_twitter_bot.coingecko_ids import CoinGeckoIdCache
+from crypto_twitter_bot.health import HealthRegistry
+from crypto_twitter_bot.history import MarketHistory
+from crypto_twitter_bot.market_data_handler import MarketDataHandler
+from crypto_twitter_bot.metrics import MetricsRegistry
+from crypto_twitter_bot.okx_handler import OKXHandler
+from crypto_twitter_bot.transport import PooledSession, get_session
+
+def test_pool_size_per_host():
+    """Test that configured hosts get their own pool"""
+    session = PooledSession(pool_sizes={'www.okx.com': 8}, default_pool_size=2)
+
+    assert session.get_adapter("https://www.okx.com/api/v5/market/tickers")._pool_maxsize == 8
+    assert session.get_adapter("https://api.gateio.ws/api/v4/spot/tickers")._pool_maxsize == 2
+
+@responses.activate
+def test_default_timeout_applied():
+    """Test that requests without a timeout get the session default"""
+    responses.add(responses.GET, "https://api.binance.com/api/v3/ticker/24hr", json={})
+    session = PooledSession(timeout=3)
+
+    session.get("https://api.binance.com/api/v3/ticker/24hr")
+    session.get("https://api.binance.com/api/v3/ticker/24hr", timeout=1)
+
+    assert responses.calls[0].request.req_kwargs['timeout'] == 3
+    assert responses.calls[1].request.req_kwargs['timeout'] == 1
+
+def test_handlers_share_transport(tmp_path):
+    """Test that both handlers reuse the process-wide session"""
+    handler = MarketDataHandler(
+        history=MarketHistory(':memory:'),
+        candles=CandleCache(get_session(), tmp_path / 'candles'),
+        coingecko_ids=CoinGeckoIdCache(tmp_path / 'coingecko_ids.json')
+    )
+    assert handler.session is get_session()
+    assert OKXHandler('key', 'secret', 'passphrase').session is get_session()
+
+@responses.activate
+def test_request_duration_recorded_for_failures(monkeypatch):
+    """Test that failed and timed-out requests are timed with their outcome"""
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics_module, '_metrics', registry)
+    url = "https://api.gateio.ws/api/v4/spot/tickers"
+    responses.add(responses.GET, url, json=[])
+    responses.add(responses.GET, url, status=503)
+    responses.add(responses.GET, url, body=requests.exceptions.ReadTimeout("timed out"))
+    session = PooledSession(health=HealthRegistry(min_calls=10))
+
+    session.get(url)
+    session.get(url)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.get(url)
+
+    for outcome in ('ok', 'failed', 'error'):
+        assert registry.histogram('http_request_duration_seconds', host='api.gateio.ws', outcome=outcome).count == 1
@@ -0,0 +1,133 @@
+import pytest
+import threading
+import time
+from crypto_twitter_bot.tweet_queue import TweetQueue, TweetSender
+
+@pytest.fixture
+def queue(tmp_path):
+    store = TweetQueue(str(tmp_path / "tweets.db"), min_interval=60, max_per_day=2, backoff_base=10)
+    yield store
+    store.close()
+
+def test_dedupe_survives_restart(queue, tmp_path):
+    """Test that the same content is queued once, even from a new process"""
+    assert queue.enqueue("BTC up 5%")
+    assert not queue.enqueue("BTC up 5%")
+
+    restarted = TweetQueue(str(tmp_path / "tweets.db"))
+    assert not restarted.enqueue("BTC up 5%")
+    assert restarted.next_due()[1] == "BTC up 5%"
+    restarted.close()
+
+def test_retry_with_backoff(queue):
+    """Test that a failed post is rescheduled and finally given up on"""
+    queue.enqueue("hello", timestamp=1000)
+    digest = queue.next_due()[0]
+
+    delay = queue.mark_failed(digest, "timeout", timestamp=1000)
+    assert 5 <= delay <= 10
+    assert queue.next_post_time(now=1000) == pytest.approx(1000 + delay)
+
+    for _ in range(queue.max_attempts - 1):
+        queue.mark_failed(digest, "timeout")
+    assert queue.counts() == {'failed': 1}
+    assert queue.next_post_time() is None
+
+def test_pacing(queue):
+    """Test the minimum interval between posts and the daily cap"""
+    now = time.time()
+    for i, sent_at in enumerate([now - 7200, now - 30]):
+        queue.enqueue(f"tweet {i}", timestamp=sent_at)
+        queue.mark_sent(queue.next_due()[0], timestamp=sent_at)
+    queue.enqueue("tweet 2", timestamp=now)
+
+    # Two posts in the last day hit the cap; the next slot opens when the first ages out
+    assert queue.next_post_time(now) == pytest.approx(now - 7200 + 86400)
+
+    queue.max_per_day = 10
+    assert queue.next_post_time(now) == pytest.approx(now + 30)
+
+def test_daily_cap_counts_thread_parts(queue):
+    """Test that every posted part of a thread counts against the daily cap"""
+    now = time.time()
+    queue.max_per_day = 3
+    queue.enqueue("thread", timestamp=now - 7200)
+    digest = queue.next_due()[0]
+    for tweet_id in (1, 2, 3):
+        queue.mark_progress(digest, tweet_id)
+    queue.mark_sent(digest, timestamp=now - 7200)
+    queue.enqueue("next", timestamp=now)
+
+    # One queued thread of three tweets already uses the whole cap
+    assert queue.next_post_time(now) == pytest.approx(now - 7200 + 86400)
+
+def test_sender_posts_in_background(mocker, queue):
+    """Test that submitting returns at once and the worker posts and records the tweet"""
+    posted = threading.Event()
+    handler = mocker.MagicMock()
+    handler.post_thread.side_effect = lambda parts, reply_to, on_posted: posted.set() or True
+    sender = TweetSender(queue, handler)
+    sender.start()
+    try:
+        assert sender.submit("gm")
+        assert posted.wait(2)
+    finally:
+        sender.stop()
+
+    assert handler.post_thread.call_args[0][0] == ["gm"]
+    assert queue.counts() == {'sent': 1}
+
+def test_sender_keeps_failed_tweet(mocker, queue):
+    """Test that a failed post stays queued instead of being lost"""
+    handler = mocker.MagicMock()
+    handler.post_thread.return_value = False
+    sender = TweetSender(queue, handler)
+    queue.enqueue("gm")
+
+    assert not sender.send_next()
+    assert queue.counts() == {'pending': 1}
+
+def test_sender_resumes_partly_posted_thread(mocker, queue):
+    """Test that a retry continues a thread after the parts already posted"""
+    lines = [f"asset {i} " + "x" * 150 for i in range(3)]
+    queue.enqueue("\n".join(lines))
+
+    handler = mocker.MagicMock()
+    def fail_after_first(parts, reply_to, on_posted):
+        on_posted(101)
+        return False
+    handler.post_thread.side_effect = fail_after_first
+    sender = TweetSender(queue, handler)
+    assert not sender.send_next()
+
+    queue._conn.execute("UPDATE tweets SET next_attempt = 0")
+    handler.post_thread.side_effect = None
+    handler.post_thread.return_value = True
+    assert sender.send_next()
+
+    parts, = handler.post_thread.call_args[0]
+    assert parts == lines[1:]
+    assert handler.post_thread.call_args[1]['reply_to'] == '101'
+
+def test_sender_posts_first_part_without_reply_support(mocker, queue):
+    """Test that a thread the client cannot link goes out as its first part instead of retrying"""
+    lines = [f"asset {i} " + "x" * 150 for i in range(3)]
+    queue.enqueue("\n".join(lines))
+    handler = mocker.MagicMock()
+    handler.supports_replies.return_value = False
+    handler.post_thread.return_value = True
+
+    assert TweetSender(queue, handler).send_next()
+    assert handler.post_thread.call_args[0][0] == lines[:1]
+    assert queue.counts() == {'sent': 1}
+
+def test_sender_gives_up_on_unlinkable_thread(mocker, queue):
+    """Test that a partly posted thread is failed at once when replies are unsupported"""
+    queue.enqueue("\n".join(f"asset {i} " + "x" * 150 for i in range(3)))
+    queue.mark_progress(queue.next_due()[0], '101')
+    handler = mocker.MagicMock()
+    handler.supports_replies.return_value = False
+
+    assert not TweetSender(queue, handler).send_next()
+    handler.post_thread.assert_not_called()
+    assert queue.counts() == {'failed': 1}
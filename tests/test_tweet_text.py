@@ -0,0 +1,27 @@
+from crypto_twitter_bot.tweet_text import split_thread, weighted_length
+
+def test_weighted_length_counts_cjk_double():
+    """Test Twitter's weighting: Latin counts once, CJK and emoji twice"""
+    assert weighted_length("BTC up") == 6
+    assert weighted_length("比特币") == 6
+    assert weighted_length("$ORDI 上升") == 10
+    assert weighted_length("🚀") == 2
+
+def test_short_update_is_one_tweet():
+    assert split_thread("今日比特币生态市值整体上升，\n\nBRC20协议的$ordi") == ["今日比特币生态市值整体上升，\n\nBRC20协议的$ordi"]
+
+def test_split_at_asset_lines():
+    """Test that a long update becomes a thread without breaking asset lines"""
+    header = "今日比特币生态市值整体上升，"
+    assets = [f"Runes协议的$tok{i}成交量0.55比特币，单价0.820美金，比昨日上升35.5%；" for i in range(6)]
+    update = header + "\n\n" + "\n".join(assets)
+
+    parts = split_thread(update)
+    assert len(parts) > 1
+    assert all(weighted_length(part) <= 280 for part in parts)
+    assert parts[0].startswith(header)
+    assert "\n".join(parts).replace("\n\n", "\n").split("\n")[1:] == assets
+
+def test_overlong_line_is_cut():
+    parts = split_thread("字" * 150)
+    assert [weighted_length(part) for part in parts] == [280, 20]
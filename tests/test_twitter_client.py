@@ -0,0 +1,117 @@
+import json
+import sys
+import types
+import pytest
+
+# The Twitter client is not on PyPI; every test patches TwitterClient anyway
+if 'elyza_os_twitter_client' not in sys.modules:
+    try:
+        import elyza_os_twitter_client
+    except ImportError:
+        stub = types.ModuleType('elyza_os_twitter_client')
+        stub.TwitterClient = type('TwitterClient', (), {})
+        sys.modules['elyza_os_twitter_client'] = stub
+
+from crypto_twitter_bot.twitter_client import TwitterHandler, is_auth_error
+
+class FakeResponse:
+    status_code = 401
+
+class SessionRejected(Exception):
+    response = FakeResponse()
+
+@pytest.fixture
+def client(mocker):
+    """Patch the Twitter client with one exposing a requests-style cookie jar"""
+    client = mocker.MagicMock(spec=['login', 'tweet', 'logout', 'session'])
+    client.session.cookies.get_dict.return_value = {'auth_token': 'abc'}
+    mocker.patch('crypto_twitter_bot.twitter_client.TwitterClient', return_value=client)
+    return client
+
+def test_login_once_across_posts(client, tmp_path):
+    """Test that several posts share one login and the session is saved"""
+    handler = TwitterHandler(data_dir=tmp_path)
+
+    assert handler.post_tweet("first")
+    handler.close()
+    assert handler.post_tweet("second")
+
+    client.login.assert_called_once()
+    client.logout.assert_not_called()
+    assert json.loads((tmp_path / "cookies.json").read_text()) == {'auth_token': 'abc'}
+
+def test_restores_saved_session(client, tmp_path):
+    """Test that a restart reuses the saved cookies instead of logging in"""
+    (tmp_path / "cookies.json").write_text(json.dumps({'auth_token': 'abc'}))
+
+    assert TwitterHandler(data_dir=tmp_path).post_tweet("hello")
+    client.login.assert_not_called()
+    client.session.cookies.update.assert_called_once_with({'auth_token': 'abc'})
+
+def test_relogin_when_session_rejected(client, tmp_path):
+    """Test that a rejected session triggers one fresh login and a retry"""
+    (tmp_path / "cookies.json").write_text(json.dumps({'auth_token': 'expired'}))
+    client.tweet.side_effect = [SessionRejected("session expired"), None]
+
+    assert TwitterHandler(data_dir=tmp_path).post_tweet("hello")
+    client.login.assert_called_once()
+    assert client.tweet.call_count == 2
+
+def test_other_errors_do_not_relogin(client, tmp_path):
+    """Test that non-auth failures are reported without a new login"""
+    handler = TwitterHandler(data_dir=tmp_path)
+    handler.initialize()
+    client.tweet.side_effect = ValueError("duplicate content")
+
+    assert not handler.post_tweet("hello")
+    client.login.assert_called_once()
+
+def test_is_auth_error():
+    assert is_auth_error(SessionRejected("nope"))
+    assert is_auth_error(Exception("Unauthorized"))
+    assert is_auth_error(Exception("Session expired, please log in again"))
+    assert not is_auth_error(Exception("rate limit exceeded"))
+    assert not is_auth_error(Exception("Connection pool is full, discarding session connection"))
+    assert not is_auth_error(Exception("Tweet author could not be resolved"))
+    assert not is_auth_error(Exception("Timed out waiting for login page element"))
+    assert is_auth_error(Exception("HTTP 401 while posting"))
+    assert is_auth_error(Exception("Request failed with status 403"))
+    assert not is_auth_error(Exception("Duplicate of tweet 1840137401403"))
+    assert not is_auth_error(Exception("Rate limited, retry after 1403s"))
+    assert not is_auth_error(Exception("Timed out at 12:04:03.401"))
+
+def test_post_thread_replies_in_order(client, tmp_path):
+    """Test that each part replies to the one before it over one session"""
+    client.tweet.side_effect = [{'id': '1'}, {'id': '2'}]
+    posted = []
+
+    assert TwitterHandler(data_dir=tmp_path).post_thread(["part 1", "part 2"], on_posted=posted.append)
+    assert client.tweet.call_args_list[1] == (("part 2",), {'reply_to': '1'})
+    assert posted == ['1', '2']
+    client.login.assert_called_once()
+
+def test_thread_refused_without_reply_support(mocker, tmp_path):
+    """Test that a client without reply_to posts no part of a thread"""
+    class PlainClient:
+        def login(self, username, password):
+            pass
+
+        def tweet(self, content):
+            return {'id': '1'}
+
+    client = mocker.patch.object(PlainClient, 'tweet', autospec=True, return_value={'id': '1'})
+    mocker.patch('crypto_twitter_bot.twitter_client.TwitterClient', PlainClient)
+    handler = TwitterHandler(data_dir=tmp_path)
+
+    assert not handler.post_thread(["part 1", "part 2"])
+    client.assert_not_called()
+    assert handler.post_thread(["single tweet"])
+
+def test_thread_stops_without_tweet_id(client, tmp_path):
+    """Test that a part without an id is not followed by an unlinked reply"""
+    client.tweet.side_effect = [None, {'id': '2'}]
+    posted = []
+
+    assert not TwitterHandler(data_dir=tmp_path).post_thread(["part 1", "part 2"], on_posted=posted.append)
+    assert client.tweet.call_count == 1
+    assert posted == []